@@ -0,0 +1,426 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import disnake
+import numpy as np
+from openbb import obb
+
+from bot.config import settings as cfg
+from bot.executors import run_fetch
+from bot.uploads import retry_delay
+from utils.market_calendar import EXCHANGE_TZ, next_open, session
+
+ALERTS_DB = cfg.BOTS_PATH / "cache" / "alerts.db"
+
+# Rule kind -> code used in the evaluation arrays
+KINDS: Dict[str, int] = {"above": 0, "below": 1, "move": 2}
+KIND_NAMES = {code: kind for kind, code in KINDS.items()}
+
+# Alert lines sent in a single message
+LINES_PER_MESSAGE = 20
+
+
+class AlertStore:
+    """Per-guild watchlists and alert rules, stored in SQLite.
+
+    Every write bumps `version`, so the engine only rebuilds its arrays when
+    rules changed.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        SQLite database file
+    """
+
+    def __init__(self, path: Union[str, Path] = ALERTS_DB):
+        self.path = Path(path)
+        self.version = 0
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS watchlists ("
+                "guild_id INTEGER, symbol TEXT, PRIMARY KEY (guild_id, symbol))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rules ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER, channel_id INTEGER, "
+                "user_id INTEGER, symbol TEXT, kind TEXT, value REAL, reference REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS rules_guild ON rules (guild_id)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Connection for the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run several writes atomically, the connection is in autocommit mode."""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _write(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
+        cursor = self._conn().execute(query, params)
+        self.version += 1
+        return cursor
+
+    def watch(self, guild_id: int, symbol: str):
+        self._write("INSERT OR IGNORE INTO watchlists VALUES (?, ?)", (guild_id, symbol))
+
+    def unwatch(self, guild_id: int, symbol: str) -> bool:
+        """Remove a symbol and its rules from a guild's watchlist."""
+        removed = self._write(
+            "DELETE FROM watchlists WHERE guild_id = ? AND symbol = ?", (guild_id, symbol)
+        ).rowcount
+        self._write("DELETE FROM rules WHERE guild_id = ? AND symbol = ?", (guild_id, symbol))
+        return bool(removed)
+
+    def watchlist(self, guild_id: int) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT symbol FROM watchlists WHERE guild_id = ? ORDER BY symbol", (guild_id,)
+        )
+        return [row[0] for row in rows]
+
+    def add_rule(
+        self,
+        guild_id: int,
+        channel_id: int,
+        user_id: int,
+        symbol: str,
+        kind: str,
+        value: float,
+        reference: Optional[float] = None,
+    ) -> int:
+        """Add an alert rule, watching its symbol. Returns the rule id."""
+        if kind not in KINDS:
+            raise ValueError(f"Error: Unknown alert kind {kind}")
+        self.watch(guild_id, symbol)
+        return self._write(
+            "INSERT INTO rules (guild_id, channel_id, user_id, symbol, kind, value, reference) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (guild_id, channel_id, user_id, symbol, kind, value, reference),
+        ).lastrowid
+
+    def remove_rule(self, guild_id: int, rule_id: int, user_id: Optional[int] = None) -> bool:
+        """Remove a rule of a guild, only if it belongs to `user_id` when given."""
+        query, params = "DELETE FROM rules WHERE guild_id = ? AND id = ?", (guild_id, rule_id)
+        if user_id is not None:
+            query, params = query + " AND user_id = ?", params + (user_id,)
+        return bool(self._write(query, params).rowcount)
+
+    def guild_rules(self, guild_id: int) -> List[tuple]:
+        """(id, user_id, symbol, kind, value) rows of a guild."""
+        return self._conn().execute(
+            "SELECT id, user_id, symbol, kind, value FROM rules WHERE guild_id = ? ORDER BY id",
+            (guild_id,),
+        ).fetchall()
+
+    def all_rules(self) -> List[tuple]:
+        return self._conn().execute(
+            "SELECT id, guild_id, channel_id, user_id, symbol, kind, value, reference FROM rules"
+        ).fetchall()
+
+    def fired(self, one_shot: List[int], moves: List[Tuple[float, int]]):
+        """Delete triggered threshold rules and move the reference of percent-move rules."""
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM rules WHERE id = ?", [(i,) for i in one_shot])
+            conn.executemany("UPDATE rules SET reference = ? WHERE id = ?", moves)
+        self.version += 1
+
+    def set_references(self, references: List[Tuple[float, int]]):
+        """Set the first reference price of new percent-move rules."""
+        with self._transaction() as conn:
+            conn.executemany("UPDATE rules SET reference = ? WHERE id = ?", references)
+        self.version += 1
+
+
+@dataclass
+class RuleSet:
+    """Alert rules as parallel arrays, one entry per rule."""
+
+    symbols: List[str]
+    ids: np.ndarray
+    guild_ids: np.ndarray
+    channel_ids: np.ndarray
+    user_ids: np.ndarray
+    symbol_idx: np.ndarray
+    kinds: np.ndarray
+    values: np.ndarray
+    references: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "RuleSet":
+        symbols = sorted({row[4] for row in rows})
+        positions = {symbol: i for i, symbol in enumerate(symbols)}
+        columns = list(zip(*rows)) or [[]] * 8
+        return cls(
+            symbols=symbols,
+            ids=np.asarray(columns[0], dtype=np.int64),
+            guild_ids=np.asarray(columns[1], dtype=np.int64),
+            channel_ids=np.asarray(columns[2], dtype=np.int64),
+            user_ids=np.asarray(columns[3], dtype=np.int64),
+            symbol_idx=np.asarray([positions[s] for s in columns[4]], dtype=np.int64),
+            kinds=np.asarray([KINDS[k] for k in columns[5]], dtype=np.int8),
+            values=np.asarray(columns[6], dtype=np.float64),
+            references=np.asarray(
+                [np.nan if r is None else r for r in columns[7]], dtype=np.float64
+            ),
+        )
+
+    def select(self, mask: np.ndarray) -> "RuleSet":
+        """Keep the rules where `mask` is True."""
+        return RuleSet(
+            symbols=self.symbols,
+            ids=self.ids[mask],
+            guild_ids=self.guild_ids[mask],
+            channel_ids=self.channel_ids[mask],
+            user_ids=self.user_ids[mask],
+            symbol_idx=self.symbol_idx[mask],
+            kinds=self.kinds[mask],
+            values=self.values[mask],
+            references=self.references[mask],
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def evaluate(rules: RuleSet, prices: np.ndarray) -> np.ndarray:
+    """Mask of the rules triggered by `prices`, aligned with `rules.symbols`.
+
+    Symbols without a price (NaN) never trigger.
+    """
+    price = prices[rules.symbol_idx]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        move = np.abs(price / rules.references - 1) * 100
+    return (
+        ((rules.kinds == KINDS["above"]) & (price >= rules.values))
+        | ((rules.kinds == KINDS["below"]) & (price <= rules.values))
+        | ((rules.kinds == KINDS["move"]) & (move >= rules.values))
+    )
+
+
+def fetch_quotes(symbols: List[str], provider: str = "fmp") -> Dict[str, float]:
+    """Fetch the last price of several symbols in a single request."""
+    df = obb.equity.price.quote(symbol=",".join(symbols), provider=provider).to_dataframe()
+    df = df.dropna(subset=["last_price"])
+    return dict(zip(df["symbol"].str.upper(), df["last_price"].astype(float)))
+
+
+def owned_by_process(guild_ids: np.ndarray) -> np.ndarray:
+    """Mask of the guilds whose gateway shard runs in this process."""
+    if not cfg.SHARD_COUNT or cfg.SHARD_IDS is None:
+        return np.ones(len(guild_ids), dtype=bool)
+    shards = (guild_ids >> 22) % cfg.SHARD_COUNT
+    return np.isin(shards, cfg.SHARD_IDS)
+
+
+class ChannelSender:
+    """Sends alert messages, at most `rate` messages per second over all channels.
+
+    Parameters
+    ----------
+    rate : float, optional
+        Messages per second, by default 5
+    """
+
+    def __init__(self, rate: float = 5):
+        self.interval = 1 / rate
+        self.sent = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, bot: disnake.Client):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._worker(bot))
+
+    def put(self, channel_id: int, embed: disnake.Embed):
+        self._queue.put_nowait((channel_id, embed))
+
+    async def _worker(self, bot: disnake.Client):
+        while True:
+            channel_id, embed = await self._queue.get()
+            try:
+                await self._send(bot, channel_id, embed)
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(self.interval)
+
+    async def _send(self, bot: disnake.Client, channel_id: int, embed: disnake.Embed):
+        channel = bot.get_channel(channel_id)
+        if channel is None:
+            channel = await bot.fetch_channel(channel_id)
+        for attempt in range(cfg.UPLOAD_ATTEMPTS):
+            try:
+                await channel.send(embed=embed)
+                self.sent += 1
+                return
+            except disnake.HTTPException as error:
+                delay = retry_delay(error, attempt)
+                if delay is None or attempt == cfg.UPLOAD_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(delay)
+
+
+class AlertEngine:
+    """Checks every alert rule against batched quotes on a fixed interval.
+
+    Each cycle fetches the quotes of all watched symbols in batches of
+    `batch_size`, evaluates every rule at once over NumPy arrays, and queues
+    one message per channel on the rate-limited `ChannelSender`. Threshold
+    rules fire once and are removed, percent-move rules fire again after
+    moving the same percentage from the price that triggered them.
+
+    Parameters
+    ----------
+    store : AlertStore
+        Watchlists and rules
+    interval : float, optional
+        Seconds between cycles while the market is open, by default 60
+    batch_size : int, optional
+        Symbols per quote request, by default 100
+    """
+
+    def __init__(self, store: AlertStore, interval: float = 60, batch_size: int = 100):
+        self.store = store
+        self.interval = interval
+        self.batch_size = batch_size
+        self.sender = ChannelSender(cfg.ALERT_SENDS_PER_SECOND)
+        self.cycles = 0
+        self.triggered = 0
+        self._rules: Optional[RuleSet] = None
+        self._version = -1
+        self._task: Optional[asyncio.Task] = None
+
+    def rules(self) -> RuleSet:
+        """Rules of the guilds served by this process, rebuilt only after changes."""
+        if self._rules is None or self._version != self.store.version:
+            version = self.store.version
+            rules = RuleSet.from_rows(self.store.all_rules())
+            self._rules = rules.select(owned_by_process(rules.guild_ids))
+            self._version = version
+        return self._rules
+
+    async def prices(self, symbols: List[str]) -> np.ndarray:
+        """Last prices aligned with `symbols`, NaN where a batch failed."""
+        batches = [
+            symbols[i : i + self.batch_size] for i in range(0, len(symbols), self.batch_size)
+        ]
+        results = await asyncio.gather(
+            *[run_fetch(fetch_quotes, batch, cfg.ALERT_QUOTE_PROVIDER) for batch in batches],
+            return_exceptions=True,
+        )
+        quotes: Dict[str, float] = {}
+        for result in results:
+            if isinstance(result, Exception):
+                traceback.print_exception(type(result), result, result.__traceback__)
+                continue
+            quotes.update(result)
+        return np.asarray([quotes.get(symbol, np.nan) for symbol in symbols], dtype=np.float64)
+
+    async def cycle(self):
+        """Fetch quotes, evaluate every rule and queue the notifications."""
+        rules = await run_fetch(self.rules)
+        if not len(rules):
+            return
+        used = np.unique(rules.symbol_idx)
+        prices = np.full(len(rules.symbols), np.nan)
+        prices[used] = await self.prices([rules.symbols[i] for i in used])
+        self.cycles += 1
+
+        # New percent-move rules measure from the first price seen
+        new = (rules.kinds == KINDS["move"]) & np.isnan(rules.references)
+        if new.any():
+            start = prices[rules.symbol_idx[new]]
+            known = ~np.isnan(start)
+            await run_fetch(
+                self.store.set_references,
+                list(zip(start[known].tolist(), rules.ids[new][known].tolist())),
+            )
+            rules.references[np.flatnonzero(new)[known]] = start[known]
+
+        fired = rules.select(evaluate(rules, prices))
+        if not len(fired):
+            return
+        self.triggered += len(fired)
+
+        price = prices[fired.symbol_idx]
+        moves = fired.kinds == KINDS["move"]
+        await run_fetch(
+            self.store.fired,
+            fired.ids[~moves].tolist(),
+            list(zip(price[moves].tolist(), fired.ids[moves].tolist())),
+        )
+        self.notify(fired, price)
+
+    def notify(self, fired: RuleSet, price: np.ndarray):
+        """Queue one message per channel listing its triggered rules."""
+        order = np.argsort(fired.channel_ids, kind="stable")
+        channels, starts = np.unique(fired.channel_ids[order], return_index=True)
+        for channel_id, rows in zip(channels, np.split(order, starts[1:])):
+            lines = [alert_line(fired, i, price[i]) for i in rows]
+            for i in range(0, len(lines), LINES_PER_MESSAGE):
+                embed = disnake.Embed(
+                    title="Price alerts",
+                    colour=cfg.COLOR,
+                    description="\n".join(lines[i : i + LINES_PER_MESSAGE]),
+                )
+                embed.set_author(name=cfg.AUTHOR_NAME, icon_url=cfg.AUTHOR_ICON_URL)
+                self.sender.put(int(channel_id), embed)
+
+    async def run_forever(self):
+        """Run a cycle every `interval` seconds while the market is open."""
+        while True:
+            now = datetime.now(timezone.utc)
+            bounds = session(now.astimezone(EXCHANGE_TZ).date())
+            if bounds is None or not bounds[0] <= now < bounds[1]:
+                # Prices do not move outside the session
+                await asyncio.sleep(min((next_open(now) - now).total_seconds(), 3600))
+                continue
+            started = time.monotonic()
+            try:
+                await self.cycle()
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self, bot: disnake.Client):
+        """Start the alert loop and the sender, once."""
+        self.sender.start(bot)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run_forever())
+
+
+def alert_line(rules: RuleSet, i: int, price: float) -> str:
+    symbol = rules.symbols[rules.symbol_idx[i]]
+    kind = KIND_NAMES[int(rules.kinds[i])]
+    if kind == "move":
+        condition = f"moved {rules.values[i]:g}% from {rules.references[i]:,.2f}"
+    else:
+        condition = f"is {kind} {rules.values[i]:,.2f}"
+    return f"<@{rules.user_ids[i]}> **{symbol}** {condition}, now {price:,.2f}"
+
+
+ALERT_STORE = AlertStore()
+ALERT_ENGINE = AlertEngine(ALERT_STORE, cfg.ALERT_INTERVAL, cfg.ALERT_BATCH_SIZE)
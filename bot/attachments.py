@@ -0,0 +1,100 @@
+import contextlib
+import hashlib
+import time
+from typing import Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import disnake
+
+from bot.executors import RESULT_CACHE, run_fetch
+from models.api_models import PlotsResponse
+from utils.deadline import DeadlineExceeded
+
+# Stop reusing a URL this many seconds before Discord expires it
+EXPIRY_MARGIN = 3600
+# TTL for URLs without an expiry parameter
+DEFAULT_URL_TTL = 12 * 3600
+
+
+def image_hash(plot: PlotsResponse) -> str:
+    """Hash of the encoded image, the filename is not part of it."""
+    image64 = plot.image64
+    if isinstance(image64, str):
+        image64 = image64.encode("utf-8")
+    return hashlib.blake2b(image64, digest_size=20).hexdigest()
+
+
+def url_ttl(url: str) -> float:
+    """Seconds a Discord CDN URL can still be reused.
+
+    Signed attachment URLs carry their expiry as a hex unix timestamp in the
+    `ex` query parameter.
+    """
+    try:
+        expires = int(parse_qs(urlparse(url).query)["ex"][0], 16)
+    except (KeyError, IndexError, ValueError):
+        return DEFAULT_URL_TTL
+    return expires - time.time() - EXPIRY_MARGIN
+
+
+class AttachmentStore:
+    """Maps image content hashes to the CDN URLs they were uploaded to.
+
+    Entries live in the result cache, so every worker sharing it reuses the
+    same uploads, and expire before Discord stops serving the URL. Lookups run
+    on the fetch executor, the shared cache is a SQLite store.
+    """
+
+    @staticmethod
+    def _get(plots: List[PlotsResponse]) -> List[Optional[str]]:
+        return [RESULT_CACHE.get(("attachment", image_hash(plot))) for plot in plots]
+
+    @staticmethod
+    def _forget(plots: List[PlotsResponse]):
+        for plot in plots:
+            RESULT_CACHE.pop(("attachment", image_hash(plot)))
+
+    @staticmethod
+    def _set(urls: List[tuple]):
+        for plot, url in urls:
+            ttl = url_ttl(url)
+            if ttl > 0:
+                RESULT_CACHE.set(("attachment", image_hash(plot)), url, ttl)
+
+    async def get(self, plots: List[PlotsResponse]) -> List[Optional[str]]:
+        """Get the CDN URLs of identical images, None where there is no valid one."""
+        try:
+            return await run_fetch(self._get, list(plots))
+        except DeadlineExceeded:
+            # Out of time for lookups, upload the images instead
+            return [None] * len(plots)
+
+    async def forget(self, plots: List[PlotsResponse]):
+        await run_fetch(self._forget, list(plots))
+
+    async def remember(self, message: Optional[disnake.Message], plots: Iterable[tuple]):
+        """Store the URLs of the attachments of a sent message.
+
+        Parameters
+        ----------
+        message : disnake.Message
+            The message sent, nothing is stored if it is None
+        plots : Iterable[tuple]
+            (attachment filename, plot) pairs for the files uploaded with it
+        """
+        if message is None:
+            return
+        by_name = dict(plots)
+        urls = [
+            (by_name[attachment.filename], attachment.url)
+            for attachment in message.attachments
+            if attachment.filename in by_name
+        ]
+        if not urls:
+            return
+        # Out of time, the reply is sent and only the URL reuse is lost
+        with contextlib.suppress(DeadlineExceeded):
+            await run_fetch(self._set, urls)
+
+
+ATTACHMENT_STORE = AttachmentStore()
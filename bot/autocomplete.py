@@ -0,0 +1,205 @@
+import asyncio
+import contextlib
+import json
+import re
+import threading
+import traceback
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from openbb import obb
+
+from bot.config import settings as cfg
+from bot.executors import run_fetch
+
+SYMBOLS_CACHE = cfg.BOTS_PATH / "cache" / "symbols.json"
+
+SEC_FORMS = [
+    '1', '1-A', '1-E', '1-K', '1-N', '1-SA', '1-U', '1-Z', '10',
+    '10-D', '10-K', '10-M', '10-Q', '11-K', '12b-25', '13F', '13H',
+    '144', '15', '15F', '17-H', '18', '18-K', '19b-4', '19b-4(e)',
+    '19b-7', '2-E', '20-F', '24F-2', '25', '3', '4', '40-F', '5',
+    '6-K', '7-M', '8-A', '8-K', '8-M', '9-M', 'ABS-15G', 'ABS-EE',
+    'ABS DD-15E', 'ADV', 'ADV-E', 'ADV-H', 'ADV-NR', 'ADV-W', 'ATS',
+    'ATS-N', 'ATS-R', 'BD', 'BD-N', 'BDW', 'C', 'CA-1', 'CB',
+    'CFPORTAL', 'CRS', 'CUSTODY', 'D', 'F-1', 'F-10', 'F-3', 'F-4',
+    'F-6', 'F-7', 'F-8', 'F-80', 'F-N', 'F-X', 'ID', 'MA', 'MA-I',
+    'MA-NR', 'MA-W', 'MSD', 'MSDW', 'N-14', 'N-17D-1', 'N-17f-1',
+    'N-17f-2', 'N-18f-1', 'N-1A', 'N-2', 'N-23c-3', 'N-27D-1', 'N-3',
+    'N-4', 'N-5', 'N-54A', 'N-54C', 'N-6', 'N-6EI-1', 'N-6F', 'N-8A',
+    'N-8B-2', 'N-8B-4', 'N-8F', 'N-CEN'
+]
+
+# Discord allows at most 25 autocomplete choices
+MAX_CHOICES = 24
+# Prefix matches looked at before ranking, keeps broad prefixes like "A" cheap
+MAX_SCAN = 200
+
+
+def normalize(text: str) -> str:
+    """Uppercase and strip punctuation, so "brk.b" matches "BRK-B"."""
+    return re.sub(r"[^0-9A-Z]", "", text.upper())
+
+
+def deletions(key: str) -> Set[str]:
+    """The key and every variant of it with one character removed.
+
+    Two keys within one typo (insertion, deletion, substitution or swap) share
+    at least one of these variants.
+    """
+    return {key} | {key[:idx] + key[idx + 1 :] for idx in range(len(key))}
+
+
+class PrefixIndex:
+    """Sorted array of normalized keys searched with bisect.
+
+    Parameters
+    ----------
+    entries : Iterable[Tuple[str, Any]]
+        Pairs of (key, value), a key can map to several values
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Any]]):
+        pairs = sorted((normalize(key), value) for key, value in entries)
+        self.keys = [key for key, _ in pairs]
+        self.values = [value for _, value in pairs]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, prefix: str, limit: int = MAX_SCAN) -> Iterator[Tuple[str, Any]]:
+        """Yield (key, value) pairs whose key starts with `prefix`."""
+        prefix = normalize(prefix)
+        idx = bisect_left(self.keys, prefix)
+        end = min(len(self.keys), idx + limit)
+        while idx < end and self.keys[idx].startswith(prefix):
+            yield self.keys[idx], self.values[idx]
+            idx += 1
+
+
+class SymbolDirectory:
+    """Symbol and company name directory backed by a local cache file.
+
+    The index is rebuilt off the event loop and swapped in atomically, so
+    searches never wait on a refresh.
+    """
+
+    def __init__(self, cache_path: Path = SYMBOLS_CACHE):
+        self.cache_path = cache_path
+        self.names: Dict[str, str] = {}
+        self.symbols = PrefixIndex([])
+        self.words = PrefixIndex([])
+        self.typos: Dict[str, List[str]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load the directory from the local cache, if there is one."""
+        with contextlib.suppress(OSError, ValueError):
+            self.build(json.loads(self.cache_path.read_text()))
+
+    def build(self, rows: List[List[str]]):
+        """Build the indexes from [symbol, name] rows."""
+        names = {symbol.upper(): name or "" for symbol, name in rows if symbol}
+        symbols = PrefixIndex((symbol, symbol) for symbol in names)
+        # Index the name from every word on, so "bank of am" finds "Bank of America"
+        # and "america" finds it too. The position of the word is used for ranking.
+        entries = []
+        for symbol, name in names.items():
+            parts = name.split()
+            entries.extend(
+                (" ".join(parts[pos:]), (pos, symbol))
+                for pos, word in enumerate(parts)
+                if normalize(word)
+            )
+        words = PrefixIndex(entries)
+        # Fallback when prefixes find too little: symbols one typo away
+        typos: Dict[str, List[str]] = {}
+        for symbol in names:
+            for variant in deletions(normalize(symbol)):
+                typos.setdefault(variant, []).append(symbol)
+        with self._lock:
+            self.names, self.symbols, self.words = names, symbols, words
+            self.typos = typos
+
+    def fetch(self) -> List[List[str]]:
+        """Download the directory and write it to the local cache."""
+        df = obb.equity.search("", provider="sec").to_dataframe()
+        rows = df[["symbol", "name"]].fillna("").values.tolist()
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.cache_path.write_text(json.dumps(rows))
+        return rows
+
+    def refresh(self):
+        """Fetch the directory and rebuild the indexes, blocking."""
+        self.build(self.fetch())
+
+    async def refresh_forever(self):
+        """Refresh the directory every SYMBOLS_REFRESH_HOURS."""
+        while True:
+            try:
+                await run_fetch(self.refresh)
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(cfg.SYMBOLS_REFRESH_HOURS * 3600)
+
+    def start(self):
+        """Start the background refresh task, once."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.refresh_forever())
+
+    def search(self, query: str, limit: int = MAX_CHOICES) -> List[Tuple[str, str]]:
+        """Return (symbol, name) pairs ranked by how well they match `query`.
+
+        Exact symbols rank first, then symbol prefixes (shortest first), then
+        company names matching from the start of a word on (earlier words first).
+        When those leave choices free, symbols one typo away are added. Every
+        step is an index lookup, searches stay cheap on the event loop.
+        """
+        with self._lock:
+            names, symbols, words = self.names, self.symbols, self.words
+            typos = self.typos
+
+        query_key = normalize(query)
+        if not query_key:
+            return [(symbol, names[symbol]) for _, symbol in symbols.search("", limit)]
+
+        ranked: Dict[str, tuple] = {}
+        for key, symbol in symbols.search(query_key):
+            ranked[symbol] = (0 if key == query_key else 1, len(key), symbol)
+        for _, (pos, symbol) in words.search(query_key):
+            rank = (2, pos, symbol)
+            if rank < ranked.get(symbol, (4,)):
+                ranked[symbol] = rank
+
+        if len(ranked) < limit and len(query_key) > 1:
+            for variant in deletions(query_key):
+                for symbol in typos.get(variant, ()):
+                    rank = (3, abs(len(symbol) - len(query_key)), symbol)
+                    if rank < ranked.get(symbol, (4,)):
+                        ranked[symbol] = rank
+
+        return [
+            (symbol, names[symbol])
+            for symbol in sorted(ranked, key=ranked.__getitem__)[:limit]
+        ]
+
+
+SEC_FORM_INDEX = PrefixIndex((form, form) for form in SEC_FORMS)
+SYMBOL_DIRECTORY = SymbolDirectory()
+
+
+async def sec_form_autocomplete(inter, form: str) -> List[str]:
+    """Autocomplete for SEC forms"""
+    return [value for _, value in SEC_FORM_INDEX.search(form, MAX_CHOICES)]
+
+
+async def ticker_autocomplete(inter, ticker: str) -> Dict[str, str]:
+    """Autocomplete for tickers, matching symbols and company names"""
+    SYMBOL_DIRECTORY.start()
+    return {
+        f"{symbol} - {name}"[:100] if name else symbol: symbol
+        for symbol, name in SYMBOL_DIRECTORY.search(ticker)
+    }
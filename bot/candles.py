@@ -0,0 +1,126 @@
+from datetime import date, timedelta
+from typing import Optional, Sequence
+
+import numpy as np
+from openbb import obb
+
+from bot.helpers import CANDLE_LAYOUT, merge_layout
+from bot.indicators import BAR_STORE, bars_from_chart
+from bot.providers import PRICE_ROUTER
+from utils.market_calendar import last_session_day
+from utils.pywry_figure import PyWryFigure
+
+
+def candle_params(ticker: str, interval: str, days: int, end_date: Optional[date] = None) -> dict:
+    """Build the price history query of a candlestick chart.
+
+    Its values identify the bars in cache keys.
+
+    Parameters
+    ----------
+    ticker : str
+        Stock ticker, upper case
+    interval : str
+        Bar interval, e.g. "1d"
+    days : int
+        Number of days in the past to show
+    end_date : date, optional
+        Last day shown, by default the last session day so nights and weekends
+        reuse the bars of the last session
+    """
+    end_date = end_date or last_session_day()
+    return {
+        "symbol": ticker,
+        "start_date": (end_date - timedelta(days=days)).strftime("%Y-%m-%d"),
+        "end_date": end_date.strftime("%Y-%m-%d"),
+        "interval": interval,
+        "chart": True,
+    }
+
+
+def fetch_candles(params: dict) -> dict:
+    """Fetch the chart content from whichever price provider answers first."""
+    return PRICE_ROUTER.fetch(
+        lambda provider: obb.equity.price.historical(**params, provider=provider).chart.content
+    )
+
+
+def candle_title(ticker: str, interval: str) -> str:
+    return f"{ticker} {interval.replace('1d', 'Daily')}"
+
+
+def candle_figure(
+    data: dict, ticker: str, interval: str, overlays: Sequence[str] = ()
+) -> PyWryFigure:
+    """Build the candlestick chart with its indicator overlays.
+
+    Parameters
+    ----------
+    data : dict
+        Plotly chart content with the candlestick trace first
+    ticker : str
+        Stock ticker, upper case
+    interval : str
+        Bar interval, e.g. "1d"
+    overlays : Sequence[str], optional
+        Indicators as returned by `parse_indicators`
+    """
+    y_min, y_max = min(data["data"][0]["low"]), max(data["data"][0]["high"])
+    y_range = y_max - y_min
+    y_min -= y_range * 0.2
+    y_max += y_range * 0.08
+
+    # Indicators are updated from the newest bars only, see BAR_STORE
+    traces, panels = [], {}
+    if overlays:
+        traces, panels = BAR_STORE.indicator_parts(
+            (ticker, interval), bars_from_chart(data), overlays
+        )
+
+    # The chart content is plotly JSON, no need to validate it again
+    return PyWryFigure(
+        data=[*data["data"], *traces],
+        layout=merge_layout(
+            data.get("layout", {}),
+            CANDLE_LAYOUT,
+            panels,
+            title=dict(text=candle_title(ticker, interval)),
+            yaxis=dict(range=[y_min, y_max], autorange=False),
+            showlegend=True if traces else None,
+            legend=dict(orientation="h", x=0, y=1) if traces else None,
+        ),
+        validate=False,
+    )
+
+
+def candle_summary(data: dict, title: str) -> dict:
+    """Build a text response with the last price, range and change of the bars.
+
+    Parameters
+    ----------
+    data : dict
+        Plotly chart content with the candlestick trace first
+    title : str
+        Title of the response
+    """
+    candles = data["data"][0]
+    close = np.asarray(candles["close"], dtype=float)
+    low = np.nanmin(np.asarray(candles["low"], dtype=float))
+    high = np.nanmax(np.asarray(candles["high"], dtype=float))
+    change = close[-1] - close[0]
+    change_pct = change / close[0] * 100 if close[0] else 0.0
+
+    return {
+        "title": title,
+        "description": f"{candles['x'][0]} to {candles['x'][-1]}",
+        "embeds": [
+            {"title": "Last", "description": f"{close[-1]:,.2f}", "inline": True},
+            {"title": "Range", "description": f"{low:,.2f} - {high:,.2f}", "inline": True},
+            {
+                "title": "Change",
+                "description": f"{change:+,.2f} ({change_pct:+.2f}%)",
+                "inline": True,
+            },
+            {"footer": "Charts are busy, showing a summary instead"},
+        ],
+    }
@@ -0,0 +1,149 @@
+import traceback
+
+import disnake
+from disnake.ext import commands
+
+from bot.alerts import ALERT_STORE
+from bot.autocomplete import ticker_autocomplete
+from bot.executors import run_fetch
+from bot.showview import ShowView
+
+from ..run_bot import OBB_Bot
+
+
+class AlertsCommands(commands.Cog):
+    """Watchlist and price alert commands."""
+
+    def __init__(self, bot: "OBB_Bot"):
+        self.bot = bot
+
+    @commands.slash_command(name="watchlist", dm_permission=False)
+    async def watchlist(self, inter: disnake.AppCmdInter):
+        """Manage the server watchlist."""
+
+    @watchlist.sub_command(name="add")
+    async def watchlist_add(
+        self,
+        inter: disnake.AppCmdInter,
+        ticker: str = commands.Param(autocomplete=ticker_autocomplete),
+    ):
+        """Adds a ticker to the server watchlist.
+
+        Parameters
+        -----------
+        ticker: Stock Ticker
+        """
+        ticker = ticker.upper()
+        await run_fetch(ALERT_STORE.watch, inter.guild_id, ticker)
+        await ShowView().discord(
+            inter, "watchlist", {"title": "Watchlist", "description": f"Added {ticker}"}
+        )
+
+    @watchlist.sub_command(name="remove")
+    async def watchlist_remove(
+        self,
+        inter: disnake.AppCmdInter,
+        ticker: str = commands.Param(autocomplete=ticker_autocomplete),
+    ):
+        """Removes a ticker and its alerts from the server watchlist.
+
+        Parameters
+        -----------
+        ticker: Stock Ticker
+        """
+        ticker = ticker.upper()
+        if not inter.author.guild_permissions.manage_guild:
+            return await ShowView().discord(
+                inter, "watchlist", "Error: Needs the Manage Server permission", error=True
+            )
+        if not await run_fetch(ALERT_STORE.unwatch, inter.guild_id, ticker):
+            return await ShowView().discord(
+                inter, "watchlist", f"Error: {ticker} is not on the watchlist", error=True
+            )
+        await ShowView().discord(
+            inter, "watchlist", {"title": "Watchlist", "description": f"Removed {ticker}"}
+        )
+
+    @watchlist.sub_command(name="show")
+    async def watchlist_show(self, inter: disnake.AppCmdInter):
+        """Shows the server watchlist and its alerts."""
+        symbols = await run_fetch(ALERT_STORE.watchlist, inter.guild_id)
+        rules = await run_fetch(ALERT_STORE.guild_rules, inter.guild_id)
+
+        lines = [
+            f"`#{rule_id}` **{symbol}** {kind} {value:g}{'%' if kind == 'move' else ''} "
+            f"by <@{user_id}>"
+            for rule_id, user_id, symbol, kind, value in rules[:40]
+        ]
+        await ShowView().discord(
+            inter,
+            "watchlist",
+            {
+                "title": "Watchlist",
+                "description": ", ".join(symbols) or "The watchlist is empty",
+                "embeds": [{"title": "Alerts", "description": "\n".join(lines)[:1024]}],
+            },
+        )
+
+    @commands.slash_command(name="alert", dm_permission=False)
+    async def alert(self, inter: disnake.AppCmdInter):
+        """Manage price alerts."""
+
+    @alert.sub_command(name="add")
+    async def alert_add(
+        self,
+        inter: disnake.AppCmdInter,
+        ticker: str = commands.Param(autocomplete=ticker_autocomplete),
+        kind: str = commands.Param(choices=["above", "below", "move"]),
+        value: float = commands.Param(gt=0),
+    ):
+        """Alerts this channel when a ticker crosses a price or moves by a percentage.
+
+        Parameters
+        -----------
+        ticker: Stock Ticker
+        kind: above/below a price, or move by a percentage in either direction
+        value: Price, or percentage for move alerts
+        """
+        try:
+            ticker = ticker.upper()
+            rule_id = await run_fetch(
+                ALERT_STORE.add_rule,
+                inter.guild_id,
+                inter.channel_id,
+                inter.author.id,
+                ticker,
+                kind,
+                value,
+            )
+        except Exception as e:
+            traceback.print_exc()
+            return await ShowView().discord(inter, "alert", str(e), error=True)
+
+        condition = f"moves {value:g}%" if kind == "move" else f"is {kind} {value:,.2f}"
+        await ShowView().discord(
+            inter,
+            "alert",
+            {"title": f"Alert #{rule_id}", "description": f"When {ticker} {condition}"},
+        )
+
+    @alert.sub_command(name="remove")
+    async def alert_remove(self, inter: disnake.AppCmdInter, alert_id: int):
+        """Removes one of your alerts, or any alert with the Manage Server permission.
+
+        Parameters
+        -----------
+        alert_id: Alert number shown by /watchlist show
+        """
+        owner = None if inter.author.guild_permissions.manage_guild else inter.author.id
+        if not await run_fetch(ALERT_STORE.remove_rule, inter.guild_id, alert_id, owner):
+            return await ShowView().discord(
+                inter, "alert", f"Error: No alert #{alert_id} of yours", error=True
+            )
+        await ShowView().discord(
+            inter, "alert", {"title": "Alerts", "description": f"Removed alert #{alert_id}"}
+        )
+
+
+def setup(bot: "OBB_Bot"):
+    bot.add_cog(AlertsCommands(bot))
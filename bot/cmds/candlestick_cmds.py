@@ -1,11 +1,20 @@
 import traceback
-from datetime import datetime, timedelta
 
 import disnake
 from disnake.ext import commands
-from openbb import obb
 
+from bot.autocomplete import ticker_autocomplete
+from bot.candles import (
+    candle_figure,
+    candle_params,
+    candle_summary,
+    candle_title,
+    fetch_candles,
+)
+from bot.executors import cached_fetch, try_render
+from bot.indicators import parse_indicators
 from bot.showview import ShowView
+from utils.market_calendar import bars_ttl
 
 from ..run_bot import OBB_Bot
 
@@ -15,13 +24,12 @@ class candlestickCommands(commands.Cog):
 
     def __init__(self, bot: "OBB_Bot"):
         self.bot = bot
-        self.plot = bot.plot
 
     @commands.slash_command(name="candle")
     async def candle(
         self,
         inter: disnake.AppCmdInter,
-        ticker: str,
+        ticker: str = commands.Param(autocomplete=ticker_autocomplete),
         interval: str = commands.Param(
             choices=[
                 "1m",
@@ -35,6 +43,7 @@ class candlestickCommands(commands.Cog):
             default="1d",
         ),
         days: int = 200,
+        indicators: str = "",
     ):
         """Shows a daily candlestick chart for the ticker provided.
 
@@ -43,62 +52,39 @@ class candlestickCommands(commands.Cog):
         ticker: Stock Ticker
         interval: Select whether to show 1day, 15min, or 5min intervals
         days: Number of days in the past to show
+        indicators: Overlays separated by commas: sma, ema, bbands, vwap, rsi, macd
         """
 
         try:
             await inter.response.defer()
 
-            # Hardcoded parameters
-            provider = "fmp"  # can also be 'polygon' or 'intrinio'
-
             # Pre-processing of parameters
             ticker = ticker.upper()
+            overlays = parse_indicators(indicators, intraday=interval != "1d")
 
-            params = {
-                "symbol": ticker,
-                "provider": provider,
-                "start_date": (datetime.now() - timedelta(days=days)).strftime(
-                    "%Y-%m-%d"
-                ),
-                "end_date": datetime.now().strftime("%Y-%m-%d"),
-                "interval": interval,
-                "chart": True,
-            }
-
-            # Get the data
-            data = obb.equity.price.historical(**params).chart.content
-
-            # Format for display
-            title = f"{ticker} {interval.replace('1d', 'Daily')}"
-
-            fig = (
-                self.plot()
-                .update(data)
-                .update_layout(
-                    margin=dict(l=80, r=10, t=40, b=20),
-                    paper_bgcolor="#111111",
-                    plot_bgcolor="rgba(0,0,0,0)",
-                    height=762,
-                    width=1430,
-                    title=dict(text=title, x=0.5),
-                    xaxis=dict(tick0=0.5, tickangle=0),
-                )
-            )
+            # Nights and weekends reuse the bars of the last session
+            params = candle_params(ticker, interval, days)
 
-            y_min, y_max = min(fig.data[0].low), max(fig.data[0].high)
-            y_range = y_max - y_min
-            y_min -= y_range * 0.2
-            y_max += y_range * 0.08
+            # Bars are kept until the next bar can change
+            ttl = bars_ttl(interval)
 
-            fig.update_layout(yaxis=dict(range=[y_min, y_max], autorange=False))
+            # Get the data from whichever price provider answers first
+            data = await cached_fetch(("candle", *params.values()), fetch_candles, params, ttl=ttl)
+
+            plots = await try_render(
+                ("candle", *params.values(), *overlays),
+                lambda: candle_figure(data, ticker, interval, overlays).prepare_image(),
+                ttl,
+            )
 
-            response: dict = {"plots": fig.prepare_image()}
+            # Summarize the bars while charts can not be rendered
+            response = {"plots": plots} if plots else candle_summary(data, candle_title(ticker, interval))
 
         except Exception as e:
             traceback.print_exc()
             return await ShowView().discord(inter, "candle", str(e), error=True)
 
-        await ShowView().discord(inter, "candle", response, no_embed=True)
+        await ShowView().discord(inter, "candle", response, no_embed=plots is not None)
 
 
 def setup(bot: "OBB_Bot"):
@@ -0,0 +1,189 @@
+import asyncio
+import re
+import traceback
+from datetime import timedelta
+from typing import Dict, List
+
+import disnake
+import pandas as pd
+from disnake.ext import commands
+from openbb import obb
+
+from bot.config import settings as cfg
+from bot.executors import cached_fetch, try_render
+from bot.providers import PRICE_ROUTER
+from bot.showview import ShowView
+from utils.market_calendar import bars_ttl, last_session_day
+
+from ..run_bot import OBB_Bot
+
+
+def fetch_close(ticker: str, start_date: str, end_date: str, interval: str) -> pd.Series:
+    """Fetch the close prices for a ticker from whichever price provider answers first."""
+    df = PRICE_ROUTER.fetch(
+        lambda provider: obb.equity.price.historical(
+            symbol=ticker,
+            provider=provider,
+            start_date=start_date,
+            end_date=end_date,
+            interval=interval,
+        ).to_dataframe()
+    )
+    return df["close"].rename(ticker)
+
+
+def rebase(closes: Dict[str, pd.Series]) -> pd.DataFrame:
+    """Align close prices on a common date index and rebase them to % returns."""
+    df = pd.concat(closes, axis=1).sort_index().ffill().dropna()
+    return df.div(df.iloc[0]).sub(1).mul(100)
+
+
+def returns_summary(returns: pd.DataFrame, title: str) -> dict:
+    """Build a text response with the total return of each ticker.
+
+    Parameters
+    ----------
+    returns : pd.DataFrame
+        % returns as returned by `rebase`
+    title : str
+        Title of the response
+    """
+    last = returns.iloc[-1].sort_values(ascending=False)
+    return {
+        "title": title,
+        "description": f"{returns.index[0]:%Y-%m-%d} to {returns.index[-1]:%Y-%m-%d}",
+        "embeds": [
+            *(
+                {"title": symbol, "description": f"{value:+,.2f}%", "inline": True}
+                for symbol, value in last.items()
+            ),
+            {"footer": "Charts are busy, showing a summary instead"},
+        ],
+    }
+
+
+class CompareCommands(commands.Cog):
+    """Comparison commands."""
+
+    def __init__(self, bot: "OBB_Bot"):
+        self.bot = bot
+        self.plot = bot.plot
+
+    @commands.slash_command(name="compare")
+    async def compare(
+        self,
+        inter: disnake.AppCmdInter,
+        tickers: str,
+        interval: str = commands.Param(
+            choices=[
+                "1h",
+                "1d",
+            ],
+            default="1d",
+        ),
+        days: int = 200,
+    ):
+        """Compares the returns of several tickers on one chart.
+
+        Parameters
+        -----------
+        tickers: Stock Tickers separated by commas or spaces, e.g. AAPL,MSFT,GOOG
+        interval: Select whether to compare hourly or daily returns
+        days: Number of days in the past to show
+        """
+
+        try:
+            await inter.response.defer()
+
+            # Pre-processing of parameters
+            symbols: List[str] = list(
+                dict.fromkeys(t for t in re.split(r"[,\s]+", tickers.upper()) if t)
+            )
+            if not symbols:
+                raise ValueError("Error: No tickers provided")
+            if len(symbols) > cfg.COMPARE_MAX_TICKERS:
+                raise ValueError(
+                    f"Error: Compare up to {cfg.COMPARE_MAX_TICKERS} tickers at a time"
+                )
+
+            # Nights and weekends reuse the closes of the last session
+            last_day = last_session_day()
+            start_date = (last_day - timedelta(days=days)).strftime("%Y-%m-%d")
+            end_date = last_day.strftime("%Y-%m-%d")
+
+            # Closes are kept until the next bar can change
+            ttl = bars_ttl(interval)
+
+            # Get the data concurrently, keeping whatever comes back in time
+            results = await asyncio.gather(
+                *[
+                    asyncio.wait_for(
+                        cached_fetch(
+                            ("close", symbol, start_date, end_date, interval),
+                            fetch_close,
+                            symbol,
+                            start_date,
+                            end_date,
+                            interval,
+                            ttl=ttl,
+                        ),
+                        timeout=cfg.FETCH_TIMEOUT,
+                    )
+                    for symbol in symbols
+                ],
+                return_exceptions=True,
+            )
+            closes = {
+                symbol: result
+                for symbol, result in zip(symbols, results)
+                if isinstance(result, pd.Series) and not result.empty
+            }
+            failed = [symbol for symbol in symbols if symbol not in closes]
+
+            if not closes:
+                raise ValueError("Error: No data found for the tickers provided")
+
+            returns = rebase(closes)
+
+            # Format for display
+            title = f"{', '.join(closes)} {interval.replace('1d', 'Daily')} Returns"
+
+            def render():
+                fig = self.plot()
+                for symbol in returns.columns:
+                    fig.add_scatter(
+                        x=returns.index, y=returns[symbol], mode="lines", name=symbol
+                    )
+                fig.update_layout(
+                    margin=dict(l=80, r=10, t=40, b=20),
+                    paper_bgcolor="#111111",
+                    plot_bgcolor="rgba(0,0,0,0)",
+                    height=762,
+                    width=1430,
+                    title=dict(text=title, x=0.5),
+                    yaxis=dict(ticksuffix="%"),
+                    legend=dict(orientation="h", x=0, y=1),
+                )
+                return fig.prepare_image()
+
+            plots = await try_render(
+                ("compare", *closes, start_date, end_date, interval), render, ttl
+            )
+
+            # Summarize the returns while charts can not be rendered
+            response = {"plots": plots} if plots else returns_summary(returns, title)
+            if failed:
+                note = f"No data for {', '.join(failed)}"
+                response["description"] = (
+                    f"{response['description']}\n{note}" if plots is None else note
+                )
+
+        except Exception as e:
+            traceback.print_exc()
+            return await ShowView().discord(inter, "compare", str(e), error=True)
+
+        await ShowView().discord(inter, "compare", response, no_embed=plots is not None)
+
+
+def setup(bot: "OBB_Bot"):
+    bot.add_cog(CompareCommands(bot))
@@ -1,10 +1,29 @@
+import asyncio
 import traceback
 
 import disnake
 from disnake.ext import commands
-from openbb import obb
 
+from bot.autocomplete import ticker_autocomplete
+from bot.executors import cached_fetch, try_render
+from bot.ratios import (
+    METRICS_PERIODS,
+    derive_metrics,
+    metrics_figure,
+    metrics_table,
+    metrics_text,
+)
 from bot.showview import ShowView
+from bot.statements import (
+    STATEMENTS,
+    fetch_statement,
+    statement_data,
+    statement_figure,
+    statement_text,
+)
+from bot.views import StatementView
+from utils.market_calendar import last_session_day, statement_ttl
+from utils.pywry_figure import PyWryFigure
 
 from ..run_bot import OBB_Bot
 
@@ -16,11 +35,106 @@ class FundamentalsCommands(commands.Cog):
         self.bot = bot
         self.plot_df = bot.plot_df
 
+    async def statement(
+        self, inter: disnake.AppCmdInter, statement: str, ticker: str, period: str
+    ):
+        """Fetch, render and send a single financial statement."""
+        try:
+            await inter.response.defer()
+
+            ticker = ticker.upper()
+
+            # Statements only change around earnings, outside the session
+            ttl = statement_ttl()
+
+            df = await cached_fetch(
+                ("statement", statement, ticker, period),
+                fetch_statement,
+                statement,
+                ticker,
+                period,
+                ttl=ttl,
+            )
+            plots = await try_render(
+                ("statement", statement, ticker, period, 1),
+                lambda: statement_figure(statement_data(df, statement)).prepare_table(),
+                ttl,
+            )
+
+            response = {"title": f"{ticker} {STATEMENTS[statement][1]}"}
+            if plots is None:
+                # Answer with a text table while tables can not be rendered
+                response["description"] = statement_text(statement_data(df, statement))
+                response["embeds"] = [{"footer": "Tables are busy, showing text instead"}]
+                view = None
+            else:
+                # Other periods are paged from the fetched frame, no need to re-fetch
+                response["plots"] = plots
+                view = StatementView(inter, statement, ticker, period, df)
+
+        except Exception as e:
+            traceback.print_exc()
+            return await ShowView().discord(inter, statement, str(e), error=True)
+
+        await ShowView().discord(inter, statement, response, view=view)
+
+    async def metrics(self, inter: disnake.AppCmdInter, table: str, ticker: str, period: str):
+        """Derive, render and send the ratios or growth table."""
+        try:
+            await inter.response.defer()
+
+            ticker = ticker.upper()
+
+            ttl = statement_ttl()
+
+            # Enough periods for the YoY growth of every period shown
+            frames = await asyncio.gather(
+                *[
+                    cached_fetch(
+                        ("statement", statement, ticker, period, METRICS_PERIODS),
+                        fetch_statement,
+                        statement,
+                        ticker,
+                        period,
+                        METRICS_PERIODS,
+                        ttl=ttl,
+                    )
+                    for statement in STATEMENTS
+                ]
+            )
+
+            # Ratios and growth are derived together once per statements release
+            key = ("metrics", ticker, period, last_session_day())
+            metrics = await cached_fetch(
+                key, derive_metrics, dict(zip(STATEMENTS, frames)), period, ttl=ttl
+            )
+            data = metrics_table(metrics[table])
+            if data.empty:
+                raise ValueError(f"Error: No {table} available for {ticker}")
+
+            plots = await try_render(
+                (table, *key),
+                lambda: metrics_figure(data, colored=table == "growth").prepare_table(),
+                ttl,
+            )
+
+            title = "Ratios" if table == "ratios" else "Growth"
+            response = {"title": f"{ticker} {title}", "plots": plots}
+            if plots is None:
+                response["description"] = metrics_text(data)
+                response["embeds"] = [{"footer": "Tables are busy, showing text instead"}]
+
+        except Exception as e:
+            traceback.print_exc()
+            return await ShowView().discord(inter, table, str(e), error=True)
+
+        await ShowView().discord(inter, table, response)
+
     @commands.slash_command(name="income")
     async def income(
         self,
         inter: disnake.AppCmdInter,
-        ticker: str,
+        ticker: str = commands.Param(autocomplete=ticker_autocomplete),
         period: str = commands.Param(
             choices=[
                 "annual",
@@ -36,88 +150,13 @@ class FundamentalsCommands(commands.Cog):
         ticker: Stock Ticker
         period: Period to show income statement for
         """
-
-        try:
-            await inter.response.defer()
-
-            ticker = ticker.upper()
-
-            df = (
-                obb.equity.fundamental.income(ticker, period=period)
-                .to_dataframe()
-                .drop(["cik", "calendar_year"], axis=1)
-            )
-            df.columns = df.columns.str.replace("_", " ").str.title()
-
-            df = df.tail(1).T
-            df.columns = [d.strftime("%Y-%m-%d") for d in df.columns]
-            df_update = df[
-                [str(v).replace("-", "", 1).replace(".", "", 1).isdigit() for v in df[df.columns[0]].values]
-            ]
-            # Filter out rows
-            df_update2 = df_update[~df_update.index.str.contains("Ratio")]
-            data = df_update2[~df_update2.index.str.contains("Average")]
-
-            # Define a dictionary of replacements
-            replacement_dict = {
-                "Research And Development Expenses": "R&D Expenses",
-                "General And Administrative Expenses": "G&A Expenses",
-                "Selling And Marketing Expenses": "S&M Expenses",
-                "Selling General And Administrative Expenses": "SG&A Expenses",
-                "Eps": "EPS",
-                "Eps Diluted": "EPS Diluted",
-                "Ebitda": "EBITDA",
-            }
-
-            # Apply the replacements using a list comprehension
-            data.index = [replacement_dict.get(i, i) for i in data.index]
-
-            font_color = list()
-            for val in data[data.columns[0]].values:
-                sval = str(val).split(".")[0]
-                if "-" in sval:
-                    sval = sval.replace("-", "")
-                    if len(sval) > 9:
-                        font_color.append("rgb(248,113,113)")
-                    elif len(sval) > 6:
-                        font_color.append("rgb(220,38,38)")
-                    elif len(sval) > 3:
-                        font_color.append("rgb(185,28,28)")
-                    else:
-                        font_color.append("white")
-                elif len(sval) > 9:
-                    font_color.append("rgb(74,222,128)")
-                elif len(sval) > 6:
-                    font_color.append("rgb(22,163,74)")
-                elif len(sval) > 3:
-                    font_color.append("rgb(21,128,61)")
-                else:
-                    font_color.append("white")
-
-            fig = self.plot_df(
-                data,
-                fig_size=(650, (30 + (45 * len(data.index)))),
-                print_index=True,
-                col_width=[8, 5],
-                nums_format=[data.columns[0]],
-                cell_align=["left", "right"],
-                cell_font_color=[["white"] * len(data), font_color],
-            )
-
-        except Exception as e:
-            traceback.print_exc()
-            return await ShowView().discord(inter, "income", str(e), error=True)
-
-        await ShowView().discord(
-            inter, "income", {"title": f"{ticker} Income", "plots": fig.prepare_table()}
-        )
-
+        await self.statement(inter, "income", ticker, period)
 
     @commands.slash_command(name="cashflow")
     async def cashflow(
         self,
         inter: disnake.AppCmdInter,
-        ticker: str,
+        ticker: str = commands.Param(autocomplete=ticker_autocomplete),
         period: str = commands.Param(
             choices=[
                 "annual",
@@ -133,80 +172,13 @@ class FundamentalsCommands(commands.Cog):
         ticker: Stock Ticker
         period: Period to show cashflow statement for
         """
-
-        try:
-            await inter.response.defer()
-
-            ticker = ticker.upper()
-
-            df = (
-                obb.equity.fundamental.cash(ticker, period=period)
-                .to_dataframe()
-                .drop(["cik", "calendar_year"], axis=1)
-            )
-            df.columns = df.columns.str.replace("_", " ").str.title()
-
-            df = df.tail(1).T
-            df.columns = [d.strftime("%Y-%m-%d") for d in df.columns]
-            df_update = df[
-                [str(v).replace("-", "", 1).replace(".", "", 1).isdigit() for v in df[df.columns[0]].values]
-            ]
-            # Filter out rows
-            df_update2 = df_update[~df_update.index.str.contains("Ratio")]
-            data = df_update2[~df_update2.index.str.contains("Average")]
-
-            # Apply the replacements using a list comprehension
-            data.index = [i.replace("Net Cash Flow", "NCF") for i in data.index]
-
-            font_color = list()
-            for val in data[data.columns[0]].values:
-                sval = str(val).split(".")[0]
-                if "-" in sval:
-                    sval = sval.replace("-", "")
-                    if len(sval) > 9:
-                        font_color.append("rgb(248,113,113)")
-                    elif len(sval) > 6:
-                        font_color.append("rgb(220,38,38)")
-                    elif len(sval) > 3:
-                        font_color.append("rgb(185,28,28)")
-                    else:
-                        font_color.append("white")
-                elif len(sval) > 9:
-                    font_color.append("rgb(74,222,128)")
-                elif len(sval) > 6:
-                    font_color.append("rgb(22,163,74)")
-                elif len(sval) > 3:
-                    font_color.append("rgb(21,128,61)")
-                else:
-                    font_color.append("white")
-
-            fig = self.plot_df(
-                data,
-                fig_size=(650, (30 + (45 * len(data.index)))),
-                print_index=True,
-                col_width=[8, 5],
-                nums_format=[data.columns[0]],
-                cell_align=["left", "right"],
-                cell_font_color=[["white"] * len(data), font_color],
-            )
-
-        except Exception as e:
-            traceback.print_exc()
-            return await ShowView().discord(inter, "cashflow", str(e), error=True)
-
-        await ShowView().discord(
-            inter, "cashflow",
-            {
-                "title": f"{ticker} Cashflow",
-                "plots": fig.prepare_table(),
-            }
-        )
+        await self.statement(inter, "cashflow", ticker, period)
 
     @commands.slash_command(name="balance")
     async def balance(
         self,
         inter: disnake.AppCmdInter,
-        ticker: str,
+        ticker: str = commands.Param(autocomplete=ticker_autocomplete),
         period: str = commands.Param(
             choices=[
                 "annual",
@@ -222,74 +194,120 @@ class FundamentalsCommands(commands.Cog):
         ticker: Stock Ticker
         period: Period to show balance statement for
         """
+        await self.statement(inter, "balance", ticker, period)
+
+    @commands.slash_command(name="financials")
+    async def financials(
+        self,
+        inter: disnake.AppCmdInter,
+        ticker: str = commands.Param(autocomplete=ticker_autocomplete),
+        period: str = commands.Param(
+            choices=[
+                "annual",
+                "quarter",
+            ],
+            default="annual",
+        ),
+    ):
+        """Shows income, balance and cashflow statements for the ticker provided.
+
+        Parameters
+        -----------
+        ticker: Stock Ticker
+        period: Period to show the statements for
+        """
 
         try:
             await inter.response.defer()
 
             ticker = ticker.upper()
 
-            df = (
-                obb.equity.fundamental.balance(ticker, period=period)
-                .to_dataframe()
-                .drop(["cik", "calendar_year"], axis=1)
+            ttl = statement_ttl()
+
+            # Fetch the three statements concurrently
+            frames = await asyncio.gather(
+                *[
+                    cached_fetch(
+                        ("statement", statement, ticker, period),
+                        fetch_statement,
+                        statement,
+                        ticker,
+                        period,
+                        ttl=ttl,
+                    )
+                    for statement in STATEMENTS
+                ]
             )
-            df.columns = df.columns.str.replace("_", " ").str.title()
-
-            df = df.tail(1).T
-            df.columns = [d.strftime("%Y-%m-%d") for d in df.columns]
-            df_update = df[
-                [str(v).replace("-", "", 1).replace(".", "", 1).isdigit() for v in df[df.columns[0]].values]
-            ]
-            # Filter out rows
-            df_update2 = df_update[~df_update.index.str.contains("Ratio")]
-            data = df_update2[~df_update2.index.str.contains("Average")]
-
-            # Apply the replacements using a list comprehension
-            data.index = [i.replace("Net Cash Flow", "NCF") for i in data.index]
-
-            font_color = list()
-            for val in data[data.columns[0]].values:
-                sval = str(val).split(".")[0]
-                if "-" in sval:
-                    sval = sval.replace("-", "")
-                    if len(sval) > 9:
-                        font_color.append("rgb(248,113,113)")
-                    elif len(sval) > 6:
-                        font_color.append("rgb(220,38,38)")
-                    elif len(sval) > 3:
-                        font_color.append("rgb(185,28,28)")
-                    else:
-                        font_color.append("white")
-                elif len(sval) > 9:
-                    font_color.append("rgb(74,222,128)")
-                elif len(sval) > 6:
-                    font_color.append("rgb(22,163,74)")
-                elif len(sval) > 3:
-                    font_color.append("rgb(21,128,61)")
-                else:
-                    font_color.append("white")
-
-            fig = self.plot_df(
-                data,
-                fig_size=(650, (30 + (45 * len(data.index)))),
-                print_index=True,
-                col_width=[8, 5],
-                nums_format=[data.columns[0]],
-                cell_align=["left", "right"],
-                cell_font_color=[["white"] * len(data), font_color],
+
+            # Render all tables in a single backend round trip
+            plots = await try_render(
+                ("financials", ticker, period),
+                lambda: PyWryFigure.prepare_tables(
+                    [
+                        statement_figure(statement_data(df, statement))
+                        for statement, df in zip(STATEMENTS, frames)
+                    ]
+                ),
+                ttl,
             )
 
+            response = {"title": f"{ticker} Financials", "plots_list": plots}
+            if plots is None:
+                # Three text tables do not fit one embed, show the income statement
+                response["description"] = statement_text(statement_data(frames[0], "income"))
+                response["embeds"] = [
+                    {"footer": "Tables are busy, use /balance and /cashflow for the rest"}
+                ]
+
         except Exception as e:
             traceback.print_exc()
-            return await ShowView().discord(inter, "balance", str(e), error=True)
-
-        await ShowView().discord(
-            inter, "balance",
-            {
-                "title": f"{ticker} Balance",
-                "plots": fig.prepare_table(),
-            }
-        )
+            return await ShowView().discord(inter, "financials", str(e), error=True)
+
+        await ShowView().discord(inter, "financials", response)
+
+    @commands.slash_command(name="ratios")
+    async def ratios(
+        self,
+        inter: disnake.AppCmdInter,
+        ticker: str = commands.Param(autocomplete=ticker_autocomplete),
+        period: str = commands.Param(
+            choices=[
+                "annual",
+                "quarter",
+            ],
+            default="annual",
+        ),
+    ):
+        """Shows margins, returns, leverage and liquidity ratios for the ticker provided.
+
+        Parameters
+        -----------
+        ticker: Stock Ticker
+        period: Period to compute the ratios for
+        """
+        await self.metrics(inter, "ratios", ticker, period)
+
+    @commands.slash_command(name="growth")
+    async def growth(
+        self,
+        inter: disnake.AppCmdInter,
+        ticker: str = commands.Param(autocomplete=ticker_autocomplete),
+        period: str = commands.Param(
+            choices=[
+                "annual",
+                "quarter",
+            ],
+            default="annual",
+        ),
+    ):
+        """Shows YoY growth, and QoQ growth for quarters, for the ticker provided.
+
+        Parameters
+        -----------
+        ticker: Stock Ticker
+        period: Period to compute the growth for
+        """
+        await self.metrics(inter, "growth", ticker, period)
 
 
 def setup(bot: "OBB_Bot"):
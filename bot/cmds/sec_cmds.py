@@ -8,32 +8,29 @@ from disnake.ext import commands
 from datetime import datetime, timedelta
 from typing import List, Optional
 
+from bot.autocomplete import sec_form_autocomplete, ticker_autocomplete
+from bot.executors import cached_fetch
 from bot.showview import ShowView
+from bot.views import PagedEmbedView
 from models.api_models import EmbedField
 from utils.pywry_figure import PyWryFigure
 
 
-async def sec_form_autocomplete(inter, form: str):
-    """Autocomplete for SEC forms"""
-    tlow = form.upper()
-    sec_forms = [
-        '1', '1-A', '1-E', '1-K', '1-N', '1-SA', '1-U', '1-Z', '10',
-        '10-D', '10-K', '10-M', '10-Q', '11-K', '12b-25', '13F', '13H',
-        '144', '15', '15F', '17-H', '18', '18-K', '19b-4', '19b-4(e)',
-        '19b-7', '2-E', '20-F', '24F-2', '25', '3', '4', '40-F', '5',
-        '6-K', '7-M', '8-A', '8-K', '8-M', '9-M', 'ABS-15G', 'ABS-EE',
-        'ABS DD-15E', 'ADV', 'ADV-E', 'ADV-H', 'ADV-NR', 'ADV-W', 'ATS',
-        'ATS-N', 'ATS-R', 'BD', 'BD-N', 'BDW', 'C', 'CA-1', 'CB',
-        'CFPORTAL', 'CRS', 'CUSTODY', 'D', 'F-1', 'F-10', 'F-3', 'F-4',
-        'F-6', 'F-7', 'F-8', 'F-80', 'F-N', 'F-X', 'ID', 'MA', 'MA-I',
-        'MA-NR', 'MA-W', 'MSD', 'MSDW', 'N-14', 'N-17D-1', 'N-17f-1',
-        'N-17f-2', 'N-18f-1', 'N-1A', 'N-2', 'N-23c-3', 'N-27D-1', 'N-3',
-        'N-4', 'N-5', 'N-54A', 'N-54C', 'N-6', 'N-6EI-1', 'N-6F', 'N-8A',
-        'N-8B-2', 'N-8B-4', 'N-8F', 'N-CEN'
-    ]
-    return [
-        form for form in sec_forms if form.startswith(tlow)
-    ][:24]
+def sec_embeds(ticker: str, rows: pd.DataFrame) -> List[EmbedField]:
+    """Build the embed fields for a page of SEC filings"""
+    embeds: List[EmbedField] = [EmbedField(title=f"{ticker}")]
+
+    for row in rows.to_dict("records"):
+        filling_date = pd.to_datetime(row["filling_date"]).strftime("%Y-%m-%d")
+        embeds.append(
+            EmbedField(
+                title=f"{row['type']} filled on {filling_date}",
+                description=f"[Filling document]({row['final_link']})",
+            )
+        )
+
+    return embeds
+
 
 class SECCommands(commands.Cog):
     """SEC commands."""
@@ -45,7 +42,7 @@ class SECCommands(commands.Cog):
     async def sec(
         self,
         inter: disnake.AppCmdInter,
-        ticker: str,
+        ticker: str = commands.Param(autocomplete=ticker_autocomplete),
         sec_form: str = commands.Param(
             default="10-K", # We need to fix SDK so we can use None here
             autocomplete=sec_form_autocomplete,
@@ -71,38 +68,22 @@ class SECCommands(commands.Cog):
                 "type": sec_form,
             }
             
-            data = obb.stocks.dd.sec(**params).to_dataframe().head(5)
-            
-            embeds: List[EmbedField] = []
-            embeds.append(
-                EmbedField(
-                    title=f"{ticker}",
-                )
+            data = await cached_fetch(
+                ("sec", ticker, sec_form), lambda: obb.stocks.dd.sec(**params).to_dataframe()
             )
 
-            for _, row in data.iterrows():
-                filling_date = pd.to_datetime(row["filling_date"]).strftime("%Y-%m-%d")
-                final_link = row["final_link"]
-                sec_type = row["type"]
-
-                embeds.append(
-                    EmbedField(
-                        title=f"{sec_type} filled on {filling_date}",
-                        description=f"[Filling document]({final_link})",
-                    )
-                )
+            # Later pages are served from the fetched frame by the view
+            view = PagedEmbedView(inter, data, lambda rows: sec_embeds(ticker, rows))
 
-            # Format for display
-            #response: dict = {"plots": fig.prepare_image()}
             response: dict = {
-                "embeds": embeds,
+                "embeds": view.page_embeds(data),
             }
 
         except Exception as e:
             traceback.print_exc()
             return await ShowView().discord(inter, "sec", str(e), error=True)
 
-        await ShowView().discord(inter, "sec", response, no_embed=True)
+        await ShowView().discord(inter, "sec", response, no_embed=True, view=view)
 
 
 def setup(bot: commands.Bot):
@@ -19,9 +19,57 @@ class Settings(BaseSettings):
     AUTHOR_URL: str = ""
     AUTHOR_ICON_URL: str = ""
 
+    # Sharding, set by launcher.py for each worker process
+    SHARD_COUNT: int | None = None
+    SHARD_IDS: list[int] | None = None
+    # Number of worker processes started by launcher.py
+    SHARD_PROCESSES: int = 1
+    SHARD_BASE_PORT: int = 8000
+
     # Get OpenBB Hub PAT from https://my.openbb.co/app/sdk/pat
     OPENBB_HUB_PAT: str = ""
 
+    # Performance Settings
+    FETCH_WORKERS: int = 8
+    FETCH_TIMEOUT: float = 15
+    # Seconds after which a command stops fetching and rendering
+    COMMAND_DEADLINE: float = 60
+    COMPARE_MAX_TICKERS: int = 8
+    SYMBOLS_REFRESH_HOURS: float = 24
+    VIEW_TIMEOUT: float = 600
+    # One of "png", "png-palette" or "webp"
+    IMAGE_ENCODER: str = "png"
+    PNG_COMPRESS_LEVEL: int = 6
+    # Binary chart payloads, needs plotly.js >= 2.28 in the render page
+    RENDER_TYPED_ARRAYS: bool = False
+    # "thread", or "process" to composite and encode images in worker processes
+    POSTPROCESS_MODE: str = "thread"
+    POSTPROCESS_WORKERS: int = 4
+    # Price history providers in order of preference, hedged and failed over
+    PRICE_PROVIDERS: list[str] = ["fmp", "polygon", "intrinio"]
+    # Seconds before hedging until a provider's p95 latency is known
+    PROVIDER_HEDGE_DELAY: float = 2
+    PROVIDER_FAILURE_THRESHOLD: int = 5
+    PROVIDER_COOLDOWN: float = 60
+    # Renders queued before commands answer with text instead, 0 to never degrade
+    RENDER_MAX_PENDING: int = 8
+    # "memory" per process, or "shared" across processes on the host (SQLite)
+    CACHE_BACKEND: str = "memory"
+    CACHE_MAX_MB: int = 256
+    FETCH_CACHE_TTL: float = 300
+    IMAGE_CACHE_TTL: float = 300
+    UPLOAD_WORKERS: int = 4
+    UPLOAD_ATTEMPTS: int = 4
+    # Watchlist alerts: seconds between checks, symbols per quote request
+    ALERT_INTERVAL: float = 60
+    ALERT_BATCH_SIZE: int = 100
+    ALERT_QUOTE_PROVIDER: str = "fmp"
+    ALERT_SENDS_PER_SECOND: float = 5
+    # Reference identical images by their earlier CDN URL instead of uploading
+    REUSE_ATTACHMENT_URLS: bool = True
+    # Bearer token for POST /v1/discord/reload, which reloads changed cogs, empty to disable
+    RELOAD_TOKEN: str = ""
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,148 @@
+import asyncio
+import contextvars
+import functools
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+from bot.config import settings as cfg
+from utils.backend import RENDER_ERRORS, backend_supervisor
+from utils.cache import create_cache
+from utils.deadline import DeadlineExceeded, current_deadline
+
+FETCH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=cfg.FETCH_WORKERS, thread_name_prefix="obb-fetch"
+)
+
+# Fetched data and rendered images, shared by all workers with CACHE_BACKEND="shared"
+RESULT_CACHE = create_cache(
+    cfg.CACHE_BACKEND,
+    cfg.FETCH_CACHE_TTL,
+    path=cfg.BOTS_PATH / "cache" / "results.db",
+    max_bytes=cfg.CACHE_MAX_MB * 1024**2,
+)
+
+
+async def run_fetch(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking data fetch on the fetch executor.
+
+    The job is bounded by the current interaction deadline, if there is one.
+
+    Parameters
+    ----------
+    func : Callable
+        Blocking function to run, usually an `obb` call
+    *args, **kwargs
+        Arguments passed to `func`
+    """
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.check("Data fetch")
+
+    # Copy the context so the job sees the interaction's deadline
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(
+        FETCH_EXECUTOR,
+        functools.partial(contextvars.copy_context().run, func, *args, **kwargs),
+    )
+    if deadline is None:
+        return await future
+
+    try:
+        # Cancels the job if it has not started yet
+        return await asyncio.wait_for(future, deadline.remaining())
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceeded("Error: Data fetch timed out") from e
+
+
+def fill_fetch(key: Hashable, fetch: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+    """Blocking counterpart of `cached_fetch`, for jobs running outside the bot.
+
+    Fills the same entry as `cached_fetch` with the same `key`.
+    """
+    return RESULT_CACHE.get_or_fill(("fetch", key), fetch, ttl)
+
+
+def fill_render(key: Hashable, render: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+    """Blocking counterpart of `cached_render`, for jobs running outside the bot.
+
+    Fills the same entry as `cached_render` with the same `key`.
+    """
+    return RESULT_CACHE.get_or_fill(
+        ("image", key), render, cfg.IMAGE_CACHE_TTL if ttl is None else ttl
+    )
+
+
+async def cached_fetch(
+    key: Hashable,
+    func: Callable[..., Any],
+    *args,
+    ttl: Optional[float] = None,
+    **kwargs,
+) -> Any:
+    """Run a fetch on the fetch executor through the result cache.
+
+    Parameters
+    ----------
+    key : Hashable
+        Cache key, must identify every argument that changes the result
+    func : Callable
+        Blocking function to run on a cache miss
+    *args, **kwargs
+        Arguments passed to `func`
+    ttl : float, optional
+        Seconds to keep the result, by default `FETCH_CACHE_TTL`. See
+        `utils.market_calendar` for TTLs following the exchange sessions.
+    """
+    return await run_fetch(fill_fetch, key, functools.partial(func, *args, **kwargs), ttl)
+
+
+async def cached_render(
+    key: Hashable, render: Callable[[], Any], ttl: Optional[float] = None
+) -> Any:
+    """Render an image on the fetch executor through the result cache.
+
+    Parameters
+    ----------
+    key : Hashable
+        Cache key, must identify everything shown in the image
+    render : Callable
+        Blocking function returning the prepared image on a cache miss
+    ttl : float, optional
+        Seconds to keep the image, by default `IMAGE_CACHE_TTL`. Pass the TTL of
+        the data shown in it.
+    """
+    return await run_fetch(fill_render, key, render, ttl)
+
+
+def render_degraded() -> bool:
+    """Whether the render backend is too busy or unhealthy to wait on."""
+    return backend_supervisor().saturated(cfg.RENDER_MAX_PENDING)
+
+
+async def try_render(
+    key: Hashable, render: Callable[[], Any], ttl: Optional[float] = None
+) -> Optional[Any]:
+    """Render through `cached_render`, or return None to answer in text instead.
+
+    While `render_degraded` is True only an already cached image is returned,
+    nothing new is rendered. None is also returned when the render fails or runs
+    out of time.
+
+    Parameters
+    ----------
+    key : Hashable
+        Cache key, must identify everything shown in the image
+    render : Callable
+        Blocking function returning the prepared image on a cache miss
+    ttl : float, optional
+        Seconds to keep the image, by default `IMAGE_CACHE_TTL`
+    """
+    if render_degraded():
+        return await run_fetch(RESULT_CACHE.get, ("image", key))
+
+    try:
+        return await cached_render(key, render, ttl)
+    except (*RENDER_ERRORS, DeadlineExceeded):
+        traceback.print_exc()
+        return None
@@ -1,26 +1,57 @@
 from math import floor
-from typing import List, Optional, Tuple, Union
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
 from utils.pywry_figure import PyWryFigure
 
-PLT_TBL_HEADER = dict(
-    height=32,
-    fill_color="rgb(30, 30, 30)",
-    font_color="white",
-    font_size=28,
-    line_color="#6e6e6e",
-    line_width=1,
+
+def frozen(obj):
+    """Recursively wrap dicts in read-only mappings."""
+    if isinstance(obj, Mapping):
+        return MappingProxyType({k: frozen(v) for k, v in obj.items()})
+    return obj
+
+
+def merge_layout(*layouts: Mapping, **overrides) -> dict:
+    """Deep merge layout templates and overrides into a new plain dict.
+
+    Later layouts take precedence and `None` overrides are skipped, so the
+    result can be handed to `PyWryFigure(..., validate=False)` as-is.
+    """
+    merged: dict = {}
+    for layout in (*layouts, overrides):
+        for key, value in layout.items():
+            if value is None:
+                continue
+            if isinstance(value, Mapping) and isinstance(merged.get(key), dict):
+                merged[key] = merge_layout(merged[key], value)
+            elif isinstance(value, Mapping):
+                merged[key] = merge_layout(value)
+            else:
+                merged[key] = value
+    return merged
+
+
+# Templates are in nested form (no magic underscores) so they are valid
+# without going through plotly's property validation
+PLT_TBL_HEADER = frozen(
+    dict(
+        height=32,
+        fill=dict(color="rgb(30, 30, 30)"),
+        font=dict(color="white", size=28),
+        line=dict(color="#6e6e6e", width=1),
+    )
 )
-PLT_TBL_CELLS = dict(
-    height=40,
-    font_size=28,
-    fill_color="rgb(50, 50, 50)",
-    font_color="white",
-    line_color="#6e6e6e",
-    line_width=0,
+PLT_TBL_CELLS = frozen(
+    dict(
+        height=40,
+        fill=dict(color="rgb(50, 50, 50)"),
+        font=dict(color="white", size=28),
+        line=dict(color="#6e6e6e", width=0),
+    )
 )
 PLT_TBL_FONT = dict(size=28)
 PLT_TBL_FONT_COLOR = "white"
@@ -29,6 +60,27 @@ PLT_TBL_ROW_COLORS: Optional[Tuple[str, str]] = (
     "#242424",
 )
 
+TABLE_LAYOUT = frozen(
+    dict(
+        font=dict(size=28),
+        margin=dict(autoexpand=False, b=20, l=5, r=5, t=5),
+        paper_bgcolor="rgba(0, 0, 0, 0)",
+        xaxis=dict(rangeslider=dict(visible=False)),
+        dragmode="pan",
+    )
+)
+CANDLE_LAYOUT = frozen(
+    dict(
+        margin=dict(l=80, r=10, t=40, b=20),
+        paper_bgcolor="#111111",
+        plot_bgcolor="rgba(0,0,0,0)",
+        height=762,
+        width=1430,
+        title=dict(x=0.5),
+        xaxis=dict(tick0=0.5, tickangle=0),
+    )
+)
+
 
 def numerize(num, round_decimal=2) -> str:
     """Format a long number"""
@@ -70,8 +122,8 @@ def plot_df(
     multi_index: bool = False,
     title: Optional[dict] = None,
     tbl_header_visible: bool = True,
-    tbl_header: Optional[dict] = PLT_TBL_HEADER,
-    tbl_cells: Optional[dict] = PLT_TBL_CELLS,
+    tbl_header: Optional[Mapping] = PLT_TBL_HEADER,
+    tbl_cells: Optional[Mapping] = PLT_TBL_CELLS,
     row_fill_color: Optional[Tuple[str, str]] = PLT_TBL_ROW_COLORS,
     col_width: Optional[Union[int, float, List[Union[int, float]]]] = None,
     fig_size: Optional[Tuple[int, int]] = None,
@@ -242,27 +294,42 @@ def plot_df(
     row_color_list = _alternate_row_colors()
     header_vals, cell_vals = _tbl_values()
 
-    if not tbl_header:
-        tbl_header = dict()
-    tbl_header.update(values=header_vals)
+    # Only the built-in styles skip plotly's validation, user dicts (title
+    # included) and layout kwargs may use magic underscores like `font_color`
+    trusted = (
+        tbl_header is PLT_TBL_HEADER
+        and tbl_cells is PLT_TBL_CELLS
+        and not title
+        and not layout_kwargs
+    )
+
+    tbl_header = merge_layout(tbl_header or {}, values=header_vals)
 
     if not tbl_header_visible:
-        tbl_header.update(
-            fill_color="white", font_color="white", line_color="white", height=1
+        tbl_header = merge_layout(
+            tbl_header,
+            fill=dict(color="white"),
+            font=dict(color="white"),
+            line=dict(color="white"),
+            height=1,
         )
 
-    if not tbl_cells:
-        tbl_cells = dict()
+    tbl_cells = merge_layout(tbl_cells or {})
+    fill_color = tbl_cells.get("fill", {}).get("color", tbl_cells.get("fill_color"))
+    tbl_cells.pop("fill_color", None)
     tbl_cells.update(
         values=cell_vals,
-        fill_color=[row_color_list] * len(df)
-        if row_color_list
-        else tbl_cells.get("fill_color"),
+        align=_alternate_cell_alignments(),
+    )
+    tbl_cells = merge_layout(
+        tbl_cells,
+        fill=dict(color=[row_color_list] * len(df) if row_color_list else fill_color),
+        font=dict(color="white" if cell_font_color is None else cell_font_color),
     )
 
-    fig = PyWryFigure().add_table(header=tbl_header, cells=tbl_cells)
-
-    fig.data[0]["columnwidth"] = col_width if col_width else None
+    table = dict(type="table", header=tbl_header, cells=tbl_cells)
+    if col_width:
+        table["columnwidth"] = col_width
 
     if not title:
         title = dict()
@@ -271,10 +338,10 @@ def plot_df(
         xanchor="left" if title.get("xanchor") is None else title.get("xanchor"),
     )
 
-    fig.update_layout(
+    layout = merge_layout(
+        TABLE_LAYOUT,
         title=title,
-        font=layout_kwargs.pop("font", dict(size=28)),
-        margin=dict(autoexpand=False, b=20, l=5, r=5, t=5),
+        font=layout_kwargs.pop("font", None),
         width=fig_size[0] + (fig_size[0] * 0.30)  # type: ignore
         if fig_size[0] > 450  # type: ignore
         else fig_size[0] + 320
@@ -282,25 +349,63 @@ def plot_df(
         else None,
         height=fig_size[1] + 250 if fig_size else None,
         autosize=False if col_width else None,
-        paper_bgcolor=layout_kwargs.pop("paper_bgcolor", "rgba(0, 0, 0, 0)"),
+        paper_bgcolor=layout_kwargs.pop("paper_bgcolor", None),
         **layout_kwargs,
-        xaxis=dict(
-            rangeslider=dict(visible=False),
-        ),
-        dragmode="pan",
     )
 
-    cell_align_list = _alternate_cell_alignments()
+    fig = PyWryFigure(data=[table], layout=layout, validate=not trusted)
+
+    return fig
+
+
+# Discord embed descriptions are limited to 4096 characters
+EMBED_TEXT_LIMIT = 4096
+
+
+def text_table(
+    df: Union[pd.Series, pd.DataFrame],
+    nums_format: Optional[List[str]] = None,
+    max_label: int = 28,
+) -> str:
+    """Format a pd.Series or pd.DataFrame as a monospace table for an embed.
 
-    fig.update_traces(
-        cells=(
-            dict(
-                align=cell_align_list,
-                font=dict(
-                    color="white" if cell_font_color is None else cell_font_color
-                ),
+    Used instead of `plot_df` when images can not be rendered.
+
+    Parameters
+    ----------
+    df : Union[pd.Series, pd.DataFrame]
+        Series or dataframe to format, the index is used as the first column.
+    nums_format : List[str], default None
+        Columns to shorten with `numerize`.
+    max_label : int, default 28
+        Index labels are cut to this many characters.
+    """
+    df = df.to_frame() if isinstance(df, pd.Series) else df.copy()
+    for col in nums_format or []:
+        df[col] = df[col].apply(numerize)
+    df = df.astype(str).apply(lambda col: col.str.strip())
+
+    labels = [str(label)[:max_label] for label in df.index]
+    label_width = max(map(len, labels), default=0)
+    widths = [
+        max([len(str(col))] + [len(value) for value in df[col]]) for col in df.columns
+    ]
+
+    header = " ".join(
+        [" " * label_width] + [f"{col:>{width}}" for col, width in zip(df.columns, widths)]
+    )
+    lines = [header]
+    for label, row in zip(labels, df.itertuples(index=False)):
+        lines.append(
+            " ".join(
+                [f"{label:<{label_width}}"]
+                + [f"{value:>{width}}" for value, width in zip(row, widths)]
             )
         )
-    )
 
-    return fig
+    # Drop trailing rows rather than cutting the code block
+    text = "```\n" + "\n".join(lines) + "\n```"
+    while len(text) > EMBED_TEXT_LIMIT and len(lines) > 1:
+        lines.pop()
+        text = "```\n" + "\n".join(lines) + "\n```"
+    return text
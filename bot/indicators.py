@@ -0,0 +1,436 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.cache import TTLCache
+
+Bars = Dict[str, np.ndarray]
+
+BAR_FIELDS = ("x", "open", "high", "low", "close", "volume")
+
+# Lower panels are drawn on their own y axes, numbered past any axis of the chart content
+LOWER_PANEL_AXES = ("y5", "y6")
+LOWER_PANEL_HEIGHT = 0.2
+
+
+def bars_from_chart(data: dict) -> Bars:
+    """Bar arrays from plotly chart content with the candlestick trace first.
+
+    Volume is taken from the first bar trace of the same length, if any.
+    """
+    candles = data["data"][0]
+    bars = {"x": np.asarray(candles["x"]).astype(str)}
+    for field in ("open", "high", "low", "close"):
+        bars[field] = np.asarray(candles[field], dtype=np.float64)
+
+    bars["volume"] = np.full(len(bars["x"]), np.nan)
+    for trace in data["data"][1:]:
+        if trace.get("type") == "bar" and len(trace.get("y", ())) == len(bars["x"]):
+            bars["volume"] = np.asarray(trace["y"], dtype=np.float64)
+            break
+    return bars
+
+
+def ema(values: np.ndarray, alpha: float, prev: float = np.nan) -> np.ndarray:
+    """Exponential moving average continuing from `prev`, the value before `values`."""
+    if np.isnan(prev):
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    seeded = np.concatenate([[prev], values])
+    return pd.Series(seeded).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+
+def rolling_window(values: np.ndarray, start: int, length: int) -> np.ndarray:
+    """Windows of `length` values ending at each index from `start`, NaN-padded."""
+    padded = np.concatenate([np.full(length - 1, np.nan), values])
+    return sliding_window_view(padded[start:], length)
+
+
+class Indicator(ABC):
+    """Indicator values kept aligned with the bars of a series.
+
+    `update` only computes the values from `start` on, reading the state it
+    needs (previous averages, cumulative sums) from the values before `start`.
+    """
+
+    name = ""
+    # "price" overlays the candles, "lower" gets its own panel
+    panel = "price"
+
+    def __init__(self):
+        self.columns: Dict[str, np.ndarray] = {}
+
+    @abstractmethod
+    def compute(self, bars: Bars, start: int) -> Dict[str, np.ndarray]:
+        """Values of the bars from index `start` on, by column."""
+
+    def update(self, bars: Bars, start: int):
+        """Recompute the values of the bars from index `start` on."""
+        new = self.compute(bars, start)
+        self.columns = {
+            key: np.concatenate([self.columns.get(key, np.empty(0))[:start], values])
+            for key, values in new.items()
+        }
+
+    def previous(self, key: str, start: int) -> float:
+        """Value of a column just before `start`, NaN if there is none."""
+        column = self.columns.get(key)
+        if column is None or start == 0 or len(column) < start:
+            return np.nan
+        return float(column[start - 1])
+
+    @abstractmethod
+    def traces(self, x: np.ndarray, columns: Dict[str, np.ndarray], yaxis: str) -> List[dict]:
+        """Plotly traces of the visible part of the columns."""
+
+    @staticmethod
+    def axis() -> dict:
+        """Extra y axis settings of a lower panel."""
+        return dict()
+
+
+def line(x: np.ndarray, y: np.ndarray, name: str, color: str, yaxis: str = "y", **kwargs) -> dict:
+    return dict(
+        type="scatter",
+        mode="lines",
+        x=x,
+        y=y,
+        name=name,
+        yaxis=yaxis,
+        line=dict(color=color, width=1.5),
+        hoverinfo="skip",
+        **kwargs,
+    )
+
+
+class SMA(Indicator):
+    def __init__(self, length: int, color: str):
+        super().__init__()
+        self.length = length
+        self.color = color
+        self.name = f"sma{length}"
+
+    def compute(self, bars: Bars, start: int) -> Dict[str, np.ndarray]:
+        return {"sma": rolling_window(bars["close"], start, self.length).mean(axis=1)}
+
+    def traces(self, x, columns, yaxis):
+        return [line(x, columns["sma"], f"SMA {self.length}", self.color)]
+
+
+class EMA(Indicator):
+    def __init__(self, length: int, color: str):
+        super().__init__()
+        self.length = length
+        self.color = color
+        self.name = f"ema{length}"
+
+    def compute(self, bars: Bars, start: int) -> Dict[str, np.ndarray]:
+        alpha = 2 / (self.length + 1)
+        return {"ema": ema(bars["close"][start:], alpha, self.previous("ema", start))}
+
+    def traces(self, x, columns, yaxis):
+        return [line(x, columns["ema"], f"EMA {self.length}", self.color)]
+
+
+class BollingerBands(Indicator):
+    name = "bbands"
+
+    def __init__(self, length: int = 20, std: float = 2):
+        super().__init__()
+        self.length = length
+        self.std = std
+
+    def compute(self, bars: Bars, start: int) -> Dict[str, np.ndarray]:
+        windows = rolling_window(bars["close"], start, self.length)
+        mid = windows.mean(axis=1)
+        width = windows.std(axis=1) * self.std
+        return {"mid": mid, "upper": mid + width, "lower": mid - width}
+
+    def traces(self, x, columns, yaxis):
+        color = "rgba(147,197,253,0.8)"
+        return [
+            line(x, columns["upper"], "BB upper", color),
+            line(
+                x,
+                columns["lower"],
+                "BB lower",
+                color,
+                fill="tonexty",
+                fillcolor="rgba(147,197,253,0.08)",
+            ),
+            line(x, columns["mid"], f"BB {self.length}", "rgba(147,197,253,0.5)"),
+        ]
+
+
+class RSI(Indicator):
+    name = "rsi"
+    panel = "lower"
+
+    def __init__(self, length: int = 14):
+        super().__init__()
+        self.length = length
+
+    def compute(self, bars: Bars, start: int) -> Dict[str, np.ndarray]:
+        close = bars["close"]
+        change = np.diff(close, prepend=close[:1]) if start == 0 else np.diff(close[start - 1 :])
+        alpha = 1 / self.length
+        gain = ema(np.clip(change, 0, None), alpha, self.previous("gain", start))
+        loss = ema(np.clip(-change, 0, None), alpha, self.previous("loss", start))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(loss == 0, 100.0, 100 - 100 / (1 + gain / loss))
+        return {"gain": gain, "loss": loss, "rsi": rsi}
+
+    def traces(self, x, columns, yaxis):
+        return [line(x, columns["rsi"], f"RSI {self.length}", "#facc15", yaxis)]
+
+    @staticmethod
+    def axis() -> dict:
+        return dict(range=[0, 100], tickvals=[30, 70])
+
+
+class MACD(Indicator):
+    name = "macd"
+    panel = "lower"
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        super().__init__()
+        self.fast, self.slow, self.signal = fast, slow, signal
+
+    def compute(self, bars: Bars, start: int) -> Dict[str, np.ndarray]:
+        close = bars["close"][start:]
+        fast = ema(close, 2 / (self.fast + 1), self.previous("fast", start))
+        slow = ema(close, 2 / (self.slow + 1), self.previous("slow", start))
+        macd = fast - slow
+        signal = ema(macd, 2 / (self.signal + 1), self.previous("signal", start))
+        return {"fast": fast, "slow": slow, "macd": macd, "signal": signal, "hist": macd - signal}
+
+    def traces(self, x, columns, yaxis):
+        hist = columns["hist"]
+        return [
+            dict(
+                type="bar",
+                x=x,
+                y=hist,
+                name="MACD hist",
+                yaxis=yaxis,
+                marker=dict(color=np.where(hist >= 0, "#22c55e", "#ef4444")),
+                hoverinfo="skip",
+            ),
+            line(x, columns["macd"], "MACD", "#60a5fa", yaxis),
+            line(x, columns["signal"], "Signal", "#f97316", yaxis),
+        ]
+
+
+class VWAP(Indicator):
+    """Volume weighted average price, restarting every session day."""
+
+    name = "vwap"
+
+    def compute(self, bars: Bars, start: int) -> Dict[str, np.ndarray]:
+        typical = (bars["high"][start:] + bars["low"][start:] + bars["close"][start:]) / 3
+        volume = bars["volume"][start:]
+        days = np.asarray([x[:10] for x in bars["x"][start:]])
+
+        pv_sum = np.cumsum(typical * volume)
+        v_sum = np.cumsum(volume)
+
+        # Index of the first bar of each bar's day, within the new bars
+        new_day = np.concatenate([[True], days[1:] != days[:-1]])
+        first = np.maximum.accumulate(np.where(new_day, np.arange(len(days)), 0))
+        pv = pv_sum - pv_sum[first] + (typical * volume)[first]
+        v = v_sum - v_sum[first] + volume[first]
+
+        # The first day continues the sums of the bars before `start`
+        if start and len(days) and bars["x"][start - 1][:10] == days[0]:
+            same_day = first == 0
+            pv[same_day] += self.previous("pv", start)
+            v[same_day] += self.previous("v", start)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {"pv": pv, "v": v, "vwap": pv / v}
+
+    def traces(self, x, columns, yaxis):
+        return [line(x, columns["vwap"], "VWAP", "#e879f9")]
+
+
+# Option name -> factory, in drawing order
+INDICATORS = {
+    "sma": lambda: [SMA(20, "#fbbf24"), SMA(50, "#a78bfa")],
+    "ema": lambda: [EMA(20, "#34d399")],
+    "bbands": lambda: [BollingerBands()],
+    "vwap": lambda: [VWAP()],
+    "rsi": lambda: [RSI()],
+    "macd": lambda: [MACD()],
+}
+
+
+def parse_indicators(text: str, intraday: bool) -> List[str]:
+    """Indicator option names from a comma or space separated string.
+
+    Raises
+    ------
+    ValueError
+        On unknown names, or VWAP on daily bars
+    """
+    names = list(dict.fromkeys(n for n in text.lower().replace(",", " ").split() if n))
+    unknown = [n for n in names if n not in INDICATORS]
+    if unknown:
+        raise ValueError(
+            f"Error: Unknown indicators {', '.join(unknown)}, use {', '.join(INDICATORS)}"
+        )
+    if "vwap" in names and not intraday:
+        raise ValueError("Error: VWAP needs an intraday interval")
+    return names
+
+
+class BarSeries:
+    """Bars of one symbol and interval, with the indicators computed on them."""
+
+    def __init__(self, bars: Bars):
+        # Held while the series is updated, lives and dies with the cached series
+        self.lock = threading.Lock()
+        self.reset(bars)
+
+    def reset(self, bars: Bars):
+        """Replace the bars and drop every indicator computed on the old ones."""
+        self.bars = bars
+        self.indicators: Dict[str, Indicator] = {}
+        # Option name -> names of the indicators it draws
+        self.groups: Dict[str, List[str]] = {}
+
+    def extend(self, new: Bars) -> bool:
+        """Merge freshly fetched bars that overlap the stored ones.
+
+        Stored bars before the last one are kept, so indicators are only
+        updated from the last stored bar (which may have still been forming) on.
+
+        Returns
+        -------
+        bool
+            False if the bars do not line up (no overlap, or revised history
+            such as a split adjustment), the series must then be rebuilt.
+        """
+        old_x, new_x = self.bars["x"], new["x"]
+        if not len(old_x) or not len(new_x) or new_x[0] > old_x[-1]:
+            return False
+
+        offset = int(np.searchsorted(old_x, new_x[0]))
+        overlap = min(len(old_x) - offset, len(new_x)) - 1
+        if overlap > 0 and not (
+            np.array_equal(old_x[offset : offset + overlap], new_x[:overlap])
+            and np.allclose(
+                self.bars["close"][offset : offset + overlap], new["close"][:overlap], equal_nan=True
+            )
+        ):
+            return False
+
+        start = len(old_x) - 1
+        index = start - offset
+        if index >= len(new_x):
+            # Nothing newer than what is stored
+            return True
+
+        self.bars = {
+            field: np.concatenate([self.bars[field][:start], new[field][index:]])
+            for field in BAR_FIELDS
+        }
+        for indicator in self.indicators.values():
+            indicator.update(self.bars, start)
+        return True
+
+    def ensure(self, names: Iterable[str]):
+        """Compute indicators that are not kept yet over all stored bars."""
+        for name in names:
+            if name in self.groups:
+                continue
+            indicators = INDICATORS[name]()
+            for indicator in indicators:
+                indicator.update(self.bars, 0)
+                self.indicators[indicator.name] = indicator
+            self.groups[name] = [indicator.name for indicator in indicators]
+
+    def figure_parts(self, names: Iterable[str], first_x: str) -> Tuple[List[dict], dict]:
+        """Traces and layout for the requested indicators, from `first_x` on."""
+        begin = int(np.searchsorted(self.bars["x"], first_x))
+        x = self.bars["x"][begin:]
+
+        traces: List[dict] = []
+        lower: List[Indicator] = []
+        for name in names:
+            for indicator_name in self.groups[name]:
+                indicator = self.indicators[indicator_name]
+                columns = {k: v[begin:] for k, v in indicator.columns.items()}
+                if indicator.panel == "lower":
+                    yaxis = LOWER_PANEL_AXES[len(lower)]
+                    lower.append(indicator)
+                else:
+                    yaxis = "y"
+                traces.extend(indicator.traces(x, columns, yaxis))
+
+        layout: dict = {}
+        if lower:
+            height = LOWER_PANEL_HEIGHT * len(lower)
+            layout["yaxis"] = dict(domain=[height + 0.04, 1])
+            for i, indicator in enumerate(lower):
+                axis = LOWER_PANEL_AXES[i].replace("y", "yaxis")
+                bottom = height - LOWER_PANEL_HEIGHT * (i + 1)
+                layout[axis] = dict(
+                    domain=[bottom, bottom + LOWER_PANEL_HEIGHT - 0.02],
+                    anchor="x",
+                    side="right",
+                    showgrid=False,
+                    **indicator.axis(),
+                )
+        return traces, layout
+
+
+class BarStore:
+    """Bar series and their indicators by (symbol, interval), kept between calls.
+
+    Parameters
+    ----------
+    ttl : float, optional
+        Seconds a series is kept after its last update, by default one day
+    max_entries : int, optional
+        Maximum number of series kept, by default 256
+    """
+
+    def __init__(self, ttl: float = 86400, max_entries: int = 256):
+        self.series = TTLCache(ttl=ttl, max_entries=max_entries)
+        self._lock = threading.Lock()
+
+    def indicator_parts(
+        self, key: tuple, bars: Bars, names: List[str]
+    ) -> Tuple[List[dict], dict]:
+        """Merge fetched bars into the stored series and get the indicator traces.
+
+        Parameters
+        ----------
+        key : tuple
+            (symbol, interval)
+        bars : Bars
+            Bars just fetched, see `bars_from_chart`
+        names : List[str]
+            Indicator option names, see `INDICATORS`
+        """
+        with self._lock:
+            series: Optional[BarSeries] = self.series.get(key)
+            created = series is None
+            if created:
+                series = BarSeries(bars)
+                self.series.set(key, series)
+
+        # Only calls for the same key wait on each other
+        with series.lock:
+            if not created and not series.extend(bars):
+                series.reset(bars)
+            series.ensure(names)
+            # Refresh the TTL
+            self.series.set(key, series)
+            return series.figure_parts(names, bars["x"][0])
+
+
+BAR_STORE = BarStore()
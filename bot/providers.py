@@ -0,0 +1,10 @@
+from bot.config import settings as cfg
+from utils.providers import ProviderRouter
+
+PRICE_ROUTER = ProviderRouter(
+    cfg.PRICE_PROVIDERS,
+    workers=cfg.FETCH_WORKERS,
+    hedge_delay=cfg.PROVIDER_HEDGE_DELAY,
+    failure_threshold=cfg.PROVIDER_FAILURE_THRESHOLD,
+    cooldown=cfg.PROVIDER_COOLDOWN,
+)
@@ -0,0 +1,282 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bot.helpers import plot_df, text_table
+from utils.pywry_figure import PyWryFigure
+
+# Canonical line item -> (statement, title-cased column names it may come under)
+LINE_ITEMS: Dict[str, Tuple[str, List[str]]] = {
+    "revenue": ("income", ["Revenue", "Total Revenue"]),
+    "gross_profit": ("income", ["Gross Profit"]),
+    "operating_income": ("income", ["Operating Income", "Total Operating Income"]),
+    "ebitda": ("income", ["Ebitda"]),
+    "net_income": ("income", ["Net Income", "Consolidated Net Income"]),
+    "interest_expense": ("income", ["Interest Expense", "Total Interest Expense"]),
+    "eps": ("income", ["Eps Diluted", "Diluted Earnings Per Share", "Eps"]),
+    "total_assets": ("balance", ["Total Assets"]),
+    "total_liabilities": ("balance", ["Total Liabilities"]),
+    "equity": (
+        "balance",
+        ["Total Shareholders Equity", "Total Stockholders Equity", "Total Equity"],
+    ),
+    "current_assets": ("balance", ["Total Current Assets"]),
+    "current_liabilities": ("balance", ["Total Current Liabilities"]),
+    "inventory": ("balance", ["Inventory", "Inventories"]),
+    "cash": ("balance", ["Cash And Cash Equivalents", "Cash And Short Term Investments"]),
+    "total_debt": ("balance", ["Total Debt"]),
+    "operating_cash_flow": (
+        "cashflow",
+        [
+            "Net Cash Flow From Operating Activities",
+            "Net Cash From Operating Activities",
+            "Operating Cash Flow",
+        ],
+    ),
+    "capex": ("cashflow", ["Capital Expenditure", "Purchase Of Property Plant And Equipment"]),
+    "free_cash_flow": ("cashflow", ["Free Cash Flow"]),
+}
+
+# Ratio row -> value format, grouped as margins, returns, leverage and liquidity
+RATIOS: Dict[str, str] = {
+    "Gross Margin": "percent",
+    "Operating Margin": "percent",
+    "EBITDA Margin": "percent",
+    "Net Margin": "percent",
+    "FCF Margin": "percent",
+    "ROE": "percent",
+    "ROA": "percent",
+    "Debt / Equity": "times",
+    "Liabilities / Assets": "percent",
+    "Interest Coverage": "times",
+    "Current Ratio": "times",
+    "Quick Ratio": "times",
+    "Cash Ratio": "times",
+}
+
+# Growth row -> line item
+GROWTH_ITEMS: Dict[str, str] = {
+    "Revenue": "revenue",
+    "Gross Profit": "gross_profit",
+    "Operating Income": "operating_income",
+    "EBITDA": "ebitda",
+    "Net Income": "net_income",
+    "EPS Diluted": "eps",
+    "Free Cash Flow": "free_cash_flow",
+    "Total Assets": "total_assets",
+    "Equity": "equity",
+}
+
+# Periods shown in the tables, latest first
+TABLE_PERIODS = 4
+# Periods fetched for the tables, YoY growth of quarters looks 4 periods back
+METRICS_PERIODS = TABLE_PERIODS + 4
+
+
+def line_items(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Align the line items used by the ratios into one numeric frame.
+
+    Parameters
+    ----------
+    frames : Dict[str, pd.DataFrame]
+        Statement name -> frame as returned by `fetch_statement`
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per period, oldest first, one column per `LINE_ITEMS` key. Items
+        missing from the provider's statements are NaN.
+    """
+    columns = {}
+    for item, (statement, names) in LINE_ITEMS.items():
+        df = frames[statement]
+        name = next((n for n in names if n in df.columns), None)
+        if name is not None:
+            columns[item] = pd.to_numeric(df[name], errors="coerce")
+
+    items = pd.DataFrame(columns).sort_index()
+    # Statements of one filing share the period end, keep the last of duplicates
+    items = items[~items.index.duplicated(keep="last")]
+    items = items.reindex(columns=list(LINE_ITEMS))
+
+    if items["free_cash_flow"].isna().all():
+        # Capital expenditure is reported as a negative cash flow
+        items["free_cash_flow"] = items["operating_cash_flow"] - items["capex"].abs()
+    return items
+
+
+def _divide(numerator: pd.Series, denominator: pd.Series) -> pd.Series:
+    return numerator / denominator.replace(0, np.nan)
+
+
+def compute_ratios(items: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Compute every ratio for all periods at once.
+
+    Returns are computed on the average of the opening and closing balance, and
+    annualized for quarterly statements.
+
+    Parameters
+    ----------
+    items : pd.DataFrame
+        Line items as returned by `line_items`
+    period : str
+        "annual" or "quarter"
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per period, one column per `RATIOS` key
+    """
+    # Average balance over the period, the first period only has its closing one
+    average = items[["equity", "total_assets"]].rolling(2, min_periods=1).mean()
+    annualize = 4 if period == "quarter" else 1
+    revenue = items["revenue"]
+
+    ratios = pd.DataFrame(
+        {
+            "Gross Margin": _divide(items["gross_profit"], revenue),
+            "Operating Margin": _divide(items["operating_income"], revenue),
+            "EBITDA Margin": _divide(items["ebitda"], revenue),
+            "Net Margin": _divide(items["net_income"], revenue),
+            "FCF Margin": _divide(items["free_cash_flow"], revenue),
+            "ROE": _divide(items["net_income"] * annualize, average["equity"]),
+            "ROA": _divide(items["net_income"] * annualize, average["total_assets"]),
+            "Debt / Equity": _divide(items["total_debt"], items["equity"]),
+            "Liabilities / Assets": _divide(items["total_liabilities"], items["total_assets"]),
+            "Interest Coverage": _divide(
+                items["operating_income"], items["interest_expense"].abs()
+            ),
+            "Current Ratio": _divide(items["current_assets"], items["current_liabilities"]),
+            "Quick Ratio": _divide(
+                items["current_assets"] - items["inventory"].fillna(0),
+                items["current_liabilities"],
+            ),
+            "Cash Ratio": _divide(items["cash"], items["current_liabilities"]),
+        },
+        index=items.index,
+    )
+    return ratios.replace([np.inf, -np.inf], np.nan)
+
+
+def compute_growth(items: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Compute YoY growth, and QoQ growth for quarterly statements, for all periods.
+
+    Growth is relative to the absolute previous value, so a loss shrinking reads
+    as positive growth.
+
+    Parameters
+    ----------
+    items : pd.DataFrame
+        Line items as returned by `line_items`
+    period : str
+        "annual" or "quarter"
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per period, a "YoY" (and "QoQ") column per `GROWTH_ITEMS` key
+    """
+    values = items[list(GROWTH_ITEMS.values())].set_axis(list(GROWTH_ITEMS), axis=1)
+
+    lags = {"YoY": 4, "QoQ": 1} if period == "quarter" else {"YoY": 1}
+    growth = []
+    for label, lag in lags.items():
+        previous = values.shift(lag)
+        change = (values - previous) / previous.abs().replace(0, np.nan)
+        change.columns = [f"{name} {label}" for name in change.columns]
+        growth.append(change)
+
+    growth = pd.concat(growth, axis=1)
+    # Keep the growth rates of one item next to each other
+    order = [f"{name} {label}" for name in GROWTH_ITEMS for label in lags]
+    return growth[order].replace([np.inf, -np.inf], np.nan)
+
+
+def _transpose(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per metric and one column per period, latest first."""
+    df = df.iloc[::-1].T.dropna(how="all")
+    df.columns = [pd.Timestamp(d).strftime("%Y-%m-%d") for d in df.columns]
+    return df
+
+
+def derive_metrics(frames: Dict[str, pd.DataFrame], period: str) -> Dict[str, pd.DataFrame]:
+    """Compute the ratios and growth tables from the three statements.
+
+    Parameters
+    ----------
+    frames : Dict[str, pd.DataFrame]
+        Statement name -> frame as returned by `fetch_statement`
+    period : str
+        "annual" or "quarter"
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        "ratios" and "growth" tables, one row per metric and one column per period,
+        latest first. Metrics with no value in any period are dropped.
+    """
+    items = line_items(frames)
+    tables = {
+        "ratios": compute_ratios(items, period),
+        "growth": compute_growth(items, period),
+    }
+    return {name: _transpose(df) for name, df in tables.items()}
+
+
+def _format_value(value: float, fmt: str) -> str:
+    if pd.isna(value):
+        return "-"
+    if fmt == "times":
+        return f"{value:,.2f}x"
+    return f"{value * 100:,.1f}%"
+
+
+def metrics_table(df: pd.DataFrame, periods: int = TABLE_PERIODS) -> pd.DataFrame:
+    """Format the latest periods of a metrics table for display."""
+    df = df.iloc[:, :periods]
+    formats = [RATIOS.get(name, "percent") for name in df.index]
+    return pd.DataFrame(
+        [[_format_value(v, fmt) for v in row] for row, fmt in zip(df.values, formats)],
+        index=df.index,
+        columns=df.columns,
+    )
+
+
+def metrics_font_colors(df: pd.DataFrame) -> List[List[str]]:
+    """Color formatted values by sign, per column."""
+    return [
+        [
+            "white" if v == "-" else "rgb(248,113,113)" if v.startswith("-") else "rgb(74,222,128)"
+            for v in df[col]
+        ]
+        for col in df.columns
+    ]
+
+
+def metrics_figure(df: pd.DataFrame, colored: bool = False) -> PyWryFigure:
+    """Build the table figure for a formatted metrics table.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Table as returned by `metrics_table`
+    colored : bool, optional
+        Color values by sign, by default False
+    """
+    cell_font_color = None
+    if colored:
+        cell_font_color = [["white"] * len(df)] + metrics_font_colors(df)
+    return plot_df(
+        df,
+        fig_size=(350 + 200 * len(df.columns), (30 + (45 * len(df.index)))),
+        print_index=True,
+        col_width=[8] + [4] * len(df.columns),
+        cell_align=["left"] + ["right"] * len(df.columns),
+        cell_font_color=cell_font_color,
+    )
+
+
+def metrics_text(df: pd.DataFrame) -> str:
+    """Build the monospace table for a formatted metrics table."""
+    return text_table(df, max_label=20)
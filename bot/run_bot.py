@@ -1,38 +1,126 @@
 import asyncio
+import hashlib
+import hmac
+import importlib
+import traceback
 from pathlib import Path
+from typing import Dict
 
 import disnake
 from disnake.ext import commands  # type: ignore
-from fastapi import APIRouter
+from fastapi import APIRouter, Header, HTTPException
 
+from bot.alerts import ALERT_ENGINE
+from bot.autocomplete import SYMBOL_DIRECTORY
 from bot.config import settings as cfg
 from bot.helpers import plot_df
+from utils.deadline import set_deadline
 from utils.pywry_figure import PyWryFigure
 
 
 class OBB_Bot(commands.InteractionBot):
     def __init__(self: "OBB_Bot", **kwargs) -> None:
+        # Sync slash commands again when a cog is reloaded after startup
+        sync_flags = commands.CommandSyncFlags.default()
+        sync_flags.sync_on_cog_actions = True
         super().__init__(
             intents=disnake.Intents.default(),
-            command_sync_flags=commands.CommandSyncFlags.default(),
+            command_sync_flags=sync_flags,
             chunk_guilds_at_startup=False,
             test_guilds=cfg.SLASH_TESTING_SERVERS,
             **kwargs,
         )
         self.plot_df = plot_df
+        # Extension name -> hash of the source it was loaded from
+        self.extension_hashes: Dict[str, str] = {}
+        self.before_slash_command_invoke(self.start_deadline)
 
-    def load_all_extensions(self, folder: str) -> None:
+    @staticmethod
+    async def start_deadline(inter: disnake.AppCmdInter) -> None:
+        """Bound the work a command does for `inter`, see `utils.deadline`."""
+        set_deadline(inter, cfg.COMMAND_DEADLINE)
+
+    @staticmethod
+    def extension_files(folder: str) -> Dict[str, Path]:
+        """Map extension names to the files of the modules in `folder`."""
         folder_path = Path(__file__).parent.joinpath(folder).resolve()
+        return {
+            ".".join(path.relative_to(cfg.API_PATH).parts).removesuffix(".py"): path
+            for path in folder_path.glob("*.py")
+        }
+
+    def load_all_extensions(self, folder: str) -> None:
+        for name, path in self.extension_files(folder).items():
+            self.load_extension(name)
+            self.extension_hashes[name] = source_hash(path)
+
+    def reload_changed_extensions(self, folder: str) -> dict:
+        """Load, reload or unload the extensions in `folder` whose source changed.
+
+        Only the cog modules are reloaded. The modules they import, with the
+        caches, executors and render backend, are kept as they are. A cog that
+        fails to reload keeps running its previous version.
+
+        Returns
+        -------
+        dict
+            Extension names "loaded", "reloaded" and "unloaded", and "failed"
+            mapping names to their error
+        """
+        result: dict = dict(loaded=[], reloaded=[], unloaded=[], failed={})
+        files = self.extension_files(folder)
+        # New files are not found until the import system's caches are cleared
+        importlib.invalidate_caches()
+
+        for name in set(self.extension_hashes) - set(files):
+            try:
+                self.unload_extension(name)
+            except commands.ExtensionError as e:
+                traceback.print_exc()
+                result["failed"][name] = str(e)
+                continue
+            del self.extension_hashes[name]
+            result["unloaded"].append(name)
 
-        for path in folder_path.glob("*.py"):
-            self.load_extension(
-                ".".join(path.relative_to(cfg.API_PATH).parts).removesuffix(".py")
-            )
+        for name, path in files.items():
+            digest = source_hash(path)
+            if self.extension_hashes.get(name) == digest:
+                continue
+            action = "reloaded" if name in self.extensions else "loaded"
+            try:
+                if action == "reloaded":
+                    self.reload_extension(name)
+                else:
+                    self.load_extension(name)
+            except commands.ExtensionError as e:
+                traceback.print_exc()
+                result["failed"][name] = str(e)
+                continue
+            self.extension_hashes[name] = digest
+            result[action].append(name)
+
+        return result
 
     @staticmethod
-    def plot() -> PyWryFigure:
+    def plot(*args, **kwargs) -> PyWryFigure:
         """Get a PyWryFigure object."""
-        return PyWryFigure()
+        return PyWryFigure(*args, **kwargs)
+
+
+def source_hash(path: Path) -> str:
+    """Hash of a module's source, unlike mtimes it only changes with the content."""
+    return hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+
+
+class OBB_ShardedBot(OBB_Bot, commands.AutoShardedInteractionBot):
+    """OBB_Bot running a range of gateway shards in this process."""
+
+
+def create_bot() -> OBB_Bot:
+    """Create the bot, sharded when `SHARD_COUNT` is set."""
+    if cfg.SHARD_COUNT:
+        return OBB_ShardedBot(shard_ids=cfg.SHARD_IDS, shard_count=cfg.SHARD_COUNT)
+    return OBB_Bot()
 
 
 router = APIRouter(
@@ -42,13 +130,25 @@ router = APIRouter(
 )
 
 
-openbb_bot = OBB_Bot()
+openbb_bot = create_bot()
 openbb_bot.load_all_extensions("cmds")
 
 
 @router.on_event("startup")
 async def startup_event():
     try:
+        SYMBOL_DIRECTORY.start()
+        ALERT_ENGINE.start(openbb_bot)
         asyncio.create_task(openbb_bot.start(cfg.DISCORD_BOT_TOKEN))
     except KeyboardInterrupt:
         await openbb_bot.logout()
+
+
+@router.post("/reload")
+async def reload_cogs(authorization: str = Header("")):
+    """Reload the command cogs changed since they were loaded, see `RELOAD_TOKEN`."""
+    if not cfg.RELOAD_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {cfg.RELOAD_TOKEN}".encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return openbb_bot.reload_changed_extensions("cmds")
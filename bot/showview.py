@@ -1,11 +1,14 @@
 import base64
 import io
 import re
+from typing import Optional, Tuple
 
 import disnake
 
+from bot.attachments import ATTACHMENT_STORE
 from bot.config import settings as cfg
-from models.api_models import MainModel
+from bot.uploads import UPLOAD_QUEUE, retry_delay
+from models.api_models import MainModel, PlotsResponse
 
 
 class ShowView:
@@ -19,8 +22,58 @@ class ShowView:
         Log data and process it to create a view for the bot to send to the user
     """
 
+    @staticmethod
+    def build_embed(data: MainModel) -> disnake.Embed:
+        """Build the embed for a response, without any image
+
+        Parameters
+        ----------
+        data : `MainModel`
+            The validated response data
+        """
+        embed = disnake.Embed(
+            title=data.title, colour=cfg.COLOR, description=data.description
+        )
+        embed.set_author(name=cfg.AUTHOR_NAME, icon_url=cfg.AUTHOR_ICON_URL)
+
+        if data.embeds is not None:
+            for field in data.embeds:
+                if field.homepage:
+                    embed.url = field.homepage
+                if field.thumbnail:
+                    embed.set_thumbnail(url=field.thumbnail)
+                if field.footer:
+                    embed.set_footer(text=field.footer)
+                if field.title and field.description:
+                    embed.add_field(
+                        name=field.title,
+                        value=field.description,
+                        inline=field.inline,
+                    )
+
+        return embed
+
+    @staticmethod
+    def plot_file(plot: PlotsResponse, suffix: str = "") -> Tuple[disnake.File, str]:
+        """Create the attachment for a plot
+
+        Returns
+        -------
+        Tuple[disnake.File, str]
+            The file and the `attachment://` url to reference it from an embed
+        """
+        filename = f"{plot.filename[0:10]}{suffix}.{plot.extension}"
+        image = disnake.File(
+            io.BytesIO(base64.b64decode(plot.image64)), filename=filename
+        )
+        return image, f"attachment://{filename}"
+
     async def create_response(
-        self, inter: disnake.AppCmdInter, data: MainModel, no_embed: bool = False
+        self,
+        inter: disnake.AppCmdInter,
+        data: MainModel,
+        no_embed: bool = False,
+        view: Optional[disnake.ui.View] = None,
     ):
         """Creates the view and sends it to the user
 
@@ -28,53 +81,92 @@ class ShowView:
         ----------
         inter : `class`
             The discord interface class
-        data : `dict`
-            The data from the API to be used in the view
+        data : `dict` or `MainModel`
+            The response built by the command, it is not validated again
+        view : `disnake.ui.View`
+            Components to attach to the message
         """
 
         try:
-            data = MainModel(**data)
-
-            embed = disnake.Embed(
-                title=data.title, colour=cfg.COLOR, description=data.description
-            )
-            embed.set_author(name=cfg.AUTHOR_NAME, icon_url=cfg.AUTHOR_ICON_URL)
-
-            if data.embeds is not None:
-                for field in data.embeds:
-                    if field.homepage:
-                        embed.url = field.homepage
-                    if field.thumbnail:
-                        embed.set_thumbnail(url=field.thumbnail)
-                    if field.footer:
-                        embed.set_footer(text=field.footer)
-                    if field.title and field.description:
-                        embed.add_field(
-                            name=field.title,
-                            value=field.description,
-                            inline=field.inline,
-                        )
-
-            if data.plots is not None:
-                filename = data.plots.filename[0:10]
-                image64 = base64.b64decode(data.plots.image64)
-                b64bytes = io.BytesIO(image64)
-                image = disnake.File(b64bytes, filename=f"{filename}.png")
-                embed.set_image(url=f"attachment://{filename}.png")
+            data = MainModel.trusted(data)
+            embed = self.build_embed(data)
+            kwargs = {} if view is None else {"view": view}
+
+            # Images posted before are referenced by their CDN URL instead of uploaded
+            reuse = cfg.REUSE_ATTACHMENT_URLS
+            reused = []
+            uploaded = []
+            plots = data.plots_list[:10] if data.plots_list else [data.plots]
+            plots = [plot for plot in plots if plot is not None]
+            # Looked up once off the event loop, not on every upload attempt
+            stored = {}
+            if reuse and plots:
+                stored = dict(zip(map(id, plots), await ATTACHMENT_STORE.get(plots)))
+
+            def plot_image(plot: PlotsResponse, suffix: str = ""):
+                url = stored.get(id(plot)) if reuse else None
+                if url is not None:
+                    reused.append(plot)
+                    return None, url
+                image, url = self.plot_file(plot, suffix)
+                uploaded.append((image.filename, plot))
+                return image, url
+
+            # Files are recreated from the prepared images on every upload attempt
+            if data.plots_list:
+
+                def build() -> dict:
+                    reused.clear()
+                    uploaded.clear()
+                    embeds, files = [], []
+                    for idx, plot in enumerate(data.plots_list[:10]):
+                        image, url = plot_image(plot, str(idx))
+                        plot_embed = embed if idx == 0 else disnake.Embed(colour=cfg.COLOR)
+                        plot_embed.set_image(url=url)
+                        embeds.append(plot_embed)
+                        if image is not None:
+                            files.append(image)
+                    return dict(embeds=embeds, files=files, **kwargs)
+
+            elif data.plots is not None:
+
+                def build() -> dict:
+                    reused.clear()
+                    uploaded.clear()
+                    image, url = plot_image(data.plots)
+                    if no_embed and image is None:
+                        plot_embed = disnake.Embed(colour=cfg.COLOR).set_image(url=url)
+                        return dict(content=data.description, embed=plot_embed, **kwargs)
+                    if no_embed:
+                        return dict(content=data.description, file=image, **kwargs)
+                    embed.set_image(url=url)
+                    if image is None:
+                        return dict(embed=embed, **kwargs)
+                    return dict(embed=embed, file=image, **kwargs)
+
+            else:
+
+                def build() -> dict:
+                    return dict(embed=embed, **kwargs)
 
+            try:
                 try:
-                    if not no_embed:
-                        await inter.send(embed=embed, file=image)
-                    else:
-                        await inter.send(data.description, file=image)
-                except disnake.errors.DiscordServerError:
-                    await inter.send(
-                        "Discord server error while sending image, try again later"
-                    )
-
-                return image.close()
+                    message = await UPLOAD_QUEUE.send(inter, build)
+                except disnake.HTTPException as error:
+                    if not reused or retry_delay(error, 0) is not None:
+                        raise
+                    # A stored URL was rejected, upload the images again
+                    await ATTACHMENT_STORE.forget(reused)
+                    reuse = False
+                    message = await UPLOAD_QUEUE.send(inter, build)
+
+                await ATTACHMENT_STORE.remember(message, uploaded)
+                return message
+            except disnake.errors.DiscordServerError:
+                await inter.send(
+                    "Discord server error while sending image, try again later"
+                )
 
-            return await inter.send(embed=embed)
         except Exception as e:
             raise Exception("No data Found") from e
 
@@ -85,6 +177,7 @@ class ShowView:
         data: dict,
         error: bool = False,
         no_embed: bool = False,
+        view: Optional[disnake.ui.View] = None,
     ):
         """Process data and create a view to respond to the user
 
@@ -100,12 +193,14 @@ class ShowView:
             Whether or not the data is an error
         no_embed : `bool`
             Whether or not to use an embed
+        view : `disnake.ui.View`
+            Components to attach to the message
         """
         try:
             if error:
                 raise Exception(data)
 
-            await self.create_response(inter, data, no_embed)
+            await self.create_response(inter, data, no_embed, view)
 
         except Exception as e:
             try:
@@ -121,4 +216,6 @@ class ShowView:
             )
             embed.set_author(name=cfg.AUTHOR_NAME, icon_url=cfg.AUTHOR_ICON_URL)
 
-            await inter.send(embed=embed, delete_after=10)
+            # Nothing can be sent once the interaction token has expired
+            if not inter.is_expired():
+                await inter.send(embed=embed, delete_after=10)
@@ -0,0 +1,121 @@
+from typing import Dict, List, Optional
+
+import pandas as pd
+from openbb import obb
+
+from bot.helpers import plot_df, text_table
+from utils.pywry_figure import PyWryFigure
+
+# Statement name -> (obb.equity.fundamental endpoint, display title)
+STATEMENTS: Dict[str, tuple] = {
+    "income": ("income", "Income"),
+    "balance": ("balance", "Balance"),
+    "cashflow": ("cash", "Cashflow"),
+}
+
+INCOME_REPLACEMENTS = {
+    "Research And Development Expenses": "R&D Expenses",
+    "General And Administrative Expenses": "G&A Expenses",
+    "Selling And Marketing Expenses": "S&M Expenses",
+    "Selling General And Administrative Expenses": "SG&A Expenses",
+    "Eps": "EPS",
+    "Eps Diluted": "EPS Diluted",
+    "Ebitda": "EBITDA",
+}
+
+
+def fetch_statement(
+    statement: str, ticker: str, period: str = "annual", limit: Optional[int] = None
+) -> pd.DataFrame:
+    """Fetch a financial statement with title-cased columns.
+
+    Parameters
+    ----------
+    statement : str
+        One of "income", "balance" or "cashflow"
+    ticker : str
+        Stock ticker
+    period : str, optional
+        "annual" or "quarter", by default "annual"
+    limit : int, optional
+        Number of periods, by default the provider's default
+    """
+    endpoint = getattr(obb.equity.fundamental, STATEMENTS[statement][0])
+    kwargs = {} if limit is None else {"limit": limit}
+    df = endpoint(ticker, period=period, **kwargs).to_dataframe().drop(["cik", "calendar_year"], axis=1)
+    df.columns = df.columns.str.replace("_", " ").str.title()
+    return df
+
+
+def statement_data(df: pd.DataFrame, statement: str, position: int = 1) -> pd.DataFrame:
+    """Transpose one period of a statement into a single numeric column.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Statement as returned by `fetch_statement`
+    statement : str
+        One of "income", "balance" or "cashflow"
+    position : int, optional
+        Period to show counting back from the latest, by default 1 (latest)
+    """
+    df = df.iloc[[-position]].T
+    df.columns = [d.strftime("%Y-%m-%d") for d in df.columns]
+    df_update = df[
+        [str(v).replace("-", "", 1).replace(".", "", 1).isdigit() for v in df[df.columns[0]].values]
+    ]
+    # Filter out rows
+    df_update2 = df_update[~df_update.index.str.contains("Ratio")]
+    data = df_update2[~df_update2.index.str.contains("Average")]
+
+    if statement == "income":
+        data.index = [INCOME_REPLACEMENTS.get(i, i) for i in data.index]
+    else:
+        data.index = [i.replace("Net Cash Flow", "NCF") for i in data.index]
+
+    return data
+
+
+def statement_font_colors(values) -> List[str]:
+    """Color values by sign and magnitude."""
+    font_color = list()
+    for val in values:
+        sval = str(val).split(".")[0]
+        if "-" in sval:
+            sval = sval.replace("-", "")
+            if len(sval) > 9:
+                font_color.append("rgb(248,113,113)")
+            elif len(sval) > 6:
+                font_color.append("rgb(220,38,38)")
+            elif len(sval) > 3:
+                font_color.append("rgb(185,28,28)")
+            else:
+                font_color.append("white")
+        elif len(sval) > 9:
+            font_color.append("rgb(74,222,128)")
+        elif len(sval) > 6:
+            font_color.append("rgb(22,163,74)")
+        elif len(sval) > 3:
+            font_color.append("rgb(21,128,61)")
+        else:
+            font_color.append("white")
+
+    return font_color
+
+
+def statement_figure(data: pd.DataFrame) -> PyWryFigure:
+    """Build the table figure for a single-period statement."""
+    return plot_df(
+        data,
+        fig_size=(650, (30 + (45 * len(data.index)))),
+        print_index=True,
+        col_width=[8, 5],
+        nums_format=[data.columns[0]],
+        cell_align=["left", "right"],
+        cell_font_color=[["white"] * len(data), statement_font_colors(data[data.columns[0]].values)],
+    )
+
+
+def statement_text(data: pd.DataFrame) -> str:
+    """Build the monospace table for a single-period statement."""
+    return text_table(data, nums_format=[data.columns[0]])
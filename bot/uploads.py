@@ -0,0 +1,115 @@
+import asyncio
+import random
+from typing import Any, Callable, Dict, List, Optional
+
+import disnake
+
+from bot.config import settings as cfg
+from utils.deadline import Deadline
+
+# Seconds kept free before the interaction token expires
+TOKEN_MARGIN = 5
+
+
+def retry_delay(error: disnake.HTTPException, attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying after `error`, or None if it is not retryable."""
+    if error.status == 429 or isinstance(error, disnake.DiscordServerError):
+        headers = getattr(error.response, "headers", None) or {}
+        for header in ("Retry-After", "X-RateLimit-Reset-After"):
+            try:
+                return float(headers[header])
+            except (KeyError, TypeError, ValueError):
+                continue
+        # Full jitter exponential backoff
+        return random.uniform(0, min(30, 2 ** attempt))  # noqa: S311
+    return None
+
+
+def close_files(kwargs: Dict[str, Any]):
+    files: List[disnake.File] = list(kwargs.get("files") or [])
+    if kwargs.get("file") is not None:
+        files.append(kwargs["file"])
+    for file in files:
+        file.close()
+
+
+class UploadQueue:
+    """Sends prepared responses, retrying transient Discord failures.
+
+    Each response keeps a `build` callable that recreates the message kwargs (and
+    files) from already prepared bytes, so a failed upload is retried without
+    fetching or rendering again. Retries wait for Discord's rate-limit headers
+    or a jittered backoff and stop before the interaction token expires.
+
+    Uploads run in the caller's task, at most `workers` at a time. A response
+    waiting out its backoff gives its slot to the others, so one rate-limited
+    channel does not hold back replies elsewhere.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Number of concurrent uploads, by default 4
+    attempts : int, optional
+        Maximum attempts per response, by default 4
+    """
+
+    def __init__(self, workers: int = 4, attempts: int = 4):
+        self.workers = workers
+        self.attempts = attempts
+        self.retries = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @staticmethod
+    async def _send(inter: disnake.Interaction, kwargs: Dict[str, Any]) -> disnake.Message:
+        if inter.response.is_done():
+            # Deferred, the followup replaces the "thinking" message
+            return await inter.followup.send(**kwargs, wait=True)
+        await inter.response.send_message(**kwargs)
+        return await inter.original_message()
+
+    async def send(
+        self,
+        inter: disnake.Interaction,
+        build: Callable[[], Dict[str, Any]],
+    ) -> Any:
+        """Send a response, retrying transient failures.
+
+        Parameters
+        ----------
+        inter : disnake.Interaction
+            The interaction to respond to
+        build : Callable[[], Dict[str, Any]]
+            Returns the kwargs for `inter.send`, called once per attempt
+
+        Returns
+        -------
+        disnake.Message
+            The message sent, `inter.send` does not return it
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        # Uploads outlive the command deadline, only the token expiry bounds them
+        token = Deadline.until(inter.expires_at, float("inf"), TOKEN_MARGIN)
+        for attempt in range(self.attempts):
+            async with self._slots:
+                kwargs = build()
+                try:
+                    return await self._send(inter, kwargs)
+                except disnake.HTTPException as error:
+                    delay = retry_delay(error, attempt)
+                    if (
+                        delay is None
+                        or attempt == self.attempts - 1
+                        or token.remaining() < delay
+                    ):
+                        raise
+                finally:
+                    close_files(kwargs)
+
+            # Sleep without holding a slot
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+
+UPLOAD_QUEUE = UploadQueue(workers=cfg.UPLOAD_WORKERS, attempts=cfg.UPLOAD_ATTEMPTS)
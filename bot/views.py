@@ -0,0 +1,218 @@
+import traceback
+from typing import Callable, List, Optional
+
+import disnake
+import pandas as pd
+
+from bot.config import settings as cfg
+from bot.executors import cached_fetch, try_render
+from bot.showview import ShowView
+from bot.statements import (
+    STATEMENTS,
+    fetch_statement,
+    statement_data,
+    statement_figure,
+    statement_text,
+)
+from models.api_models import EmbedField, MainModel
+from utils.cache import TTLCache
+from utils.deadline import set_deadline
+from utils.market_calendar import statement_ttl
+
+# Frames fetched by a command, keyed by (interaction id, *frame key)
+FRAME_CACHE = TTLCache(ttl=cfg.VIEW_TIMEOUT, max_entries=512)
+
+
+class CachedFrameView(disnake.ui.View):
+    """Base view for paging through frames fetched by the original command.
+
+    Parameters
+    ----------
+    inter : disnake.AppCmdInter
+        The interaction that created the view, only its author can use it
+    """
+
+    def __init__(self, inter: disnake.AppCmdInter):
+        super().__init__(timeout=cfg.VIEW_TIMEOUT)
+        self.inter_id = inter.id
+        self.author_id = inter.author.id
+        self.keys: List[tuple] = []
+
+    def cache_frame(self, key: tuple, df: pd.DataFrame):
+        """Store a frame for the lifetime of this view."""
+        FRAME_CACHE.set((self.inter_id, *key), df)
+        self.keys.append(key)
+
+    def cached_frame(self, key: tuple) -> Optional[pd.DataFrame]:
+        """Get a frame stored by this view, if it has not expired."""
+        return FRAME_CACHE.get((self.inter_id, *key))
+
+    async def interaction_check(self, inter: disnake.MessageInteraction) -> bool:
+        if inter.author.id != self.author_id:
+            return False
+        set_deadline(inter, cfg.COMMAND_DEADLINE)
+        return True
+
+    async def on_timeout(self):
+        for key in self.keys:
+            FRAME_CACHE.pop((self.inter_id, *key))
+
+
+class StatementView(CachedFrameView):
+    """Buttons to move between periods of a statement and switch annual/quarter."""
+
+    def __init__(
+        self,
+        inter: disnake.AppCmdInter,
+        statement: str,
+        ticker: str,
+        period: str,
+        df: pd.DataFrame,
+    ):
+        super().__init__(inter)
+        self.statement = statement
+        self.ticker = ticker
+        self.period = period
+        self.position = 1
+        self.cache_frame((period,), df)
+        self.update_buttons(df)
+
+    def update_buttons(self, df: pd.DataFrame):
+        self.previous_period.disabled = self.position >= len(df)
+        self.next_period.disabled = self.position <= 1
+        self.switch_period.label = "Quarter" if self.period == "annual" else "Annual"
+
+    async def frame(self) -> pd.DataFrame:
+        """Get the frame for the current period, fetching only if it is not cached."""
+        df = self.cached_frame((self.period,))
+        if df is None:
+            df = await cached_fetch(
+                ("statement", self.statement, self.ticker, self.period),
+                fetch_statement,
+                self.statement,
+                self.ticker,
+                self.period,
+                ttl=statement_ttl(),
+            )
+            self.cache_frame((self.period,), df)
+        return df
+
+    async def render(self, inter: disnake.MessageInteraction):
+        """Re-render the table for the current period and edit the message."""
+        await inter.response.defer()
+
+        try:
+            df = await self.frame()
+            self.position = min(self.position, len(df))
+            self.update_buttons(df)
+
+            data = statement_data(df, self.statement, self.position)
+            plots = await try_render(
+                ("statement", self.statement, self.ticker, self.period, self.position),
+                lambda: statement_figure(data).prepare_table(),
+                statement_ttl(),
+            )
+
+            response = MainModel.model_construct(
+                title=f"{self.ticker} {STATEMENTS[self.statement][1]}", plots=plots
+            )
+            if plots is None:
+                # Answer with a text table while tables can not be rendered
+                response.description = statement_text(data)
+                response.embeds = [EmbedField(footer="Tables are busy, showing text instead")]
+            embed = ShowView.build_embed(response)
+
+        except Exception as e:
+            traceback.print_exc()
+            return await ShowView().discord(inter, self.statement, str(e), error=True)
+
+        kwargs = {}
+        if plots is not None:
+            image, url = ShowView.plot_file(plots)
+            embed.set_image(url=url)
+            kwargs["file"] = image
+        try:
+            await inter.edit_original_message(embed=embed, attachments=[], view=self, **kwargs)
+        finally:
+            if plots is not None:
+                image.close()
+
+    @disnake.ui.button(label="Previous period", emoji="◀", style=disnake.ButtonStyle.secondary)
+    async def previous_period(self, _: disnake.ui.Button, inter: disnake.MessageInteraction):
+        self.position += 1
+        await self.render(inter)
+
+    @disnake.ui.button(label="Next period", emoji="▶", style=disnake.ButtonStyle.secondary)
+    async def next_period(self, _: disnake.ui.Button, inter: disnake.MessageInteraction):
+        self.position -= 1
+        await self.render(inter)
+
+    @disnake.ui.button(label="Quarter", style=disnake.ButtonStyle.primary)
+    async def switch_period(self, _: disnake.ui.Button, inter: disnake.MessageInteraction):
+        self.period = "quarter" if self.period == "annual" else "annual"
+        self.position = 1
+        await self.render(inter)
+
+
+class PagedEmbedView(CachedFrameView):
+    """Buttons to page through the rows of a frame shown as embed fields.
+
+    Parameters
+    ----------
+    inter : disnake.AppCmdInter
+        The interaction that created the view
+    df : pd.DataFrame
+        Frame to page through
+    to_embeds : Callable[[pd.DataFrame], List[EmbedField]]
+        Builds the embed fields for one page of rows
+    page_size : int, optional
+        Rows per page, by default 5
+    """
+
+    def __init__(
+        self,
+        inter: disnake.AppCmdInter,
+        df: pd.DataFrame,
+        to_embeds: Callable[[pd.DataFrame], List[EmbedField]],
+        page_size: int = 5,
+    ):
+        super().__init__(inter)
+        self.to_embeds = to_embeds
+        self.page_size = page_size
+        self.page = 0
+        self.cache_frame(("rows",), df)
+        self.pages = max(1, -(-len(df) // page_size))
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= self.pages - 1
+
+    def page_embeds(self, df: Optional[pd.DataFrame] = None) -> List[EmbedField]:
+        """Embed fields for the current page."""
+        if df is None:
+            df = self.cached_frame(("rows",))
+        start = self.page * self.page_size
+        embeds = self.to_embeds(df.iloc[start : start + self.page_size])
+        embeds.append(EmbedField(footer=f"Page {self.page + 1}/{self.pages}"))
+        return embeds
+
+    async def render(self, inter: disnake.MessageInteraction):
+        df = self.cached_frame(("rows",))
+        if df is None:
+            self.stop()
+            return await inter.response.edit_message(view=None)
+
+        self.update_buttons()
+        embed = ShowView.build_embed(MainModel.model_construct(embeds=self.page_embeds(df)))
+        await inter.response.edit_message(embed=embed, view=self)
+
+    @disnake.ui.button(label="Previous", emoji="◀", style=disnake.ButtonStyle.secondary)
+    async def previous_page(self, _: disnake.ui.Button, inter: disnake.MessageInteraction):
+        self.page -= 1
+        await self.render(inter)
+
+    @disnake.ui.button(label="Next", emoji="▶", style=disnake.ButtonStyle.secondary)
+    async def next_page(self, _: disnake.ui.Button, inter: disnake.MessageInteraction):
+        self.page += 1
+        await self.render(inter)
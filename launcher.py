@@ -0,0 +1,75 @@
+"""Run the bot as several worker processes, each handling a range of shards.
+
+Each worker is a full `main:app` process with its own fetch executor and render
+backend, listening on `SHARD_BASE_PORT + worker index`.
+
+    python launcher.py
+"""
+import json
+import logging
+import multiprocessing
+import os
+import time
+from typing import List
+
+from bot.config import settings as cfg
+
+logger = logging.getLogger(__name__)
+
+
+def shard_ranges(shard_count: int, processes: int) -> List[List[int]]:
+    """Split shard ids into contiguous ranges, one per process."""
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for idx in range(processes):
+        end = start + size + (1 if idx < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def run_worker(shard_ids: List[int], shard_count: int, port: int):
+    """Run one worker process, configured through environment variables."""
+    import uvicorn  # pylint: disable=C0415 # noqa: PLC0415
+
+    os.environ["SHARD_IDS"] = json.dumps(shard_ids)
+    os.environ["SHARD_COUNT"] = str(shard_count)
+    uvicorn.run("main:app", host="127.0.0.1", port=port)
+
+
+def main():
+    shard_count = cfg.SHARD_COUNT or cfg.SHARD_PROCESSES
+    ranges = shard_ranges(shard_count, cfg.SHARD_PROCESSES)
+    ctx = multiprocessing.get_context("spawn")
+
+    def spawn(idx: int) -> multiprocessing.Process:
+        proc = ctx.Process(
+            target=run_worker,
+            args=(ranges[idx], shard_count, cfg.SHARD_BASE_PORT + idx),
+            name=f"OpenBB Bot shards {ranges[idx][0]}-{ranges[idx][-1]}",
+        )
+        proc.start()
+        return proc
+
+    workers = [spawn(idx) for idx in range(len(ranges))]
+    logger.info("Started %d workers for %d shards: %s", len(workers), shard_count, ranges)
+
+    try:
+        while True:
+            # Restart workers that crashed, a clean exit means shutdown
+            for idx, proc in enumerate(workers):
+                if proc.exitcode not in (None, 0):
+                    logger.warning("%s exited with %s, restarting", proc.name, proc.exitcode)
+                    workers[idx] = spawn(idx)
+            time.sleep(5)
+    except KeyboardInterrupt:
+        for proc in workers:
+            proc.terminate()
+        for proc in workers:
+            proc.join()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    main()
@@ -3,11 +3,16 @@ from openbb import obb
 
 from bot import run_bot
 from bot.config import settings as cfg
-from utils.backend import pywry_backend
+from utils import image_encoders, postprocess
+from utils.backend import Backend, backend_supervisor
 
 if getattr(cfg, "OPENBB_HUB_PAT"):
     obb.account.login(pat=getattr(cfg, "OPENBB_HUB_PAT"))
 
+image_encoders.configure(cfg.IMAGE_ENCODER, cfg.PNG_COMPRESS_LEVEL)
+Backend.typed_arrays = cfg.RENDER_TYPED_ARRAYS
+postprocess.configure(cfg.POSTPROCESS_MODE, cfg.POSTPROCESS_WORKERS)
+
 app = FastAPI(title="OpenBB Bots", docs_url=None, redoc_url=None)
 
 
@@ -16,4 +21,4 @@ app.include_router(run_bot.router)
 
 @app.on_event("startup")
 async def startup_event():
-    pywry_backend().start(headless=True)
+    backend_supervisor().start(headless=True)
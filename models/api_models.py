@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Union
 
 from pydantic import BaseModel
 
@@ -10,10 +10,13 @@ class PlotsResponse(BaseModel):
         Filename of the plot
     image64 : str
         Base64 encoded image
+    extension : str
+        File extension of the encoded image, by default "png"
     """
 
     filename: str
     image64: bytes
+    extension: str = "png"
 
     def to_dict(self):
         return self.dict()
@@ -53,3 +56,34 @@ class MainModel(BaseModel):
     embeds: List[EmbedField] = None
     images_list: List[str] = None
     plots: Optional[PlotsResponse] = None
+    plots_list: List[PlotsResponse] = None
+
+    @classmethod
+    def trusted(cls, data: Union[dict, "MainModel"]) -> "MainModel":
+        """Build a response assembled by the bot itself, without validation.
+
+        Validating would copy every image again, use the normal constructor for
+        data from outside the bot. Nested embeds and plots may be models or dicts.
+
+        Parameters
+        ----------
+        data : Union[dict, MainModel]
+            Response fields, returned unchanged if already a MainModel
+        """
+        if isinstance(data, cls):
+            return data
+
+        fields = dict(data)
+        if fields.get("embeds") is not None:
+            fields["embeds"] = [_construct(EmbedField, field) for field in fields["embeds"]]
+        if fields.get("plots") is not None:
+            fields["plots"] = _construct(PlotsResponse, fields["plots"])
+        if fields.get("plots_list") is not None:
+            fields["plots_list"] = [
+                _construct(PlotsResponse, plot) for plot in fields["plots_list"]
+            ]
+        return cls.model_construct(**fields)
+
+
+def _construct(model: type, value: Any) -> BaseModel:
+    return value if isinstance(value, model) else model.model_construct(**value)
@@ -0,0 +1,288 @@
+"""Render charts and statement tables for a list of tickers ahead of traffic.
+
+Images are written to the shared result cache under the same keys the commands
+use, so the first users after the run are answered without fetching or
+rendering. Needs `CACHE_BACKEND="shared"`.
+
+Statement tables rendered before the open are kept through that session.
+Candle charts and ratio tables are keyed by the last session day, as the live
+bars and ratios must be, so those renders are only used until the open.
+
+    python prerender.py --tickers sp500.txt --commands candle,financials
+
+Finished jobs are logged to `bot/cache/prerender.jsonl`, running it again on the
+same session day skips them. Pass `--fresh` to render everything again.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import signal
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from openbb import obb
+
+from bot.candles import candle_figure, candle_params, fetch_candles
+from bot.config import settings as cfg
+from bot.executors import fill_fetch, fill_render
+from bot.ratios import METRICS_PERIODS, derive_metrics, metrics_figure, metrics_table
+from bot.statements import STATEMENTS, fetch_statement, statement_data, statement_figure
+from utils import image_encoders, postprocess
+from utils.backend import Backend, backend_supervisor
+from utils.market_calendar import bars_ttl, last_session_day, statement_ttl
+from utils.pywry_figure import PyWryFigure
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_FILE = cfg.BOTS_PATH / "cache" / "prerender.jsonl"
+DEFAULT_COMMANDS = ("candle", "financials", *STATEMENTS)
+
+
+def init_worker():
+    """Set up a worker process like `main.py` does for the bot."""
+    # Ctrl+C is handled by the parent, which stops handing out jobs
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if cfg.OPENBB_HUB_PAT:
+        obb.account.login(pat=cfg.OPENBB_HUB_PAT)
+
+    image_encoders.configure(cfg.IMAGE_ENCODER, cfg.PNG_COMPRESS_LEVEL)
+    Backend.typed_arrays = cfg.RENDER_TYPED_ARRAYS
+    # Workers are already processes, encode on the worker's own thread
+    postprocess.configure("thread", 1)
+    backend_supervisor().start(headless=True)
+
+
+def fetch_statements(ticker: str, period: str, ttl: float, limit: Optional[int] = None) -> list:
+    """Fetch the three statements under the keys used by the commands."""
+    key = () if limit is None else (limit,)
+    return [
+        fill_fetch(
+            ("statement", statement, ticker, period, *key),
+            partial(fetch_statement, statement, ticker, period, limit),
+            ttl,
+        )
+        for statement in STATEMENTS
+    ]
+
+
+def candle_job(ticker: str, period: str):
+    """Daily candles with the /candle defaults, `period` is not used."""
+    params = candle_params(ticker, "1d", 200)
+    ttl = bars_ttl("1d")
+    data = fill_fetch(("candle", *params.values()), partial(fetch_candles, params), ttl)
+    fill_render(
+        ("candle", *params.values()),
+        lambda: candle_figure(data, ticker, "1d").prepare_image(),
+        ttl,
+    )
+
+
+def statement_job(statement: str, ticker: str, period: str):
+    """Latest period of one statement, as shown by /income, /balance and /cashflow."""
+    # Run before the open, the statements hold until the session closes
+    ttl = statement_ttl(through_session=True)
+    df = fill_fetch(
+        ("statement", statement, ticker, period),
+        partial(fetch_statement, statement, ticker, period),
+        ttl,
+    )
+    fill_render(
+        ("statement", statement, ticker, period, 1),
+        lambda: statement_figure(statement_data(df, statement)).prepare_table(),
+        ttl,
+    )
+
+
+def financials_job(ticker: str, period: str):
+    """All three statements in one render, as shown by /financials."""
+    ttl = statement_ttl(through_session=True)
+    frames = fetch_statements(ticker, period, ttl)
+    fill_render(
+        ("financials", ticker, period),
+        lambda: PyWryFigure.prepare_tables(
+            [
+                statement_figure(statement_data(df, statement))
+                for statement, df in zip(STATEMENTS, frames)
+            ]
+        ),
+        ttl,
+    )
+
+
+def metrics_job(table: str, ticker: str, period: str):
+    """Ratios or growth table, as shown by /ratios and /growth."""
+    ttl = statement_ttl(through_session=True)
+    frames = fetch_statements(ticker, period, ttl, METRICS_PERIODS)
+    key = ("metrics", ticker, period, last_session_day())
+    metrics = fill_fetch(key, partial(derive_metrics, dict(zip(STATEMENTS, frames)), period), ttl)
+    data = metrics_table(metrics[table])
+    if data.empty:
+        raise ValueError(f"No {table} available for {ticker}")
+    fill_render(
+        (table, *key),
+        lambda: metrics_figure(data, colored=table == "growth").prepare_table(),
+        ttl,
+    )
+
+
+# Command name -> job taking (ticker, period)
+COMMANDS = {
+    "candle": candle_job,
+    **{name: partial(statement_job, name) for name in STATEMENTS},
+    "financials": financials_job,
+    "ratios": partial(metrics_job, "ratios"),
+    "growth": partial(metrics_job, "growth"),
+}
+
+
+def run_job(command: str, ticker: str, period: str) -> Tuple[float, Optional[str]]:
+    """Run one job in a worker, returning its duration and error, if any."""
+    started = time.monotonic()
+    try:
+        COMMANDS[command](ticker, period)
+    except Exception as e:  # pylint: disable=W0703
+        traceback.print_exc()
+        return time.monotonic() - started, str(e) or type(e).__name__
+    return time.monotonic() - started, None
+
+
+def read_tickers(value: str) -> List[str]:
+    """Tickers from a file with one or more per line, or a comma separated list."""
+    path = Path(value)
+    text = path.read_text() if path.is_file() else value
+    tickers = [t.strip().upper() for t in text.replace(",", "\n").splitlines()]
+    return list(dict.fromkeys(t for t in tickers if t and not t.startswith("#")))
+
+
+def finished_jobs(as_of: str, period: str) -> Set[Tuple[str, str]]:
+    """(command, ticker) pairs already rendered for this session day and period."""
+    if not PROGRESS_FILE.exists():
+        return set()
+    done = set()
+    with PROGRESS_FILE.open() as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Last line of an interrupted run
+                continue
+            if entry["as_of"] == as_of and entry["period"] == period and entry["ok"]:
+                done.add((entry["command"], entry["ticker"]))
+    return done
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--tickers", required=True, help="File with tickers, or a comma separated list"
+    )
+    parser.add_argument(
+        "--commands",
+        default=",".join(DEFAULT_COMMANDS),
+        help=f"Comma separated, any of {', '.join(COMMANDS)}",
+    )
+    parser.add_argument("--period", choices=["annual", "quarter"], default="annual")
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Worker processes, each with its own renderer"
+    )
+    parser.add_argument("--fresh", action="store_true", help="Ignore jobs finished earlier")
+    args = parser.parse_args(argv)
+
+    args.commands = [c.strip() for c in args.commands.split(",") if c.strip()]
+    unknown = [c for c in args.commands if c not in COMMANDS]
+    if unknown:
+        parser.error(f"Unknown commands {', '.join(unknown)}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if cfg.CACHE_BACKEND != "shared":
+        logger.error('Set CACHE_BACKEND="shared" so the bot can read the pre-rendered images')
+        return 2
+
+    as_of = last_session_day().isoformat()
+    done = set() if args.fresh else finished_jobs(as_of, args.period)
+    jobs = [
+        (command, ticker)
+        for ticker in read_tickers(args.tickers)
+        for command in args.commands
+        if (command, ticker) not in done
+    ]
+    if done:
+        logger.info("Skipping %d jobs finished earlier for %s", len(done), as_of)
+    if not jobs:
+        return 0
+
+    PROGRESS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    ctx = multiprocessing.get_context("spawn")
+    failed: Dict[Tuple[str, str], str] = {}
+    started = time.monotonic()
+
+    with PROGRESS_FILE.open("a") as progress, ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=ctx, initializer=init_worker
+    ) as pool:
+        futures = {
+            pool.submit(run_job, command, ticker, args.period): (command, ticker)
+            for command, ticker in jobs
+        }
+        try:
+            for count, future in enumerate(as_completed(futures), 1):
+                command, ticker = futures[future]
+                seconds, error = future.result()
+                progress.write(
+                    json.dumps(
+                        dict(
+                            as_of=as_of,
+                            period=args.period,
+                            command=command,
+                            ticker=ticker,
+                            ok=error is None,
+                            seconds=round(seconds, 2),
+                            error=error,
+                        )
+                    )
+                    + "\n"
+                )
+                progress.flush()
+                if error is not None:
+                    failed[(command, ticker)] = error
+
+                elapsed = time.monotonic() - started
+                eta = elapsed / count * (len(jobs) - count)
+                status = "ok" if error is None else f"failed: {error}"
+                logger.info(
+                    "[%d/%d] %s %s %s (%.1fs, %.0f min left)",
+                    count,
+                    len(jobs),
+                    command,
+                    ticker,
+                    status,
+                    seconds,
+                    eta / 60,
+                )
+        except KeyboardInterrupt:
+            # Finished jobs are logged, the next run resumes from there
+            logger.warning("Stopping, run again to resume")
+            # Drop queued jobs, shutdown's cancel_futures needs Python 3.9
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=True)
+            return 130
+
+    logger.info(
+        "Rendered %d of %d in %.0fs", len(jobs) - len(failed), len(jobs), time.monotonic() - started
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    sys.exit(main())
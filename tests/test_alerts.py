@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("disnake")
+pytest.importorskip("openbb")
+
+os.environ.setdefault("DISCORD_BOT_TOKEN", "test")
+os.environ["CACHE_BACKEND"] = "memory"
+
+from bot.alerts import (  # noqa: E402
+    KINDS,
+    LINES_PER_MESSAGE,
+    AlertEngine,
+    AlertStore,
+    RuleSet,
+    evaluate,
+)
+
+# id, guild_id, channel_id, user_id, symbol, kind, value, reference
+ROWS = [
+    (1, 10, 100, 7, "MSFT", "above", 400.0, None),
+    (2, 10, 100, 7, "AAPL", "below", 150.0, None),
+    (3, 11, 200, 8, "AAPL", "move", 5.0, 200.0),
+    (4, 11, 200, 8, "TSLA", "move", 5.0, None),
+]
+
+
+class FakeSender:
+    def __init__(self):
+        self.sent = []
+
+    def put(self, channel_id, embed):
+        self.sent.append((channel_id, embed))
+
+
+def test_from_rows_builds_aligned_arrays():
+    rules = RuleSet.from_rows(ROWS)
+
+    assert rules.symbols == ["AAPL", "MSFT", "TSLA"]
+    assert rules.symbol_idx.tolist() == [1, 0, 0, 2]
+    assert rules.kinds.tolist() == [KINDS["above"], KINDS["below"], KINDS["move"], KINDS["move"]]
+    assert rules.references[2] == 200.0
+    assert np.isnan(rules.references[3])
+    assert len(RuleSet.from_rows([])) == 0
+
+
+def test_evaluate_thresholds_and_moves():
+    rules = RuleSet.from_rows(ROWS)
+
+    # AAPL, MSFT, TSLA
+    assert evaluate(rules, np.array([189.0, 401.0, 250.0])).tolist() == [True, False, True, False]
+    assert evaluate(rules, np.array([199.0, 399.0, 250.0])).tolist() == [False] * 4
+
+
+def test_evaluate_skips_missing_prices():
+    rules = RuleSet.from_rows(ROWS)
+
+    assert not evaluate(rules, np.full(3, np.nan)).any()
+
+
+def test_notify_splits_messages_per_channel(tmp_path):
+    engine = AlertEngine(AlertStore(tmp_path / "alerts.db"))
+    engine.sender = FakeSender()
+    count = LINES_PER_MESSAGE + 1
+    rows = [(i, 10, 100, 7, "MSFT", "above", 1.0, None) for i in range(count)]
+    rows.append((count, 11, 200, 8, "AAPL", "below", 1.0, None))
+    fired = RuleSet.from_rows(rows)
+
+    engine.notify(fired, np.full(len(rows), 2.0))
+
+    channels = [channel_id for channel_id, _ in engine.sender.sent]
+    assert channels == [100, 100, 200]
+    lines = [embed.description.count("\n") + 1 for _, embed in engine.sender.sent]
+    assert lines == [LINES_PER_MESSAGE, 1, 1]
+
+
+def test_fired_removes_thresholds_and_moves_references(tmp_path):
+    store = AlertStore(tmp_path / "alerts.db")
+    above = store.add_rule(10, 100, 7, "MSFT", "above", 400.0)
+    move = store.add_rule(10, 100, 7, "AAPL", "move", 5.0, 200.0)
+
+    store.fired([above], [(210.0, move)])
+
+    assert [row[0] for row in store.all_rules()] == [move]
+    assert store.all_rules()[0][-1] == 210.0
@@ -0,0 +1,73 @@
+import asyncio
+import base64
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("disnake")
+
+os.environ.setdefault("DISCORD_BOT_TOKEN", "test")
+os.environ["CACHE_BACKEND"] = "memory"
+
+from bot.attachments import ATTACHMENT_STORE  # noqa: E402
+from bot.showview import ShowView  # noqa: E402
+from models.api_models import MainModel  # noqa: E402
+
+CDN = "https://cdn.discordapp.com/attachments/1/2/{}?ex=ffffffff"
+
+
+class FakeAttachment:
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.url = CDN.format(filename)
+
+
+class FakeMessage:
+    def __init__(self, files):
+        self.attachments = [FakeAttachment(file.filename) for file in files]
+
+
+class FakeResponse:
+    def is_done(self) -> bool:
+        # Commands defer before rendering
+        return True
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, wait: bool = False, **kwargs):
+        self.sent.append(kwargs)
+        files = list(kwargs.get("files") or [])
+        if kwargs.get("file") is not None:
+            files.append(kwargs["file"])
+        return FakeMessage(files) if wait else None
+
+
+class FakeInteraction:
+    def __init__(self):
+        self.expires_at = datetime.now(timezone.utc) + timedelta(minutes=15)
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+
+def response() -> MainModel:
+    image64 = base64.b64encode(b"same image").decode()
+    return MainModel.trusted(
+        {"title": "TEST", "plots": {"filename": "chart", "image64": image64}}
+    )
+
+
+def test_second_identical_response_reuses_url():
+    asyncio.run(ATTACHMENT_STORE.forget([response().plots]))
+    first, second = FakeInteraction(), FakeInteraction()
+
+    asyncio.run(ShowView().create_response(first, response()))
+    asyncio.run(ShowView().create_response(second, response()))
+
+    assert first.followup.sent[0]["file"].filename == "chart.png"
+    sent = second.followup.sent[0]
+    assert "file" not in sent
+    assert sent["embed"].image.url == CDN.format("chart.png")
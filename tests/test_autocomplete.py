@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+pytest.importorskip("disnake")
+pytest.importorskip("pywry")
+pytest.importorskip("openbb")
+
+os.environ.setdefault("DISCORD_BOT_TOKEN", "test")
+os.environ["CACHE_BACKEND"] = "memory"
+
+from bot.autocomplete import PrefixIndex, SymbolDirectory, deletions  # noqa: E402
+
+ROWS = [
+    ["AAPL", "Apple Inc."],
+    ["AAP", "Advance Auto Parts Inc."],
+    ["BAC", "Bank of America Corp"],
+    ["BRK-B", "Berkshire Hathaway Inc."],
+    ["MSFT", "Microsoft Corp"],
+    ["AMZN", "Amazon.com Inc."],
+]
+
+
+@pytest.fixture
+def directory(tmp_path):
+    directory = SymbolDirectory(tmp_path / "symbols.json")
+    directory.build(ROWS)
+    return directory
+
+
+def symbols(results):
+    return [symbol for symbol, _ in results]
+
+
+def test_prefix_index_normalizes_keys():
+    index = PrefixIndex([("BRK-B", 1), ("BRK-A", 2), ("BAC", 3)])
+
+    assert [value for _, value in index.search("brk")] == [2, 1]
+    assert [value for _, value in index.search("brk.b")] == [1]
+    assert list(index.search("brk", limit=1)) == [("BRKA", 2)]
+
+
+def test_deletions():
+    assert deletions("ABC") == {"ABC", "BC", "AC", "AB"}
+
+
+def test_exact_symbol_ranks_before_prefixes(directory):
+    assert symbols(directory.search("aap")) == ["AAP", "AAPL"]
+
+
+def test_company_names_match_from_any_word(directory):
+    assert symbols(directory.search("bank of am")) == ["BAC"]
+    assert symbols(directory.search("america")) == ["BAC"]
+    assert symbols(directory.search("micro")) == ["MSFT"]
+
+
+def test_symbols_one_typo_away(directory):
+    assert symbols(directory.search("mfst")) == ["MSFT"]
+    assert symbols(directory.search("brkb")) == ["BRK-B"]
+
+
+def test_limit(directory):
+    assert len(directory.search("a", limit=2)) == 2
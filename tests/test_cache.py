@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+from utils.cache import SharedCache, TTLCache
+from utils.deadline import CURRENT_DEADLINE, Deadline, DeadlineExceeded
+
+
+def fill_concurrently(cache, key, threads: int = 8):
+    """Call `get_or_fill` from several threads at once, returning the fill count."""
+    calls = []
+    start = threading.Barrier(threads)
+
+    def fill():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    def worker():
+        start.wait()
+        assert cache.get_or_fill(key, fill) == "value"
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    return len(calls)
+
+
+@pytest.fixture
+def shared(tmp_path):
+    return SharedCache(tmp_path / "cache.db", ttl=60, fill_timeout=0.2)
+
+
+def test_ttl_cache_fills_once():
+    cache = TTLCache(ttl=60)
+
+    assert fill_concurrently(cache, "key") == 1
+    assert not cache._fill_locks
+
+
+def test_ttl_cache_refills_after_a_failed_fill():
+    cache = TTLCache(ttl=60)
+
+    def fail():
+        raise ValueError("no data")
+
+    with pytest.raises(ValueError):
+        cache.get_or_fill("key", fail)
+    assert cache.get_or_fill("key", lambda: "value") == "value"
+    assert not cache._fill_locks
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(ttl=60)
+    cache.set("key", "old", ttl=0)
+
+    assert cache.get_or_fill("key", lambda: "new") == "new"
+
+
+def test_shared_cache_fills_once(shared):
+    assert fill_concurrently(shared, "key") == 1
+    assert shared._conn().execute("SELECT COUNT(*) FROM fills").fetchone()[0] == 0
+
+
+def test_shared_cache_takes_over_abandoned_lease(shared):
+    # A filler that died without releasing its lease
+    assert shared._acquire_fill(shared._key("key"))
+
+    assert shared.get_or_fill("key", lambda: "value", poll_interval=0.05) == "value"
+
+
+def test_shared_cache_keeps_lease_taken_over_by_another_filler(shared):
+    db_key = shared._key("key")
+    taken = threading.Event()
+
+    def slow_fill():
+        # Outlive the fill timeout, another thread takes the lease meanwhile
+        time.sleep(0.3)
+        thread = threading.Thread(target=lambda: taken.set() if shared._acquire_fill(db_key) else None)
+        thread.start()
+        thread.join()
+        return "value"
+
+    assert shared.get_or_fill("key", slow_fill) == "value"
+    assert taken.is_set()
+    owners = shared._conn().execute("SELECT COUNT(*) FROM fills WHERE key = ?", (db_key,))
+    assert owners.fetchone()[0] == 1
+
+
+def test_shared_cache_waits_only_until_the_deadline(tmp_path):
+    shared = SharedCache(tmp_path / "cache.db", ttl=60, fill_timeout=60)
+    assert shared._acquire_fill(shared._key("key"))
+
+    token = CURRENT_DEADLINE.set(Deadline(0.2))
+    try:
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            shared.get_or_fill("key", lambda: "value")
+    finally:
+        CURRENT_DEADLINE.reset(token)
+    assert time.monotonic() - started < 1
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bot.indicators import BAR_FIELDS, INDICATORS, BarSeries, BarStore, parse_indicators
+
+
+def make_bars(count: int = 300, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, count))
+    open_ = close + rng.normal(0, 0.5, count)
+    x = pd.date_range("2024-01-02 09:30", periods=count, freq="5min")
+    return {
+        "x": x.strftime("%Y-%m-%d %H:%M:%S").to_numpy().astype(str),
+        "open": open_,
+        "high": np.maximum(open_, close) + 0.5,
+        "low": np.minimum(open_, close) - 0.5,
+        "close": close,
+        "volume": rng.integers(1_000, 10_000, count).astype(np.float64),
+    }
+
+
+def head(bars: dict, end: int) -> dict:
+    return {field: bars[field][:end].copy() for field in BAR_FIELDS}
+
+
+def tail(bars: dict, start: int) -> dict:
+    return {field: bars[field][start:].copy() for field in BAR_FIELDS}
+
+
+def assert_same_columns(incremental: BarSeries, batch: BarSeries):
+    assert incremental.indicators.keys() == batch.indicators.keys()
+    for name, indicator in batch.indicators.items():
+        for key, values in indicator.columns.items():
+            np.testing.assert_allclose(
+                incremental.indicators[name].columns[key],
+                values,
+                equal_nan=True,
+                err_msg=f"{name} {key}",
+            )
+
+
+@pytest.mark.parametrize("name", list(INDICATORS))
+def test_incremental_update_matches_batch(name):
+    bars = make_bars()
+    batch = BarSeries(bars)
+    batch.ensure([name])
+
+    # The last stored bar was still forming when it was fetched
+    forming = head(bars, 200)
+    forming["close"][-1] += 3
+    incremental = BarSeries(forming)
+    incremental.ensure([name])
+
+    assert incremental.extend(tail(bars, 150))
+    assert_same_columns(incremental, batch)
+
+
+def test_extend_rejects_revised_history():
+    bars = make_bars()
+    series = BarSeries(head(bars, 200))
+    revised = tail(bars, 150)
+    revised["close"] = revised["close"] / 2
+
+    assert not series.extend(revised)
+
+
+def test_bar_store_rebuilds_on_revised_history():
+    bars = make_bars()
+    store = BarStore()
+    store.indicator_parts(("TEST", "5m"), head(bars, 200), ["sma"])
+
+    revised = tail(bars, 150)
+    revised["close"] = revised["close"] / 2
+    traces, _ = store.indicator_parts(("TEST", "5m"), revised, ["sma"])
+
+    batch = BarSeries(revised)
+    batch.ensure(["sma"])
+    sma20 = batch.indicators[batch.groups["sma"][0]].columns["sma"]
+    np.testing.assert_allclose(traces[0]["y"], sma20, equal_nan=True)
+
+
+def test_parse_indicators():
+    assert parse_indicators("SMA, rsi sma", intraday=False) == ["sma", "rsi"]
+    with pytest.raises(ValueError):
+        parse_indicators("sma, foo", intraday=False)
+    with pytest.raises(ValueError):
+        parse_indicators("vwap", intraday=False)
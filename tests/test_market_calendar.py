@@ -0,0 +1,70 @@
+from datetime import date, datetime
+
+from utils.market_calendar import (
+    EXCHANGE_TZ,
+    SETTLE_SECONDS,
+    bars_ttl,
+    early_closes,
+    holidays,
+    is_session_day,
+    last_session_day,
+    next_open,
+    statement_ttl,
+)
+
+
+def et(*args) -> datetime:
+    return datetime(*args, tzinfo=EXCHANGE_TZ)
+
+
+def test_holidays_2024():
+    assert sorted(holidays(2024)) == [
+        date(2024, 1, 1),
+        date(2024, 1, 15),
+        date(2024, 2, 19),
+        date(2024, 3, 29),
+        date(2024, 5, 27),
+        date(2024, 6, 19),
+        date(2024, 7, 4),
+        date(2024, 9, 2),
+        date(2024, 11, 28),
+        date(2024, 12, 25),
+    ]
+    assert early_closes(2024) == (date(2024, 7, 3), date(2024, 11, 29), date(2024, 12, 24))
+
+
+def test_weekend_holidays_are_observed():
+    # Juneteenth on a Sunday moves to Monday
+    assert date(2022, 6, 20) in holidays(2022)
+    # New Year's Day on a Saturday is not observed on the Friday before
+    assert is_session_day(date(2021, 12, 31))
+    # Christmas on a Saturday is observed on the Friday before
+    assert not is_session_day(date(2021, 12, 24))
+
+
+def test_last_session_day_skips_nights_and_weekends():
+    assert last_session_day(et(2024, 1, 6, 12)) == date(2024, 1, 5)
+    assert last_session_day(et(2024, 1, 8, 8)) == date(2024, 1, 5)
+    assert last_session_day(et(2024, 1, 8, 9, 30)) == date(2024, 1, 8)
+    assert next_open(et(2024, 1, 5, 20)) == et(2024, 1, 8, 9, 30)
+
+
+def test_bars_ttl_during_the_session():
+    # Next 5 minute bar starts at 10:05
+    assert bars_ttl("5m", et(2024, 1, 3, 10, 2)) == 180
+    assert bars_ttl("1d", et(2024, 1, 3, 10, 2)) == 60
+    # Hourly bars end at the early close
+    assert bars_ttl("1h", et(2024, 11, 29, 12, 59)) == 60
+
+
+def test_bars_ttl_outside_the_session():
+    assert bars_ttl("1d", et(2024, 1, 3, 16, 5)) == SETTLE_SECONDS - 300
+    # Friday night to the Monday open
+    assert bars_ttl("1d", et(2024, 1, 5, 20)) == 61.5 * 3600
+    assert bars_ttl("1d", et(2024, 1, 5, 20), max_ttl=3600) == 3600
+
+
+def test_statement_ttl_before_the_open():
+    assert statement_ttl(et(2024, 1, 3, 8)) == 1.5 * 3600
+    assert statement_ttl(et(2024, 1, 3, 8), through_session=True) == 8 * 3600 + SETTLE_SECONDS
+    assert statement_ttl(et(2024, 1, 3, 12)) == 4 * 3600 + SETTLE_SECONDS
@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from utils.providers import ProviderRouter, ProviderStats, ProviderUnavailable, transient_error
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class Provider:
+    """Fake provider answering with `result`, or raising it if it is an exception."""
+
+    def __init__(self, calls: list, name: str, result, delay: float = 0):
+        self.calls = calls
+        self.name = name
+        self.result = result
+        self.delay = delay
+
+    def __call__(self):
+        self.calls.append(self.name)
+        time.sleep(self.delay)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def fetch(router: ProviderRouter, **providers):
+    calls = []
+    fakes = {name: Provider(calls, name, *args) for name, args in providers.items()}
+    return router.fetch(lambda provider: fakes[provider]()), calls
+
+
+@pytest.fixture
+def router():
+    return ProviderRouter(["a", "b"], hedge_delay=5, failure_threshold=2, cooldown=0.2)
+
+
+def test_transient_errors():
+    assert transient_error(ConnectionError("reset"))
+    assert transient_error(TimeoutError())
+    assert transient_error(HTTPError(503))
+    assert transient_error(HTTPError(429))
+    assert not transient_error(HTTPError(404))
+    assert not transient_error(ValueError("No results found"))
+    try:
+        raise RuntimeError("wrapped") from HTTPError(502)
+    except RuntimeError as error:
+        assert transient_error(error)
+
+
+def test_fails_over_on_transient_errors(router):
+    result, calls = fetch(router, a=(ConnectionError("reset"),), b=("b",))
+
+    assert result == "b"
+    assert calls == ["a", "b"]
+    assert router.stats["a"].errors == 1
+
+
+def test_raises_user_errors_without_failing_over(router):
+    with pytest.raises(ValueError):
+        fetch(router, a=(ValueError("Unknown ticker"),), b=("b",))
+
+    assert router.stats["a"].errors == 0
+    assert router.stats["b"].successes == 0
+
+
+def test_hedges_slow_providers():
+    router = ProviderRouter(["a", "b"], hedge_delay=0.05)
+
+    result, calls = fetch(router, a=("a", 0.5), b=("b",))
+
+    assert result == "b"
+    assert calls == ["a", "b"]
+    assert router.hedges == 1
+
+
+def test_opens_circuit_after_consecutive_errors(router):
+    for _ in range(2):
+        fetch(router, a=(ConnectionError("reset"),), b=("b",))
+
+    result, calls = fetch(router, a=("a",), b=("b",))
+
+    assert result == "b"
+    assert calls == ["b"]
+    assert not router.stats["a"].available
+
+
+def test_raises_when_every_circuit_is_open(router):
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            fetch(router, a=(ConnectionError("reset"),), b=(ConnectionError("reset"),))
+
+    with pytest.raises(ProviderUnavailable):
+        fetch(router, a=("a",), b=("b",))
+
+
+def test_half_open_lets_a_single_trial_call_through():
+    stats = ProviderStats(failure_threshold=1, cooldown=0.1)
+    stats.record(1.0, False)
+    assert not stats.acquire()
+
+    time.sleep(0.1)
+    assert stats.available
+    assert stats.acquire()
+    assert not stats.available
+    assert not stats.acquire()
+
+    stats.record(1.0, True)
+    assert stats.available
+
+
+def test_failed_trial_call_opens_the_circuit_again():
+    stats = ProviderStats(failure_threshold=1, cooldown=0.1)
+    stats.record(1.0, False)
+    time.sleep(0.1)
+    assert stats.acquire()
+
+    stats.record(1.0, False)
+
+    assert not stats.available
+
+
+def test_trial_calls_are_not_granted_twice_concurrently():
+    stats = ProviderStats(failure_threshold=1, cooldown=60)
+    stats.record(1.0, False)
+    stats.open_until = 0.0
+    granted = []
+    start = threading.Barrier(8)
+
+    def worker():
+        start.wait()
+        granted.append(stats.acquire())
+
+    workers = [threading.Thread(target=worker) for _ in range(8)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+
+    assert granted.count(True) == 1
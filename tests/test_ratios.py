@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pywry")
+
+from bot.ratios import LINE_ITEMS, compute_growth, compute_ratios, derive_metrics  # noqa: E402
+
+
+def make_items(periods: int = 8, **columns) -> pd.DataFrame:
+    index = pd.date_range("2022-01-01", periods=periods, freq="3MS")
+    items = pd.DataFrame(np.nan, index=index, columns=list(LINE_ITEMS))
+    for name, values in columns.items():
+        items[name] = np.asarray(values, dtype=float)
+    return items
+
+
+def test_margins_and_returns():
+    items = make_items(
+        2,
+        revenue=[100, 200],
+        gross_profit=[40, 100],
+        net_income=[10, 20],
+        equity=[100, 300],
+        total_debt=[50, 0],
+    )
+
+    ratios = compute_ratios(items, "annual")
+
+    assert ratios["Gross Margin"].tolist() == [0.4, 0.5]
+    # Returns use the average of the opening and closing balance
+    assert ratios["ROE"].tolist() == [0.1, 0.1]
+    assert ratios["Debt / Equity"].tolist() == [0.5, 0.0]
+
+
+def test_quarterly_returns_are_annualized():
+    items = make_items(1, net_income=[10], total_assets=[400])
+
+    assert compute_ratios(items, "quarter")["ROA"].iloc[0] == 0.1
+
+
+def test_division_by_zero_is_nan():
+    items = make_items(1, revenue=[0], gross_profit=[10], current_assets=[5], current_liabilities=[0])
+
+    ratios = compute_ratios(items, "annual")
+
+    assert np.isnan(ratios["Gross Margin"].iloc[0])
+    assert np.isnan(ratios["Current Ratio"].iloc[0])
+
+
+def test_quarterly_growth_compares_the_same_quarter():
+    items = make_items(revenue=[100, 110, 120, 130, 150, 110, 60, 130])
+
+    growth = compute_growth(items, "quarter")
+
+    assert growth["Revenue YoY"].iloc[:4].isna().all()
+    assert growth["Revenue YoY"].iloc[4:].tolist() == pytest.approx([0.5, 0.0, -0.5, 0.0])
+    assert growth["Revenue QoQ"].iloc[1] == pytest.approx(0.1)
+
+
+def test_growth_of_losses_is_relative_to_the_absolute_value():
+    items = make_items(2, net_income=[-100, -50])
+
+    assert compute_growth(items, "annual")["Net Income YoY"].iloc[1] == 0.5
+
+
+def test_derive_metrics_tables_are_latest_first():
+    index = pd.to_datetime(["2022-12-31", "2023-12-31"])
+    frames = {
+        "income": pd.DataFrame({"Revenue": [100, 150], "Net Income": [10, 30]}, index=index),
+        "balance": pd.DataFrame({"Total Assets": [500, 600]}, index=index),
+        "cashflow": pd.DataFrame(index=index),
+    }
+
+    metrics = derive_metrics(frames, "annual")
+
+    assert list(metrics["ratios"].columns) == ["2023-12-31", "2022-12-31"]
+    assert metrics["ratios"].loc["Net Margin"].tolist() == [0.2, 0.1]
+    assert metrics["growth"].loc["Revenue YoY", "2023-12-31"] == 0.5
+    # Metrics without any value are dropped
+    assert "Gross Margin" not in metrics["ratios"].index
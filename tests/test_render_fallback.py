@@ -0,0 +1,64 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("disnake")
+pytest.importorskip("pywry")
+
+os.environ.setdefault("DISCORD_BOT_TOKEN", "test")
+os.environ["CACHE_BACKEND"] = "memory"
+
+from bot.candles import candle_summary  # noqa: E402
+from bot.executors import try_render  # noqa: E402
+from utils.backend import backend_supervisor  # noqa: E402
+from utils.pywry_figure import PyWryFigure  # noqa: E402
+
+CHART = {
+    "data": [
+        {
+            "type": "candlestick",
+            "x": ["2024-01-02", "2024-01-03"],
+            "open": [10, 11],
+            "high": [12, 13],
+            "low": [9, 10],
+            "close": [11, 12],
+        }
+    ]
+}
+
+
+class FailingBackend:
+    def figure_write_image(self, *args, **kwargs):
+        raise RuntimeError("backend crashed")
+
+    def figure_write_images(self, *args, **kwargs):
+        raise RuntimeError("backend crashed")
+
+
+@pytest.fixture
+def failing_backend(monkeypatch):
+    supervisor = backend_supervisor()
+    monkeypatch.setattr(supervisor, "active", FailingBackend())
+    monkeypatch.setattr(supervisor, "standby", None)
+    monkeypatch.setattr(supervisor, "healthy", True)
+    return supervisor
+
+
+def test_chart_render_failure_falls_back_to_text(failing_backend):
+    plots = asyncio.run(
+        try_render(("test", "chart"), lambda: PyWryFigure(CHART).prepare_image())
+    )
+
+    assert plots is None
+    assert not failing_backend.healthy
+    response = candle_summary(CHART, "TEST Daily")
+    assert response["embeds"][-1]["footer"] == "Charts are busy, showing a summary instead"
+
+
+def test_table_render_failure_falls_back_to_text(failing_backend):
+    plots = asyncio.run(
+        try_render(("test", "table"), lambda: PyWryFigure().prepare_table())
+    )
+
+    assert plots is None
@@ -1,12 +1,89 @@
+import asyncio
 import atexit
+import base64
 import json
-from multiprocessing import current_process
+import threading
+import traceback
+from contextlib import contextmanager
+from multiprocessing import current_process, shared_memory
 from pathlib import Path
+from queue import Empty, Queue
+from typing import Dict, Iterator, List, Optional
 
+import numpy as np
 import plotly.graph_objects as go
+import plotly.io as pio
 from pywry import PyWry
+from pywry.core import AsyncioException, BackendFailedToStart
+
+from .deadline import DeadlineExceeded, current_deadline
 
 BACKEND = None
+SUPERVISOR = None
+IMAGE_POOL = None
+
+# Tiny figure used to warm up and health-check render processes
+HEALTH_FIGURE = dict(
+    data=[dict(type="scatter", x=[0, 1], y=[0, 1])],
+    layout=dict(width=20, height=20, margin=dict(l=0, r=0, t=0, b=0)),
+)
+
+RENDER_ERRORS = (Empty, RuntimeError, BackendFailedToStart)
+
+# Arrays shorter than this are cheaper to send as plain JSON lists
+TYPED_ARRAY_MIN_SIZE = 64
+
+
+def pack_typed_arrays(obj):
+    """Replace long numeric arrays with plotly.js typed array specs.
+
+    Arrays become `{"dtype": ..., "bdata": <base64>}`, which plotly.js >= 2.28
+    decodes straight into typed arrays instead of parsing digit text.
+    """
+    if isinstance(obj, dict):
+        return {key: pack_typed_arrays(value) for key, value in obj.items()}
+
+    if isinstance(obj, np.ndarray):
+        arr = obj
+    elif (
+        isinstance(obj, (list, tuple))
+        and len(obj) >= TYPED_ARRAY_MIN_SIZE
+        and type(obj[0]) in (int, float)
+    ):
+        arr = np.asarray(obj)
+    else:
+        return obj
+
+    if arr.ndim != 1 or arr.size < TYPED_ARRAY_MIN_SIZE or arr.dtype.kind not in "iuf":
+        return obj
+
+    # plotly.js has no 64-bit integer arrays
+    if arr.dtype.kind == "f" or arr.min() < -(2**31) or arr.max() >= 2**31:
+        arr, dtype = arr.astype("<f8", copy=False), "f8"
+    else:
+        arr, dtype = arr.astype("<i4", copy=False), "i4"
+
+    return dict(dtype=dtype, bdata=base64.b64encode(arr.tobytes()).decode("ascii"))
+
+
+def figure_json(fig: go.Figure, typed_arrays: bool = False) -> dict:
+    """Serialize a figure for the render process.
+
+    Parameters
+    ----------
+    fig : go.Figure
+        Plotly figure, or an already serialized figure dict
+    typed_arrays : bool, optional
+        Send numeric trace data as binary typed arrays, by default False
+    """
+    if not isinstance(fig, go.Figure):
+        return dict(fig)
+    if not typed_arrays:
+        return json.loads(fig.to_json())
+
+    payload = fig.to_plotly_json()
+    payload["data"] = [pack_typed_arrays(trace) for trace in payload["data"]]
+    return json.loads(pio.to_json(payload, validate=False))
 
 
 class Backend(PyWry):
@@ -20,10 +97,22 @@ class Backend(PyWry):
             Maximum number of retries to start the backend, by default 30
     proc_name : str, optional
             Name of the backend process, by default "PyWry Backend"
+    standby : bool, optional
+            Create a new, non-singleton instance, by default False
+
+    Attributes
+    ----------
+    typed_arrays : bool
+            Send numeric trace data as plotly.js typed arrays. Requires the render
+            page to load plotly.js >= 2.28, by default False
     """
 
-    def __new__(cls, *args, **kwargs):  # pylint: disable=W0613
+    typed_arrays: bool = False
+
+    def __new__(cls, *args, standby: bool = False, **kwargs):  # pylint: disable=W0613
         """Create a singleton instance of the backend."""
+        if standby:
+            return object.__new__(cls)
         if not hasattr(cls, "instance"):
             cls.instance = super().__new__(cls)  # pylint: disable=E1120
         return cls.instance
@@ -33,8 +122,15 @@ class Backend(PyWry):
         daemon: bool = True,
         max_retries: int = 30,
         proc_name: str = "PyWry Backend",
+        standby: bool = False,
     ):
         super().__init__(daemon=daemon, max_retries=max_retries, proc_name=proc_name)
+        # PyWry keeps its message queues on the class, each backend needs its own
+        self.outgoing = []
+        self.init_engine = []
+        self.recv = Queue()
+        self.render_lock = threading.Lock()
+        self.standby = standby
         self.isatty = current_process().name == "MainProcess"
         self.plotly_html = Path(__file__).parent / "plotly.html"
         atexit.register(self.close)
@@ -88,12 +184,19 @@ class Backend(PyWry):
         """
         self.check_backend()
 
-        json_data = json.loads(fig.to_json())
+        json_data = figure_json(fig, self.typed_arrays)
         json_data.update(dict(format=img_format, scale=scale))
 
-        self.send_outgoing(dict(json_data=json_data))
+        # Only one request in flight, otherwise callers could get each other's images
+        with self.acquire_render(timeout) as receive_timeout:
+            # Drop late results from requests that already timed out
+            while not self.recv.empty():
+                self.recv.get_nowait()
+
+            self.send_outgoing(dict(json_data=json_data))
+
+            incoming = self.receive(receive_timeout)
 
-        incoming = self.recv.get(timeout=timeout)
         if incoming.get("result", None):
             # SVG images are already in the correct format
             return (
@@ -104,6 +207,463 @@ class Backend(PyWry):
         else:
             raise RuntimeError("Error converting figure to image.")
 
+    def figure_write_images(
+        self,
+        figs: List[go.Figure],
+        img_format: str = "png",
+        scale: int = 1,
+        timeout: int = 5,
+    ) -> List[bytes]:
+        """Convert several Plotly figures to images in one batch.
+
+        All figures are queued before waiting on any result, so the backend
+        receives them in a single write and renders them back to back.
+
+        Parameters
+        ----------
+        figs : List[go.Figure]
+            Plotly figures to convert to images.
+        img_format : str, optional
+            Image format, by default "png"
+        scale : int, optional
+            Image scale, by default 1
+        timeout : int, optional
+            Timeout for receiving each image, by default 5
+        """
+        self.check_backend()
+
+        payloads = []
+        for fig in figs:
+            json_data = figure_json(fig, self.typed_arrays)
+            json_data.update(dict(format=img_format, scale=scale))
+            payloads.append(dict(json_data=json_data))
+
+        results = []
+        with self.acquire_render(timeout) as receive_timeout:
+            while not self.recv.empty():
+                self.recv.get_nowait()
+
+            for payload in payloads:
+                self.send_outgoing(payload)
+
+            # The backend answers in the order the figures were sent
+            for _ in payloads:
+                incoming = self.receive(receive_timeout)
+                if not incoming.get("result", None):
+                    raise RuntimeError("Error converting figure to image.")
+                results.append(incoming["result"])
+
+        if img_format == "svg":
+            return [result.encode("utf-8") for result in results]
+        return results
+
+    @contextmanager
+    def acquire_render(self, timeout: float) -> Iterator[float]:
+        """Hold the render lock, bounded by the current interaction deadline.
+
+        Yields the timeout to use for each result, capped at the time left.
+        """
+        deadline = current_deadline()
+        if deadline is None:
+            with self.render_lock:
+                yield timeout
+            return
+
+        if not self.render_lock.acquire(timeout=deadline.timeout(stage="Render")):
+            raise DeadlineExceeded("Error: Render timed out")
+        try:
+            yield deadline.timeout(timeout, stage="Render")
+        finally:
+            self.render_lock.release()
+
+    def receive(self, timeout: float) -> dict:
+        """Wait for the next result from the render process.
+
+        A wait cut short by the deadline raises `DeadlineExceeded` rather than
+        `Empty`, so it is not mistaken for a backend failure.
+        """
+        try:
+            return self.recv.get(timeout=timeout)
+        except Empty:
+            deadline = current_deadline()
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded("Error: Render timed out") from None
+            raise
+
+    async def run_backend(self):
+        """Runs the backend and starts the main loop.
+
+        Same as `PyWry.run_backend`, except that every queued message is written
+        on each tick instead of one message per tick, so batches are not spread
+        over several sleeps.
+        """
+        await self.handle_start()
+        with self.lock:
+            self.subprocess_loop = asyncio.get_running_loop()
+            self.loop_policy()
+
+        self.subprocess_loop.create_task(self.stdout_reader())
+
+        if self.debug:
+            self.subprocess_loop.create_task(self.stderr_reader())
+
+        try:
+            if self.init_engine:
+                for msg in self.init_engine:
+                    self.runner.stdin.write(f"{msg}\n".encode())
+                    await self.runner.stdin.drain()
+                self.init_engine.clear()
+
+            while self._is_started.is_set():
+                try:
+                    if self.outgoing:
+                        with self.lock:
+                            batch = self.outgoing[:]
+                            del self.outgoing[: len(batch)]
+                            self.init_engine.extend(batch)
+
+                        self.runner.stdin.write(
+                            "".join(f"{data}\n" for data in batch).encode()
+                        )
+                        await self.runner.stdin.drain()
+
+                        with self.lock:
+                            self.init_engine.clear()
+
+                    await asyncio.sleep(0.05)
+
+                except (BrokenPipeError, ConnectionResetError) as pipe_err:
+                    await self.exception_handler(pipe_err)
+                    await self.run_backend()
+
+                except AsyncioException as asyncio_err:
+                    await self.exception_handler(asyncio_err, subtract=1)
+                    await self.run_backend()
+
+        except RuntimeError as runtime_err:
+            await self.exception_handler(runtime_err, subtract=1)
+            await self.run_backend()
+
+    def is_healthy(self, timeout: int = 5) -> bool:
+        """Check that the backend can render a figure within the timeout."""
+        try:
+            return bool(self.figure_write_image(HEALTH_FIGURE, timeout=timeout))
+        except RENDER_ERRORS:
+            return False
+
+
+class BackendSupervisor:
+    """Keeps the render backend healthy.
+
+    A warm standby backend is kept running next to the active one. When the active
+    backend fails a render or a health check, the standby is swapped in and a new
+    standby is started in the background.
+
+    Parameters
+    ----------
+    health_interval : float, optional
+        Seconds between synthetic health-check renders, by default 30
+    health_timeout : int, optional
+        Timeout for a health-check render, by default 5
+    warmup_timeout : int, optional
+        Timeout for the first render of a newly started backend, by default 20
+    """
+
+    def __init__(
+        self,
+        health_interval: float = 30,
+        health_timeout: int = 5,
+        warmup_timeout: int = 20,
+    ):
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.warmup_timeout = warmup_timeout
+        self.headless = True
+        self.active: Optional[Backend] = None
+        self.standby: Optional[Backend] = None
+        self.restarts = 0
+        self.failovers = 0
+        self.health_failures = 0
+        self.healthy = True
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._replacing = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.close)
+
+    def start(self, headless: bool = True):
+        """Start the active backend, the standby and the health-check thread."""
+        self.headless = headless
+        self.active = pywry_backend()
+        self.active.start(headless=headless)
+
+        self._thread = threading.Thread(
+            target=self._watch, name="PyWry Supervisor", daemon=True
+        )
+        self._thread.start()
+
+    def close(self):
+        """Stop health checks and close all backends."""
+        self._stop.set()
+        for backend in (self.active, self.standby):
+            if backend is not None:
+                backend.close()
+
+    def _spawn(self) -> Backend:
+        """Start a new backend and warm it up with a first render."""
+        backend = Backend(proc_name="PyWry Standby", standby=True)
+        backend.start(headless=self.headless)
+        if not backend.is_healthy(timeout=self.warmup_timeout):
+            backend.close()
+            raise BackendFailedToStart("Standby backend failed to warm up")
+        return backend
+
+    def _replace_standby(self, failed: Optional[Backend] = None):
+        """Close the failed backend and start a new standby."""
+        try:
+            if failed is not None:
+                failed.close()
+            standby = self._spawn()
+            with self._lock:
+                self.standby = standby
+                self.restarts += 1
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self._replacing.clear()
+
+    def _schedule_standby(self, failed: Optional[Backend] = None):
+        if self._replacing.is_set():
+            return
+        self._replacing.set()
+        threading.Thread(
+            target=self._replace_standby, args=(failed,), daemon=True
+        ).start()
+
+    def failover(self, failed: Backend) -> bool:
+        """Swap the standby in place of a failed backend.
+
+        Returns
+        -------
+        bool
+            Whether a healthy backend is now active.
+        """
+        with self._lock:
+            if self.active is None:
+                # Never started, there is nothing to fail over to
+                return False
+            if self.active is not failed:
+                # Another caller already swapped it
+                return True
+            if self.standby is None:
+                return False
+            self.active, self.standby = self.standby, None
+            self.failovers += 1
+
+        self._schedule_standby(failed)
+        return True
+
+    def _restart(self, failed: Backend):
+        """Take a failed backend out of service, restart it and put it back."""
+        with self._lock:
+            if self.active is not failed:
+                # Another caller already swapped it
+                return
+            self.active = None
+
+        # Started outside the lock, renders and failovers do not wait on it
+        try:
+            failed.close()
+            failed.start(headless=self.headless)
+        except Exception:
+            # The next standby is promoted instead, see `_watch`
+            traceback.print_exc()
+            return
+        with self._lock:
+            self.active = failed
+            self.restarts += 1
+
+    def _watch(self):
+        """Health-check loop, run in a daemon thread."""
+        self._schedule_standby()
+        while not self._stop.wait(self.health_interval):
+            active = self.active
+            if active is None:
+                # The last restart failed, promote the standby once it is up
+                with self._lock:
+                    if self.active is None and self.standby is not None:
+                        self.active, self.standby = self.standby, None
+                        self.failovers += 1
+                self.healthy = self.active is not None
+            elif not active.is_healthy(self.health_timeout):
+                self.health_failures += 1
+                if self.failover(active):
+                    self.healthy = True
+                else:
+                    # No standby available, restart the active backend. Renders
+                    # meanwhile fail fast and commands answer in text.
+                    self.healthy = False
+                    self._restart(active)
+            else:
+                self.healthy = True
+
+            standby = self.standby
+            if standby is not None and not standby.is_healthy(self.health_timeout):
+                with self._lock:
+                    if self.standby is standby:
+                        self.standby = None
+                self._schedule_standby(standby)
+            elif standby is None:
+                self._schedule_standby()
+
+    @contextmanager
+    def _track(self):
+        """Count a render request as pending while it waits and renders."""
+        with self._lock:
+            self.pending += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _render(self, method: str, figs, **kwargs):
+        backend = self.active
+        if backend is None:
+            if self._thread is not None:
+                raise BackendFailedToStart("Render backend is restarting")
+            # Not supervised, render on the process backend
+            backend = pywry_backend()
+        with self._track():
+            try:
+                return getattr(backend, method)(figs, **kwargs)
+            except RENDER_ERRORS:
+                if not self.failover(backend):
+                    self.healthy = False
+                    if self.active is None:
+                        raise BackendFailedToStart("Render backend is not running")
+                    raise
+                return getattr(self.active, method)(figs, **kwargs)
+
+    def figure_write_image(self, fig: go.Figure, **kwargs) -> bytes:
+        """Render a figure on the active backend, failing over once on error.
+
+        Accepts the same keyword arguments as `Backend.figure_write_image`.
+        """
+        return self._render("figure_write_image", fig, **kwargs)
+
+    def figure_write_images(self, figs: List[go.Figure], **kwargs) -> List[bytes]:
+        """Render a batch of figures on the active backend, failing over once on error.
+
+        Accepts the same keyword arguments as `Backend.figure_write_images`.
+        """
+        return self._render("figure_write_images", figs, **kwargs)
+
+    def saturated(self, max_pending: int) -> bool:
+        """Whether new renders should be skipped in favour of text responses.
+
+        True when the last health check or render failed with no standby to take
+        over, or when `max_pending` renders are already queued or in flight.
+        """
+        return not self.healthy or 0 < max_pending <= self.pending
+
+    def stats(self) -> dict:
+        """Return restart and failover counters and the current render load."""
+        return dict(
+            restarts=self.restarts,
+            failovers=self.failovers,
+            health_failures=self.health_failures,
+            healthy=self.healthy,
+            pending=self.pending,
+            standby_ready=self.standby is not None,
+        )
+
+
+class SharedImagePool:
+    """Reusable shared memory segments for handing images between processes.
+
+    The owning process leases a segment and passes its name to a worker, the
+    worker writes the encoded image into it with `write_shared_image`, and the
+    owner reads it back as a memoryview without copying or pickling the bytes.
+
+    Parameters
+    ----------
+    segment_size : int, optional
+        Size of each segment in bytes, by default 16 MiB
+    max_segments : int, optional
+        Maximum number of segments kept alive, by default 8
+    """
+
+    def __init__(self, segment_size: int = 16 * 1024**2, max_segments: int = 8):
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._free: List[str] = []
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def acquire(self) -> Optional[str]:
+        """Lease a segment, returns its name or None if the pool is exhausted."""
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            if len(self._segments) >= self.max_segments:
+                return None
+            segment = shared_memory.SharedMemory(create=True, size=self.segment_size)
+            self._segments[segment.name] = segment
+            return segment.name
+
+    def view(self, name: str, nbytes: int) -> memoryview:
+        """Get the first `nbytes` of a leased segment without copying.
+
+        The view is only valid until the segment is released.
+        """
+        return self._segments[name].buf[:nbytes]
+
+    def release(self, name: str):
+        """Return a segment to the pool."""
+        with self._lock:
+            if name in self._segments and name not in self._free:
+                self._free.append(name)
+
+    def close(self):
+        """Unlink every segment."""
+        with self._lock:
+            for segment in self._segments.values():
+                try:
+                    segment.close()
+                    segment.unlink()
+                except (BufferError, FileNotFoundError):
+                    pass
+            self._segments.clear()
+            self._free.clear()
+
+
+# Segments attached by a worker process, keyed by name
+_ATTACHED: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def write_shared_image(name: str, data: bytes) -> Optional[int]:
+    """Write image bytes into a pool segment from a worker process.
+
+    Returns
+    -------
+    Optional[int]
+        Number of bytes written, or None if the image does not fit
+    """
+    segment = _ATTACHED.get(name)
+    if segment is None:
+        # Child processes share the owner's resource tracker, the owner unlinks it
+        segment = shared_memory.SharedMemory(name=name)
+        _ATTACHED[name] = segment
+
+    if len(data) > segment.size:
+        return None
+
+    segment.buf[: len(data)] = data
+    return len(data)
+
 
 def pywry_backend(daemon: bool = True) -> Backend:
     """Get the backend."""
@@ -111,3 +671,19 @@ def pywry_backend(daemon: bool = True) -> Backend:
     if BACKEND is None:
         BACKEND = Backend(daemon)
     return BACKEND
+
+
+def shared_image_pool() -> SharedImagePool:
+    """Get the shared image pool of this process."""
+    global IMAGE_POOL  # pylint: disable=W0603 # noqa
+    if IMAGE_POOL is None:
+        IMAGE_POOL = SharedImagePool()
+    return IMAGE_POOL
+
+
+def backend_supervisor() -> BackendSupervisor:
+    """Get the backend supervisor."""
+    global SUPERVISOR  # pylint: disable=W0603 # noqa
+    if SUPERVISOR is None:
+        SUPERVISOR = BackendSupervisor()
+    return SUPERVISOR
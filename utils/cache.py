@@ -0,0 +1,285 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+from .deadline import check_deadline, current_deadline
+
+_MISSING = object()
+
+
+def _fill_owner() -> str:
+    """Identifies the thread holding a fill lease."""
+    return f"{os.getpid()}:{threading.get_ident()}"
+
+
+class TTLCache:
+    """In-memory cache with per-entry expiry and LRU eviction.
+
+    Parameters
+    ----------
+    ttl : float
+        Default time to live of an entry, in seconds
+    max_entries : int, optional
+        Maximum number of entries before the least recently used is evicted,
+        by default 1024
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: OrderedDict[Hashable, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self._fill_locks: Dict[Hashable, threading.Lock] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value, or `default` if it is missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Set a value, expiring after `ttl` seconds (defaults to the cache ttl)."""
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a value and return it."""
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def get_or_fill(
+        self, key: Hashable, fill: Callable[[], Any], ttl: Optional[float] = None
+    ) -> Any:
+        """Get a value, calling `fill` to compute it on a miss.
+
+        Concurrent callers for the same key wait for the first one instead of
+        calling `fill` again.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            lock = self._fill_locks.setdefault(key, threading.Lock())
+        try:
+            with lock:
+                value = self.get(key, _MISSING)
+                if value is _MISSING:
+                    check_deadline()
+                    value = fill()
+                    self.set(key, value, ttl)
+                return value
+        finally:
+            with self._lock:
+                # A later filler may have installed a new lock for the key
+                if self._fill_locks.get(key) is lock:
+                    del self._fill_locks[key]
+
+
+class SharedCache:
+    """Cache shared by every process on the host, stored in SQLite (WAL mode).
+
+    Same interface as `TTLCache`. Values are pickled, entries expire after their
+    ttl, and the entries closest to expiry are evicted once the store grows
+    past `max_bytes`. `get_or_fill` takes a lease row so only one process fills
+    a key while the others wait for its result.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        SQLite database file
+    ttl : float
+        Default time to live of an entry, in seconds
+    max_bytes : int, optional
+        Maximum total size of the stored values, by default 256 MiB
+    fill_timeout : float, optional
+        Seconds after which a fill lease is considered abandoned, by default 60
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl: float,
+        max_bytes: int = 256 * 1024**2,
+        fill_timeout: float = 60,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.fill_timeout = fill_timeout
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB, expires REAL, size INTEGER)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fills (key TEXT PRIMARY KEY, owner TEXT, started REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Connection for the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return key if isinstance(key, str) else repr(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM entries WHERE expires >= ?", (time.time(),)
+        ).fetchone()[0]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value, or `default` if it is missing or expired."""
+        row = self._conn().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires >= ?",
+            (self._key(key), time.time()),
+        ).fetchone()
+        # Only the bot's own processes write the store
+        return default if row is None else pickle.loads(row[0])  # noqa: S301
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Set a value, expiring after `ttl` seconds (defaults to the cache ttl)."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires, size) VALUES (?, ?, ?, ?)",
+            (self._key(key), sqlite3.Binary(blob), expires, len(blob)),
+        )
+        self._evict(conn)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a value and return it."""
+        value = self.get(key, _MISSING)
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (self._key(key),))
+        return default if value is _MISSING else value
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop expired entries, then the ones closest to expiry, until under max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        conn.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY expires"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def _acquire_fill(self, key: str) -> bool:
+        """Take the fill lease for a key, or take over an abandoned one."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "DELETE FROM fills WHERE key = ? AND started < ?", (key, now - self.fill_timeout)
+        )
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO fills (key, owner, started) VALUES (?, ?, ?)",
+            (key, _fill_owner(), now),
+        )
+        return cursor.rowcount == 1
+
+    def get_or_fill(
+        self,
+        key: Hashable,
+        fill: Callable[[], Any],
+        ttl: Optional[float] = None,
+        poll_interval: float = 0.05,
+        max_poll_interval: float = 1.0,
+    ) -> Any:
+        """Get a value, calling `fill` to compute it on a miss.
+
+        Only one process fills a given key at a time, the others poll for its
+        result and fill it themselves if the lease is abandoned. Polling backs off
+        exponentially up to `max_poll_interval` and stops at the current deadline,
+        so a stampede on one key does not keep every fetch thread busy.
+        """
+        db_key = self._key(key)
+        delay = poll_interval
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            check_deadline()
+            if self._acquire_fill(db_key):
+                try:
+                    value = fill()
+                    self.set(key, value, ttl)
+                    return value
+                finally:
+                    # The lease may have been taken over after `fill_timeout`
+                    self._conn().execute(
+                        "DELETE FROM fills WHERE key = ? AND owner = ?", (db_key, _fill_owner())
+                    )
+
+            deadline = current_deadline()
+            time.sleep(delay if deadline is None else min(delay, deadline.remaining()))
+            delay = min(delay * 2, max_poll_interval)
+
+
+def create_cache(
+    backend: str, ttl: float, path: Optional[Union[str, Path]] = None, max_bytes: int = 256 * 1024**2
+) -> Union[TTLCache, SharedCache]:
+    """Create a result cache.
+
+    Parameters
+    ----------
+    backend : str
+        "memory" for a per-process cache, "shared" for a SQLite store shared by
+        every process on the host
+    ttl : float
+        Default time to live of an entry, in seconds
+    path : Union[str, Path], optional
+        SQLite database file, required for "shared"
+    max_bytes : int, optional
+        Maximum size of a shared store, by default 256 MiB
+    """
+    if backend == "shared":
+        if path is None:
+            raise ValueError("A path is required for the shared cache.")
+        return SharedCache(path, ttl, max_bytes=max_bytes)
+    if backend == "memory":
+        return TTLCache(ttl)
+    raise ValueError(f"Invalid cache backend {backend}. Must be 'memory' or 'shared'.")
@@ -0,0 +1,79 @@
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+# Deadline of the interaction being handled, set once per command invocation
+CURRENT_DEADLINE: ContextVar[Optional["Deadline"]] = ContextVar(
+    "CURRENT_DEADLINE", default=None
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a stage starts or waits past the interaction's deadline."""
+
+
+class Deadline:
+    """Point in time after which work for an interaction is pointless.
+
+    Parameters
+    ----------
+    seconds : float
+        Seconds from now until the deadline
+    """
+
+    def __init__(self, seconds: float):
+        self.expires = time.monotonic() + seconds
+
+    @classmethod
+    def until(cls, expires_at: datetime, timeout: float, margin: float = 5) -> "Deadline":
+        """Deadline in `timeout` seconds, or `margin` seconds before `expires_at`
+        (the interaction token expiry), whichever comes first."""
+        token_left = (expires_at - datetime.now(timezone.utc)).total_seconds() - margin
+        return cls(min(timeout, token_left))
+
+    def remaining(self) -> float:
+        """Seconds left, 0 once expired."""
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires
+
+    def check(self, stage: str = "Request"):
+        """Raise `DeadlineExceeded` if the deadline has passed."""
+        if self.expired:
+            raise DeadlineExceeded(f"Error: {stage} timed out")
+
+    def timeout(self, cap: Optional[float] = None, stage: str = "Request") -> float:
+        """Seconds a stage may wait, capped at `cap` and never past the deadline."""
+        self.check(stage)
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline of the interaction being handled, if any."""
+    return CURRENT_DEADLINE.get()
+
+
+def set_deadline(inter, timeout: float) -> Deadline:
+    """Start the deadline for an interaction in the current context.
+
+    Parameters
+    ----------
+    inter : disnake.Interaction
+        The interaction being handled, its token expiry bounds the deadline
+    timeout : float
+        Seconds allowed for the command
+    """
+    deadline = Deadline.until(inter.expires_at, timeout)
+    CURRENT_DEADLINE.set(deadline)
+    return deadline
+
+
+def check_deadline(stage: str = "Request"):
+    """Raise `DeadlineExceeded` if the current deadline has passed."""
+    deadline = CURRENT_DEADLINE.get()
+    if deadline is not None:
+        deadline.check(stage)
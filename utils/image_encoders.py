@@ -0,0 +1,79 @@
+import io
+from typing import Callable, Dict, Optional, Tuple
+
+from PIL import Image
+
+DEFAULT_ENCODER = "png"
+PNG_COMPRESS_LEVEL = 6
+
+# Encoder name -> file extension
+EXTENSIONS: Dict[str, str] = {
+    "png": "png",
+    "png-palette": "png",
+    "webp": "webp",
+}
+
+
+def _save_png(image: Image.Image, buffer: io.BytesIO):
+    image.save(buffer, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+
+
+def _save_png_palette(image: Image.Image, buffer: io.BytesIO):
+    # Fast octree is the only quantizer that keeps the alpha channel
+    palette = image.convert("RGBA").quantize(
+        colors=256, method=Image.Quantize.FASTOCTREE
+    )
+    palette.save(buffer, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+    palette.close()
+
+
+def _save_webp(image: Image.Image, buffer: io.BytesIO):
+    # With lossless=True, quality is the compression effort
+    image.save(buffer, "WEBP", lossless=True, quality=80, method=4)
+
+
+ENCODERS: Dict[str, Callable[[Image.Image, io.BytesIO], None]] = {
+    "png": _save_png,
+    "png-palette": _save_png_palette,
+    "webp": _save_webp,
+}
+
+
+def configure(encoder: str, png_compress_level: int = PNG_COMPRESS_LEVEL):
+    """Set the default encoder and PNG zlib level.
+
+    Parameters
+    ----------
+    encoder : str
+        One of "png", "png-palette" or "webp"
+    png_compress_level : int, optional
+        zlib level from 0 (fastest) to 9 (smallest), by default 6
+    """
+    global DEFAULT_ENCODER, PNG_COMPRESS_LEVEL  # pylint: disable=W0603 # noqa
+    if encoder not in ENCODERS:
+        raise ValueError(
+            f"Invalid image encoder {encoder}. Must be one of {', '.join(ENCODERS)}."
+        )
+    DEFAULT_ENCODER = encoder
+    PNG_COMPRESS_LEVEL = png_compress_level
+
+
+def encode_image(image: Image.Image, encoder: Optional[str] = None) -> Tuple[bytes, str]:
+    """Encode a PIL image.
+
+    Parameters
+    ----------
+    image : Image.Image
+        Image to encode
+    encoder : str, optional
+        Encoder to use, by default the configured default
+
+    Returns
+    -------
+    Tuple[bytes, str]
+        Encoded image and its file extension
+    """
+    encoder = encoder or DEFAULT_ENCODER
+    buffer = io.BytesIO()
+    ENCODERS[encoder](image, buffer)
+    return buffer.getvalue(), EXTENSIONS[encoder]
@@ -0,0 +1,204 @@
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python 3.8
+    from backports.zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# Bar interval -> length in minutes, daily bars are handled separately
+INTERVAL_MINUTES: Dict[str, int] = {
+    "1m": 1,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "1h": 60,
+    "4h": 240,
+}
+
+# The last daily bar changes all session long, refresh it this often
+DAILY_SESSION_TTL = 60
+# Providers keep correcting the last bars for a while after the close
+SETTLE_SECONDS = 15 * 60
+MIN_TTL = 5
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The `n`th `weekday` (0 = Monday) of a month, counting from the end if `n` < 0."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+
+
+def _easter(year: int) -> date:
+    """Western Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day: date) -> Optional[date]:
+    """Weekday a fixed-date holiday is observed on.
+
+    Sunday holidays move to Monday. Saturday holidays move to Friday, except
+    New Year's Day, which the exchange does not observe on the prior year's Friday.
+    """
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    if day.weekday() == 5:
+        return None if (day.month, day.day) == (1, 1) else day - timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=16)
+def holidays(year: int) -> Dict[date, str]:
+    """NYSE full-day holidays of a year."""
+    days = {
+        _observed(date(year, 1, 1)): "New Year's Day",
+        _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+        _easter(year) - timedelta(days=2): "Good Friday",
+        _nth_weekday(year, 5, 0, -1): "Memorial Day",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    if year >= 2022:
+        days[_observed(date(year, 6, 19))] = "Juneteenth"
+    days.pop(None, None)
+    return days
+
+
+@lru_cache(maxsize=16)
+def early_closes(year: int) -> Tuple[date, ...]:
+    """NYSE 1 p.m. closes of a year."""
+    days = [
+        # Day before Independence Day, unless the 4th is a Monday
+        date(year, 7, 3),
+        # Day after Thanksgiving
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    ]
+    if date(year, 7, 4).weekday() == 0:
+        days.pop(0)
+    return tuple(day for day in days if is_session_day(day))
+
+
+def is_session_day(day: date) -> bool:
+    """Whether the exchange trades on `day`."""
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def session(day: date) -> Optional[Tuple[datetime, datetime]]:
+    """Open and close of the session on `day`, or None if the exchange is closed."""
+    if not is_session_day(day):
+        return None
+    close = EARLY_CLOSE if day in early_closes(day.year) else SESSION_CLOSE
+    return (
+        datetime.combine(day, SESSION_OPEN, EXCHANGE_TZ),
+        datetime.combine(day, close, EXCHANGE_TZ),
+    )
+
+
+def next_open(now: datetime) -> datetime:
+    """Next session open strictly after `now`."""
+    day = now.astimezone(EXCHANGE_TZ).date()
+    while True:
+        bounds = session(day)
+        if bounds is not None and bounds[0] > now:
+            return bounds[0]
+        day += timedelta(days=1)
+
+
+def last_session_day(now: Optional[datetime] = None) -> date:
+    """Day of the latest session that has opened, `now` included.
+
+    Use it instead of today's date in cache keys, so nights, weekends and
+    holidays map to the same key as the last session.
+    """
+    now = now or datetime.now(timezone.utc)
+    day = now.astimezone(EXCHANGE_TZ).date()
+    while True:
+        bounds = session(day)
+        if bounds is not None and bounds[0] <= now:
+            return day
+        day -= timedelta(days=1)
+
+
+def bars_ttl(interval: str, now: Optional[datetime] = None, max_ttl: float = 4 * 86400) -> float:
+    """Seconds until bars of `interval` can change.
+
+    During the session this is the time to the next bar boundary (or
+    `DAILY_SESSION_TTL` for daily bars), right after the close it is
+    `SETTLE_SECONDS`, and otherwise it lasts until the next session opens.
+
+    Parameters
+    ----------
+    interval : str
+        Bar interval, e.g. "5m", "1h" or "1d"
+    now : datetime, optional
+        Current time, by default now
+    max_ttl : float, optional
+        Longest TTL returned, by default 4 days
+    """
+    now = now or datetime.now(timezone.utc)
+    bounds = session(now.astimezone(EXCHANGE_TZ).date())
+
+    if bounds is not None and bounds[0] <= now < bounds[1]:
+        minutes = INTERVAL_MINUTES.get(interval)
+        if minutes is None:
+            ttl = DAILY_SESSION_TTL
+        else:
+            elapsed = (now - bounds[0]).total_seconds()
+            boundary = bounds[0] + timedelta(minutes=minutes * (elapsed // (minutes * 60) + 1))
+            ttl = (min(boundary, bounds[1]) - now).total_seconds()
+    elif bounds is not None and bounds[1] <= now < bounds[1] + timedelta(seconds=SETTLE_SECONDS):
+        ttl = (bounds[1] + timedelta(seconds=SETTLE_SECONDS) - now).total_seconds()
+    else:
+        ttl = (next_open(now) - now).total_seconds()
+
+    return max(MIN_TTL, min(ttl, max_ttl))
+
+
+def statement_ttl(
+    now: Optional[datetime] = None, max_ttl: float = 4 * 86400, through_session: bool = False
+) -> float:
+    """Seconds until financial statements are worth fetching again.
+
+    Earnings are released before the open or after the close, so statements are
+    kept until the next session open or close, whichever comes first.
+
+    Parameters
+    ----------
+    now : datetime, optional
+        Current time, by default now
+    max_ttl : float, optional
+        Longest TTL returned, by default 4 days
+    through_session : bool, optional
+        Before the open of a session day, keep statements until its close. For
+        jobs run after the pre-market releases, by default False
+    """
+    now = now or datetime.now(timezone.utc)
+    bounds = session(now.astimezone(EXCHANGE_TZ).date())
+    if bounds is not None and (bounds[0] <= now or through_session) and now < bounds[1]:
+        change = bounds[1] + timedelta(seconds=SETTLE_SECONDS)
+    else:
+        change = next_open(now)
+    return max(MIN_TTL, min((change - now).total_seconds(), max_ttl))
@@ -0,0 +1,282 @@
+import base64
+import io
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from PIL import Image
+
+from . import image_encoders
+from .backend import shared_image_pool, write_shared_image
+from .image_encoders import encode_image
+
+BOT_PATH = (Path(__file__).parent.parent / "bot").resolve()
+
+POSTPROCESS_POOL = None
+
+# Chart background and overlay, decoded once per process
+_LAYERS: Dict[str, Image.Image] = {}
+_LAYERS_LOCK = threading.Lock()
+
+
+def chart_layer(name: str) -> Image.Image:
+    """Get a decoded chart layer from `bot/assets`, only read from it."""
+    with _LAYERS_LOCK:
+        if name not in _LAYERS:
+            layer = Image.open(BOT_PATH / "assets" / name)
+            layer.load()
+            _LAYERS[name] = layer
+        return _LAYERS[name]
+
+
+def autocrop_image(image: Image.Image, border=0) -> Image.Image:
+    """Crop empty space from PIL image
+
+    Only the alpha channel is scanned for the bounding box. No copy is made when
+    there is nothing to crop, and no new canvas is allocated when `border` is 0,
+    so the returned image may be `image` itself.
+
+    Parameters
+    ----------
+    image : Image.Image
+        PIL image to crop
+    border : int, optional
+        scale border outwards, by default 0
+
+    Returns
+    -------
+    Image.Image
+        Cropped image
+    """
+    bbox = image.getbbox(alpha_only=True)
+    if bbox is not None and bbox != (0, 0, *image.size):
+        image = image.crop(bbox)
+
+    if not border:
+        return image
+
+    (width, height) = image.size
+    width += border * 2
+    height += border * 2
+    cropped_image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    cropped_image.paste(image, (border, border))
+    return cropped_image
+
+
+def finish_chart(image64: str, encoder: Optional[str] = None) -> Tuple[bytes, str]:
+    """Composite a rendered chart between the background and overlay and encode it.
+
+    Parameters
+    ----------
+    image64 : str
+        Base64 PNG from the render backend
+    encoder : str, optional
+        Image encoder, by default the one set in `IMAGE_ENCODER`
+    """
+    im_bg = chart_layer("bg_dark_charts.png")
+    paste = chart_layer("bg_charts_paste.png")
+
+    with Image.open(io.BytesIO(base64.b64decode(image64))) as fig_img:
+        # make new transparent image
+        new_img = Image.new("RGBA", im_bg.size, (255, 255, 255, 0))
+
+        # paste background on it
+        new_img.paste(im_bg, (0, 0), im_bg)
+
+        # Paste fig onto background img
+        x1 = int(0.5 * new_img.size[0]) - int(0.5 * fig_img.size[0])
+        y1 = int(0.5 * new_img.size[1]) - int(0.5 * fig_img.size[1])
+        x2 = int(0.5 * new_img.size[0]) + int(0.5 * fig_img.size[0])
+        y2 = int(0.5 * new_img.size[1]) + int(0.5 * fig_img.size[1])
+
+        new_img.paste(fig_img, box=(x1, y1 - 15, x2, y2 - 15))
+
+    new_img.paste(paste, (0, 0), paste)
+
+    imagebytes, extension = encode_image(new_img, encoder)
+    new_img.close()
+    return imagebytes, extension
+
+
+def finish_table(image64: str, encoder: Optional[str] = None) -> Tuple[bytes, str]:
+    """Crop a rendered table and encode it.
+
+    Parameters
+    ----------
+    image64 : str
+        Base64 PNG from the render backend
+    encoder : str, optional
+        Image encoder, by default the one set in `IMAGE_ENCODER`
+    """
+    with Image.open(io.BytesIO(base64.b64decode(image64))) as rendered:
+        image = autocrop_image(rendered, 0)
+        if image is not rendered:
+            # Free the full render before encoding the cropped copy
+            rendered.close()
+
+        imagebytes, extension = encode_image(image, encoder)
+        image.close()
+
+    return imagebytes, extension
+
+
+# Job name -> function taking the rendered base64 PNG and an encoder
+JOBS: Dict[str, Callable[[str, Optional[str]], Tuple[bytes, str]]] = {
+    "chart": finish_chart,
+    "table": finish_table,
+}
+
+
+def _run_job(
+    job: str, image64: str, encoder: Optional[str], segment: Optional[str] = None
+) -> Tuple[Union[bytes, int], str]:
+    """Run a job, writing the result into `segment` when one is given.
+
+    Returns the number of bytes written to the segment, or the bytes themselves
+    when there is no segment or the image does not fit.
+    """
+    imagebytes, extension = JOBS[job](image64, encoder)
+    if segment is not None:
+        nbytes = write_shared_image(segment, imagebytes)
+        if nbytes is not None:
+            return nbytes, extension
+    return imagebytes, extension
+
+
+class PostProcessPool:
+    """Workers compositing, cropping and encoding rendered images.
+
+    In "thread" mode jobs run on a thread pool, Pillow releases the GIL for most
+    of the work. In "process" mode they run in spawned worker processes, which
+    write the encoded image into a `SharedImagePool` segment instead of pickling
+    it back.
+
+    Parameters
+    ----------
+    mode : str, optional
+        "thread" or "process", by default "thread"
+    workers : int, optional
+        Number of workers, by default 4
+    """
+
+    def __init__(self, mode: str = "thread", workers: int = 4):
+        if mode not in ("thread", "process"):
+            raise ValueError(
+                f"Invalid post-processing mode {mode}. Must be 'thread' or 'process'."
+            )
+        self.mode = mode
+        self.workers = workers
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "process":
+                    # Workers need the same encoder settings as this process
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=image_encoders.configure,
+                        initargs=(
+                            image_encoders.DEFAULT_ENCODER,
+                            image_encoders.PNG_COMPRESS_LEVEL,
+                        ),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="postprocess"
+                    )
+            return self._executor
+
+    def map(
+        self, job: str, images64: List[str], encoder: Optional[str] = None
+    ) -> List[Tuple[bytes, str]]:
+        """Run a job on several rendered images in parallel.
+
+        Parameters
+        ----------
+        job : str
+            One of "chart" or "table"
+        images64 : List[str]
+            Base64 PNGs from the render backend
+        encoder : str, optional
+            Image encoder, by default the one set in `IMAGE_ENCODER`
+
+        Returns
+        -------
+        List[Tuple[bytes, str]]
+            Base64 encoded images and their extensions, in the same order
+        """
+        executor = self.executor()
+        if self.mode == "thread":
+            futures = [
+                executor.submit(_run_job, job, image64, encoder) for image64 in images64
+            ]
+            return [
+                (base64.b64encode(imagebytes), extension)
+                for imagebytes, extension in (future.result() for future in futures)
+            ]
+
+        pool = shared_image_pool()
+        segments = [pool.acquire() for _ in images64]
+        try:
+            futures = [
+                executor.submit(_run_job, job, image64, encoder, segment)
+                for image64, segment in zip(images64, segments)
+            ]
+            results = []
+            for future, segment in zip(futures, segments):
+                result, extension = future.result()
+                if isinstance(result, int):
+                    # Encode straight from the segment, without copying it out
+                    view = pool.view(segment, result)
+                    result = base64.b64encode(view)
+                    view.release()
+                else:
+                    result = base64.b64encode(result)
+                results.append((result, extension))
+            return results
+        finally:
+            for segment in segments:
+                if segment is not None:
+                    pool.release(segment)
+
+    def run(self, job: str, image64: str, encoder: Optional[str] = None) -> Tuple[bytes, str]:
+        """Run a job on one rendered image, see `map`."""
+        return self.map(job, [image64], encoder)[0]
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                # Drop queued jobs too, cancel_futures is new in Python 3.9
+                cancel = {"cancel_futures": True} if sys.version_info >= (3, 9) else {}
+                self._executor.shutdown(wait=False, **cancel)
+                self._executor = None
+
+
+def configure(mode: str, workers: int = 4):
+    """Set how rendered images are post-processed.
+
+    Parameters
+    ----------
+    mode : str
+        "thread" or "process"
+    workers : int, optional
+        Number of workers, by default 4
+    """
+    global POSTPROCESS_POOL  # pylint: disable=W0603 # noqa
+    if POSTPROCESS_POOL is not None:
+        POSTPROCESS_POOL.close()
+    POSTPROCESS_POOL = PostProcessPool(mode, workers)
+
+
+def postprocess_pool() -> PostProcessPool:
+    """Get the post-processing pool."""
+    global POSTPROCESS_POOL  # pylint: disable=W0603 # noqa
+    if POSTPROCESS_POOL is None:
+        POSTPROCESS_POOL = PostProcessPool()
+    return POSTPROCESS_POOL
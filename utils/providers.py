@@ -0,0 +1,314 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from .deadline import DeadlineExceeded, current_deadline
+
+T = TypeVar("T")
+
+# Provider messages that OpenBB passes on without the HTTP response
+_TRANSIENT_MESSAGE = re.compile(
+    r"\b(?:429|50[0-4])\b|too many requests|rate limit|timed out|temporarily unavailable",
+    re.IGNORECASE,
+)
+
+
+class ProviderUnavailable(RuntimeError):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+def _status(error: BaseException) -> Optional[int]:
+    """HTTP status of a requests, aiohttp or httpx error, if it carries one."""
+    response = getattr(error, "response", None)
+    for status in (
+        getattr(error, "status", None),
+        getattr(error, "status_code", None),
+        getattr(response, "status_code", None),
+        getattr(response, "status", None),
+    ):
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def transient_error(error: BaseException) -> bool:
+    """Whether `error` is the provider's fault and another provider may answer.
+
+    Transport errors, timeouts and 5xx or 429 responses are. Anything else, like
+    an unknown ticker, no results or invalid parameters, would fail the same way
+    on every provider. The causes of wrapped errors are checked too.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, DeadlineExceeded):
+            return False
+        status = _status(error)
+        if status is not None:
+            return status == 429 or status >= 500
+        if isinstance(
+            error,
+            (
+                ProviderUnavailable,
+                OSError,
+                TimeoutError,
+                asyncio.TimeoutError,
+                concurrent.futures.TimeoutError,
+            ),
+        ):
+            # requests and aiohttp transport errors are OSErrors
+            return True
+        if _TRANSIENT_MESSAGE.search(str(error)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class ProviderStats:
+    """Latency and error statistics of one data provider, with its circuit breaker.
+
+    The circuit opens after `failure_threshold` errors in a row. Once `cooldown`
+    has passed it is half-open: a single trial call is let through, which closes
+    the circuit if it succeeds and opens it again if it fails.
+
+    Parameters
+    ----------
+    window : int, optional
+        Number of recent successful latencies kept, by default 200
+    failure_threshold : int, optional
+        Errors in a row that open the circuit, by default 5
+    cooldown : float, optional
+        Seconds the circuit stays open, and the longest a trial call holds it
+        half-open, by default 60
+    """
+
+    def __init__(self, window: int = 200, failure_threshold: int = 5, cooldown: float = 60):
+        self.latencies: deque = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.successes = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.open_until = 0.0
+        self.probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        """Record a call, opening the circuit after `failure_threshold` errors in a row."""
+        with self._lock:
+            self.probe_started = None
+            if ok:
+                self.latencies.append(latency)
+                self.successes += 1
+                self.consecutive_errors = 0
+                self.open_until = 0.0
+                return
+            self.errors += 1
+            self.consecutive_errors += 1
+            if self.consecutive_errors >= self.failure_threshold:
+                self.open_until = time.monotonic() + self.cooldown
+
+    def _available(self, now: float) -> bool:
+        if self.consecutive_errors < self.failure_threshold:
+            return True
+        if now < self.open_until:
+            return False
+        # Half-open, unless a trial call is running
+        return self.probe_started is None or now - self.probe_started >= self.cooldown
+
+    def acquire(self) -> bool:
+        """Take the right to call the provider, the trial call while half-open."""
+        with self._lock:
+            now = time.monotonic()
+            if not self._available(now):
+                return False
+            if self.consecutive_errors >= self.failure_threshold:
+                self.probe_started = now
+            return True
+
+    def p95(self, min_samples: int) -> Optional[float]:
+        """95th percentile latency, or None with fewer than `min_samples` calls."""
+        with self._lock:
+            if len(self.latencies) < min_samples:
+                return None
+            return float(np.percentile(self.latencies, 95))
+
+    @property
+    def available(self) -> bool:
+        """False while the circuit is open or its trial call is running."""
+        with self._lock:
+            return self._available(time.monotonic())
+
+    def to_dict(self) -> dict:
+        return dict(
+            successes=self.successes,
+            errors=self.errors,
+            circuit_open=not self.available,
+            p95=self.p95(1),
+        )
+
+
+class ProviderRouter:
+    """Sends a fetch to several interchangeable data providers.
+
+    The first available provider is tried first. If it has not answered after
+    its observed p95 latency (or `hedge_delay` until enough calls were seen), the
+    same fetch is sent to the next provider, and the first good answer wins. A
+    provider that fails is replaced by the next one right away. Losing calls are
+    cancelled if they have not started yet, calls already running finish in the
+    background and still count towards the statistics.
+
+    Only transport errors, timeouts and 5xx or 429 responses fail over and count
+    against a provider, see `transient_error`. Other errors, like an unknown
+    ticker, are raised right away. Providers failing `failure_threshold` times
+    in a row are skipped for `cooldown` seconds, then get a single trial call.
+
+    Parameters
+    ----------
+    providers : List[str]
+        Providers in order of preference
+    workers : int, optional
+        Concurrent provider calls, by default 8
+    hedge_delay : float, optional
+        Seconds before hedging while a provider has too few samples, by default 2
+    min_samples : int, optional
+        Calls needed before the observed p95 is used, by default 20
+    failure_threshold : int, optional
+        Errors in a row that open a provider's circuit, by default 5
+    cooldown : float, optional
+        Seconds a provider's circuit stays open, by default 60
+    """
+
+    def __init__(
+        self,
+        providers: List[str],
+        workers: int = 8,
+        hedge_delay: float = 2,
+        min_samples: int = 20,
+        failure_threshold: int = 5,
+        cooldown: float = 60,
+    ):
+        self.providers = list(providers)
+        self.hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.stats: Dict[str, ProviderStats] = {
+            p: ProviderStats(failure_threshold=failure_threshold, cooldown=cooldown)
+            for p in self.providers
+        }
+        self.hedges = 0
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="obb-provider")
+
+    def candidates(self) -> List[str]:
+        """Providers to try in order, skipping open circuits."""
+        return [p for p in self.providers if self.stats[p].available]
+
+    def _call(self, provider: str, func: Callable[[str], T]) -> T:
+        stats = self.stats[provider]
+        # Checked again when the call starts, another call may have taken the trial
+        if not stats.acquire():
+            raise ProviderUnavailable(f"Error: {provider} is failing, try again later")
+        started = time.monotonic()
+        try:
+            result = func(provider)
+        except DeadlineExceeded:
+            # A trial call cut short holds the circuit half-open until `cooldown`
+            raise
+        except Exception as e:
+            # Errors of the request itself mean the provider is working
+            stats.record(time.monotonic() - started, not transient_error(e))
+            raise
+        stats.record(time.monotonic() - started, True)
+        return result
+
+    def _hedge_after(self, provider: str, started: float) -> float:
+        p95 = self.stats[provider].p95(self.min_samples)
+        delay = self.hedge_delay if p95 is None else p95
+        return max(0.0, started + delay - time.monotonic())
+
+    def fetch(self, func: Callable[[str], T]) -> T:
+        """Run `func(provider)` with hedging and failover, blocking until an answer.
+
+        Parameters
+        ----------
+        func : Callable[[str], T]
+            Blocking fetch taking the provider name
+
+        Raises
+        ------
+        ProviderUnavailable
+            When every provider's circuit is open
+        Exception
+            The first error that is not a provider failure, or the last provider
+            error when every provider failed
+        """
+        deadline = current_deadline()
+        queue = self.candidates()
+        if not queue:
+            raise ProviderUnavailable("Error: Every data provider is failing, try again later")
+        # Future -> (provider, start time), in launch order
+        running: Dict[Future, Tuple[str, float]] = {}
+        errors: List[Exception] = []
+
+        def launch():
+            provider = queue.pop(0)
+            # Copy the context so provider calls see the interaction's deadline
+            context = contextvars.copy_context()
+            future = self.executor.submit(context.run, self._call, provider, func)
+            running[future] = (provider, time.monotonic())
+
+        launch()
+        try:
+            while running:
+                timeout = None
+                if queue:
+                    # Hedge against the most recently started call
+                    timeout = self._hedge_after(*running[next(reversed(running))])
+                if deadline is not None:
+                    remaining = deadline.timeout(stage="Data fetch")
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    if deadline is not None:
+                        deadline.check("Data fetch")
+                    if queue:
+                        # Slower than usual, ask the next provider too
+                        self.hedges += 1
+                        launch()
+                    continue
+
+                for future in done:
+                    running.pop(future)
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        if not transient_error(e):
+                            # Every provider would fail the same way
+                            raise
+                        errors.append(e)
+                        # Fail over to the next provider right away
+                        if queue:
+                            launch()
+        finally:
+            for future in running:
+                future.cancel()
+
+        raise errors[-1]
+
+    def to_dict(self) -> dict:
+        """Return per-provider statistics and the number of hedged calls."""
+        return dict(
+            hedges=self.hedges,
+            providers={p: stats.to_dict() for p, stats in self.stats.items()},
+        )
+
@@ -1,55 +1,37 @@
-import base64
-import io
 import traceback
 import uuid
 from pathlib import Path
-from typing import Union, overload
+from typing import List, Optional, Union, overload
 
 import plotly.graph_objects as go
 import plotly.io as pio
-from PIL import Image
 
 from models.api_models import PlotsResponse
 
-from .backend import pywry_backend
-
-BOT_PATH = (Path(__file__).parent.parent / "bot").resolve()
-
-
-def autocrop_image(image: Image.Image, border=0) -> Image.Image:
-    """Crop empty space from PIL image
-
-    Parameters
-    ----------
-    image : Image.Image
-        PIL image to crop
-    border : int, optional
-        scale border outwards, by default 0
-
-    Returns
-    -------
-    Image.Image
-        Cropped image
-    """
-    bbox = image.getbbox()
-    image = image.crop(bbox)
-    (width, height) = image.size
-    width += border * 2
-    height += border * 2
-    cropped_image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-    cropped_image.paste(image, (border, border))
-    return cropped_image
+from .backend import backend_supervisor, pywry_backend
+from .postprocess import postprocess_pool
 
 
 class PyWryFigure(go.Figure):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    def __init__(self, *args, validate: bool = True, **kwargs):
+        """Plotly figure rendered through the PyWry backend.
+
+        Parameters
+        ----------
+        validate : bool, optional
+            Validate every property, by default True. Pass False for trusted
+            internal specs in nested form (no magic underscores) to skip
+            plotly's per-property validation.
+        """
+        super().__init__(*args, _validate=validate, **kwargs)
 
     def show(self, *args, **kwargs):
-        if pywry_backend().isatty:
+        # The supervised backend changes on failover, the process one is closed then
+        backend = backend_supervisor().active or pywry_backend()
+        if backend.isatty:
             try:
                 # We send the figure to the backend to be displayed
-                return pywry_backend().send_figure(self)
+                return backend.send_figure(self)
             except Exception:
                 traceback.print_exc()
 
@@ -103,26 +85,26 @@ class PyWryFigure(go.Figure):
                 "Must be one of 'png', 'jpeg', or 'svg'."
             )
 
-        try:
-            response = pywry_backend().figure_write_image(
-                self,
-                img_format=img_format,
-                scale=scale,
-                timeout=timeout,
-            )
-
-            if img_format == "svg":
-                return filepath.write_bytes(response)
+        # Render errors propagate, so commands can answer in text instead
+        response = backend_supervisor().figure_write_image(
+            self,
+            img_format=img_format,
+            scale=scale,
+            timeout=timeout,
+        )
+        if response is None:
+            raise RuntimeError("Error: The renderer returned no image")
 
-            return response
+        if img_format == "svg":
+            return filepath.write_bytes(response)
 
-        except Exception:
-            traceback.print_exc()
+        return response
 
     def prepare_image(
         self,
         filename: str = "plots",
         add_uuid: bool = True,
+        encoder: Optional[str] = None,
     ) -> PlotsResponse:
         """Prepare image for sending to Discord.
 
@@ -132,69 +114,102 @@ class PyWryFigure(go.Figure):
             Name to save image as
         add_uuid : bool, optional
             Add uuid to filename, by default True
+        encoder : str, optional
+            Image encoder, by default the one set in `IMAGE_ENCODER`
 
         Returns
         -------
         PlotsResponse
             PlotsResponse dataclass model with filename, image64
         """
-        filename_uuid = (
-            f"{filename}_{str(uuid.uuid4()).replace('-', '')}" if add_uuid else filename
-        )
-
-        fig_img = Image.open(io.BytesIO(base64.b64decode(self.pywry_image(scale=1))))
-        im_bg = Image.open(BOT_PATH / "assets" / "bg_dark_charts.png")
+        filename_uuid = unique_filename(filename, add_uuid)
 
-        # make new transparent image
-        new_img = Image.new("RGBA", im_bg.size, (255, 255, 255, 0))
+        # Compositing and encoding run on the post-processing pool
+        image64, extension = postprocess_pool().run(
+            "chart", self.pywry_image(scale=1), encoder
+        )
 
-        # paste background on it
-        new_img.paste(im_bg, (0, 0), im_bg)
+        # Built from our own render, skip validating (and copying) the image
+        return PlotsResponse.model_construct(
+            filename=filename_uuid, image64=image64, extension=extension
+        )
 
-        # Paste fig onto background img
-        x1 = int(0.5 * new_img.size[0]) - int(0.5 * fig_img.size[0])
-        y1 = int(0.5 * new_img.size[1]) - int(0.5 * fig_img.size[1])
-        x2 = int(0.5 * new_img.size[0]) + int(0.5 * fig_img.size[0])
-        y2 = int(0.5 * new_img.size[1]) + int(0.5 * fig_img.size[1])
+    def prepare_table(
+        self,
+        filename: str = "plots",
+        add_uuid: bool = True,
+        encoder: Optional[str] = None,
+    ) -> PlotsResponse:
+        return PyWryFigure.finish_tables(
+            [self.pywry_image(scale=2)], filename, add_uuid, encoder
+        )[0]
 
-        new_img.paste(fig_img, box=(x1, y1 - 15, x2, y2 - 15))
+    @staticmethod
+    def pywry_images(
+        figs: List["PyWryFigure"],
+        scale: int = 1,
+        timeout: int = 5,
+    ) -> List[str]:
+        """Render several figures to base64 PNG images in one backend round trip.
 
-        paste = Image.open(BOT_PATH / "assets" / "bg_charts_paste.png")
-        new_img.paste(paste, (0, 0), paste)
+        figs : List[PyWryFigure]
+            Figures to render
+        scale : int, optional
+            Image scale, by default 1
+        timeout : int, optional
+            Timeout for receiving each image, by default 5
+        """
+        return backend_supervisor().figure_write_images(
+            figs, img_format="png", scale=scale, timeout=timeout
+        )
 
-        fig_img.close()
-        im_bg.close()
-        paste.close()
+    @staticmethod
+    def prepare_tables(
+        figs: List["PyWryFigure"],
+        filename: str = "plots",
+        add_uuid: bool = True,
+        encoder: Optional[str] = None,
+    ) -> List[PlotsResponse]:
+        """Prepare several table figures for sending to Discord, rendered as a batch.
 
-        imagebytes = io.BytesIO()
-        new_img.save(imagebytes, "PNG")
-        new_img.close()
-        imagebytes.seek(0)
+        Parameters
+        ----------
+        figs : List[PyWryFigure]
+            Table figures to prepare
+        filename : str
+            Name to save images as
+        add_uuid : bool, optional
+            Add uuid to filenames, by default True
+        encoder : str, optional
+            Image encoder, by default the one set in `IMAGE_ENCODER`
 
-        return PlotsResponse(
-            filename=filename_uuid,
-            image64=base64.b64encode(imagebytes.read()).decode("utf-8"),
+        Returns
+        -------
+        List[PlotsResponse]
+            PlotsResponse dataclass models in the same order as `figs`
+        """
+        return PyWryFigure.finish_tables(
+            PyWryFigure.pywry_images(figs, scale=2), filename, add_uuid, encoder
         )
 
-    def prepare_table(
-        self,
+    @staticmethod
+    def finish_tables(
+        images64: List[str],
         filename: str = "plots",
         add_uuid: bool = True,
-    ) -> PlotsResponse:
-        filename_uuid = (
-            f"{filename}_{str(uuid.uuid4()).replace('-', '')}" if add_uuid else filename
-        )
+        encoder: Optional[str] = None,
+    ) -> List[PlotsResponse]:
+        """Crop and encode rendered tables in parallel on the post-processing pool."""
+        return [
+            PlotsResponse.model_construct(
+                filename=unique_filename(filename, add_uuid),
+                image64=image64,
+                extension=extension,
+            )
+            for image64, extension in postprocess_pool().map("table", images64, encoder)
+        ]
 
-        image = autocrop_image(
-            Image.open(io.BytesIO(base64.b64decode(self.pywry_image(scale=2)))), 0
-        )
 
-        imagebytes = io.BytesIO()
-        image.save(imagebytes, "PNG")
-        image.close()
-        imagebytes.seek(0)
+def unique_filename(filename: str, add_uuid: bool = True) -> str:
+    return f"{filename}_{str(uuid.uuid4()).replace('-', '')}" if add_uuid else filename
 
-        return PlotsResponse(
-            filename=filename_uuid,
-            image64=base64.b64encode(imagebytes.read()).decode("utf-8"),
-        )